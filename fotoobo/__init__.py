@@ -5,7 +5,23 @@ This is fotoobo, the mighty Fortinet toolbox for managing your Fortinet environm
 to be extendable to your needs. It's most likely the swiss army knife for Fortinet infrastructure.
 """
 
-from .fortinet import FortiAnalyzer, FortiClientEMS, FortiGate, FortiManager
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .fortinet import FortiAnalyzer, FortiClientEMS, FortiGate, FortiManager
 
 __all__ = ["FortiAnalyzer", "FortiClientEMS", "FortiGate", "FortiManager"]
 __version__: str = "2.2.0"
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Import the Fortinet classes on first access only. This keeps 'import fotoobo' cheap, which
+    matters for commands forwarded to the fotoobo daemon.
+    """
+    if name in __all__:
+        from . import fortinet  # pylint: disable=import-outside-toplevel
+
+        return getattr(fortinet, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
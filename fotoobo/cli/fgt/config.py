@@ -2,6 +2,7 @@
 The FortiGate get commands
 """
 
+# pylint: disable=anomalous-backslash-in-string
 import logging
 from pathlib import Path
 
@@ -29,6 +30,15 @@ def check(
         metavar="[bundles]",
         show_default=False,
     ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        help="The number of configuration files to check at the same time (in separate "
+        "processes). \[default: 1]",
+        show_default=False,
+        metavar="[jobs]",
+    ),
     smtp_server: str = typer.Option(
         None,
         "--smtp",
@@ -41,7 +51,7 @@ def check(
     Check one or more FortiGate configuration files.
     """
     inventory = Inventory(config.inventory_file)
-    result = fgt.config.check(configuration, bundles)
+    result = fgt.config.check(configuration, bundles, jobs)
 
     if smtp_server:
         if smtp_server in inventory.assets:
@@ -69,9 +79,18 @@ def get(
         ..., help="Scope of the configuration ('global' or 'vdom')", metavar="[scope]"
     ),
     path: str = typer.Argument("/", help="Configuration path", metavar="[path]"),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        help="The number of configuration files to parse at the same time (in separate "
+        "processes). \[default: 1]",
+        show_default=False,
+        metavar="[jobs]",
+    ),
 ) -> None:
     """Get configuration or parts of it from one or more FortiGate configuration files."""
-    result = fgt.config.get(configuration, scope, path)
+    result = fgt.config.get(configuration, scope, path, jobs)
     result.print_raw()
 
 
@@ -86,11 +105,20 @@ def info(
     as_list: bool = typer.Option(
         False, "--list", "-l", help="Print the result as a list instead of separate blocks."
     ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        help="The number of configuration files to parse at the same time (in separate "
+        "processes). \[default: 1]",
+        show_default=False,
+        metavar="[jobs]",
+    ),
 ) -> None:
     """
     Get the information from one or more FortiGate configuration files.
     """
-    result = fgt.config.info(configuration)
+    result = fgt.config.info(configuration, jobs)
 
     if as_list:
         info_dicts = []
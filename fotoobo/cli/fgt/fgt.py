@@ -2,18 +2,23 @@
 The FortiGate commands
 """
 
+# pylint: disable=anomalous-backslash-in-string
 import logging
-import os
+import sys
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, List
 
 import typer
 
 from fotoobo import tools
-from fotoobo.exceptions import GeneralWarning
+from fotoobo.exceptions import GeneralError, GeneralWarning
 from fotoobo.helpers import cli_path
 from fotoobo.helpers.config import config as fotoobo_config
-from fotoobo.helpers.files import create_dir, file_to_ftp, file_to_zip
+from fotoobo.helpers.files import COMPRESSIONS, create_dir
+from fotoobo.helpers.result import Result
+from fotoobo.helpers.store import BackupStore
+from fotoobo.helpers.upload import Uploader
 from fotoobo.inventory import Inventory
 
 from . import config, monitor
@@ -41,8 +46,55 @@ def callback(context: typer.Context) -> None:
     log.debug("About to execute command: '%s'", context.invoked_subcommand)
 
 
+def _create_uploader(inventory: Inventory, ftp_server: str, compression: str) -> Uploader:
+    """
+    Create the uploader for the backups
+
+    Args:
+        inventory:   The inventory with the ftp server
+        ftp_server:  The name of the ftp server
+        compression: The compression of the uploads
+
+    Returns:
+        The uploader
+
+    Raises:
+        GeneralWarning: If the ftp server is not in the inventory or the compression is unknown
+    """
+    if ftp_server not in inventory.assets:
+        raise GeneralWarning(f"FTP server '{ftp_server}' not found in inventory")
+
+    if compression not in COMPRESSIONS:
+        raise GeneralWarning(
+            f"Unknown compression '{compression}' (use one of {', '.join(COMPRESSIONS)})"
+        )
+
+    return Uploader(inventory.assets[ftp_server])
+
+
+def _push_upload_messages(uploader: Uploader, result: Result[Any], ftp_server: str) -> None:
+    """
+    Wait for the uploads of the backups and add their outcome to the messages of the result
+
+    Args:
+        uploader:   The uploader with the uploads of the backups
+        result:     The result of the backups
+        ftp_server: The name of the ftp server
+    """
+    for name, outcome in uploader.wait().items():
+        if isinstance(outcome, GeneralError):
+            result.push_message(name, outcome.message, level="error")
+
+        elif outcome:
+            message = f"Upload of config file for '{name}' to '{ftp_server}' failed ({outcome})"
+            result.push_message(name, message, level="error")
+
+        else:
+            result.push_message(name, f"Uploaded config file for '{name}' to '{ftp_server}'")
+
+
 @app.command()
-def backup(
+def backup(  # pylint: disable=too-many-arguments,too-many-locals
     host: str = typer.Argument(
         "",
         help="The FortiGate to backup (must be defined in the inventory). "
@@ -65,6 +117,15 @@ def backup(
         help="The ftp configuration from the inventory to send the backup to.",
         metavar="server",
     ),
+    compression: str = typer.Option(
+        "zip",
+        "--compression",
+        help="The compression of the backups sent to the ftp server (zip, gzip or zstd). They are "
+        "compressed on the fly while uploading. zstd needs the package 'zstandard'. "
+        "\[default: zip]",
+        show_default=False,
+        metavar="compression",
+    ),
     smtp_server: str = typer.Option(
         None,
         "--smtp",
@@ -72,6 +133,20 @@ def backup(
         help="The smtp configuration from the inventory to send potential errors to.",
         metavar="server",
     ),
+    skip_unchanged: bool = typer.Option(
+        False,
+        "--skip-unchanged",
+        help="Skip the backup of FortiGates whose configuration has not changed since the last "
+        "backup in backup_dir.",
+        show_default=False,
+    ),
+    store_dir: Path = typer.Option(
+        None,
+        "--store",
+        help="Also add the backups to the backup store in this directory (see 'fgt history').",
+        show_default=False,
+        metavar="store_dir",
+    ),
 ) -> None:
     """
     Backup one or more FortiGate(s).
@@ -82,33 +157,119 @@ def backup(
         backup_dir = Path.cwd()
 
     create_dir(backup_dir)
-    result = tools.fgt.backup(host)
+    uploader = _create_uploader(inventory, ftp_server, compression) if ftp_server else None
+
+    time: str = datetime.now().strftime("%Y%m%d-%H%M")
+
+    def _upload(name: str, config_file: Path) -> None:
+        """Upload a compressed backup while the other FortiGates are still backed up"""
+        if uploader:
+            uploader.submit(
+                name, config_file, f"{name}-{time}.conf{COMPRESSIONS[compression]}", compression
+            )
+
+    result = tools.fgt.backup_to_dir(
+        host, backup_dir, skip_unchanged=skip_unchanged, on_backup=_upload
+    )
+    store = BackupStore(store_dir) if store_dir else None
+    unchanged = 0
 
     for name, data in result.all_results().items():
-        config_file = backup_dir / Path(name).with_suffix(".conf")
+        if not data:
+            continue
 
-        if config_file.is_file():
-            os.remove(config_file)
+        if data.get("unchanged"):
+            unchanged += 1
+            continue
 
-        config_file.write_text(data, encoding="UTF-8")
+        config_file = Path(data["file"])
 
         if not config_file.is_file():
             result.push_message(name, f"backup file for '{name}' does not exist")
             continue
 
-        if ftp_server:
-            if ftp_server in inventory.assets:
-                server = inventory.assets[ftp_server]
-                log.debug("Compressing configuration '%s'", name)
-                time: str = datetime.now().strftime("%Y%m%d-%H%M")
-                zip_file = backup_dir / Path(name + "-" + time + ".conf.zip")
-                file_to_zip(config_file, zip_file)
-                file_to_ftp(zip_file, server)
-                os.remove(zip_file)
-                result.push_message(name, f"Uploaded config file for '{name}' to '{ftp_server}'")
+        if store:
+            digest = store.add(name, config_file.read_bytes())
+            result.push_message(name, f"Added revision '{digest[:12]}' to the backup store")
+
+    if uploader:
+        _push_upload_messages(uploader, result, ftp_server)
+        uploader.close()
+
+    if store:
+        store.close()
 
-            else:
-                raise GeneralWarning(f"FTP server '{ftp_server}' not found in inventory")
+    if skip_unchanged:
+        result.console.print(
+            f"Skipped {unchanged} of {len(result.all_results())} FortiGate backups "
+            "(config unchanged)"
+        )
 
     if smtp_server and smtp_server in inventory.assets:
         result.send_messages_as_mail(inventory.assets[smtp_server], "error")
+
+
+@app.command()
+def history(
+    host: str = typer.Argument(
+        ...,
+        help="The FortiGate to show the backup history for (as named in the inventory).",
+        show_default=False,
+        metavar="[host]",
+    ),
+    store_dir: Path = typer.Option(
+        ...,
+        "--store",
+        help="The directory of the backup store.",
+        show_default=False,
+        metavar="store_dir",
+    ),
+    revision: str = typer.Option(
+        None,
+        "--revision",
+        "-r",
+        help="The revision to get (its hash or the beginning of it).",
+        show_default=False,
+        metavar="revision",
+    ),
+    output_file: Path = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="The file to write the revision to. Default is the console.",
+        show_default=False,
+        metavar="file",
+    ),
+) -> None:
+    """
+    Show the backup history of a FortiGate or get one of its revisions from the backup store.
+    """
+    with BackupStore(store_dir) as store:
+        revisions = store.revisions(host)
+        if not revision:
+            result = Result[List[Dict[str, Any]]]()
+            rows = [
+                {
+                    "time": datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S"),
+                    "revision": digest[:12],
+                    "size": str(size),
+                }
+                for timestamp, digest, size in revisions
+            ]
+            if not rows:
+                raise GeneralWarning(f"No backups of '{host}' in the backup store")
+
+            result.print_table_raw(rows, auto_header=True, title=host)
+            return
+
+        digests = {_[1] for _ in revisions if _[1].startswith(revision)}
+        if len(digests) != 1:
+            raise GeneralWarning(f"Revision '{revision}' of '{host}' not found or not unique")
+
+        content = store.get(digests.pop())
+
+    if output_file:
+        output_file.write_bytes(content)
+
+    else:
+        sys.stdout.write(content.decode("UTF-8", "replace"))
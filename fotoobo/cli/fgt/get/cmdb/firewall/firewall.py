@@ -4,11 +4,13 @@ The FortiGate commands
 
 # pylint: disable=anomalous-backslash-in-string
 import logging
+from typing import Any, List
 
 import typer
 
 from fotoobo.exceptions import GeneralError
 from fotoobo.helpers import cli_path
+from fotoobo.helpers.result import Result
 from fotoobo.tools.fgt.cmdb.firewall import *  # pylint: disable=wildcard-import
 
 app = typer.Typer(no_args_is_help=True, rich_markup_mode="rich")
@@ -27,12 +29,28 @@ def callback(context: typer.Context) -> None:
     log.debug("About to execute command: '%s'", context.invoked_subcommand)
 
 
+def _print_result(result: Result[List[Any]], output_file: str) -> None:
+    """
+    Print the objects of every FortiGate as a table (if not written into a file) and the messages
+
+    Args:
+        result:      The result with the objects per FortiGate
+        output_file: The file the objects have been written to
+    """
+    if not output_file:
+        for name, data in result.all_results().items():
+            if data:
+                result.print_table_raw(data, auto_header=True, title=name)
+
+    result.print_messages()
+
+
 @app.command()
 def address(
     host: str = typer.Argument(
         "",
-        help="The FortiGate hostname to access (must be defined in the inventory). "
-        "\[default: <all>]",
+        help="The FortiGate hostname to access (must be defined in the inventory). Wildcard * is "
+        "supported in any position. \[default: <all>]",
         show_default=False,
         metavar="[host]",
     ),
@@ -53,7 +71,8 @@ def address(
         None,
         "--output",
         "-o",
-        help="Output file (format is specified by extension)",
+        help="Output file (format is specified by extension, '.csv' and '.jsonl' write one row "
+        "per object)",
         metavar="[file]",
         show_default=False,
     ),
@@ -63,16 +82,15 @@ def address(
         raise GeneralError("With name argument you have to specify one single VDOM (with --vdom)")
 
     result = get_cmdb_firewall_address(host, name, vdom, output_file)
-    if not output_file:
-        result.print_table_raw(result.results[host], auto_header=True, title=host)
+    _print_result(result, output_file)
 
 
 @app.command()
 def addrgrp(
     host: str = typer.Argument(
         "",
-        help="The FortiGate hostname to access (must be defined in the inventory). "
-        "\[default: <all>]",
+        help="The FortiGate hostname to access (must be defined in the inventory). Wildcard * is "
+        "supported in any position. \[default: <all>]",
         show_default=False,
         metavar="[host]",
     ),
@@ -93,7 +111,8 @@ def addrgrp(
         None,
         "--output",
         "-o",
-        help="Output file (format is specified by extension)",
+        help="Output file (format is specified by extension, '.csv' and '.jsonl' write one row "
+        "per object)",
         metavar="[file]",
         show_default=False,
     ),
@@ -103,16 +122,15 @@ def addrgrp(
         raise GeneralError("With name argument you have to specify one single VDOM (with --vdom)")
 
     result = get_cmdb_firewall_addrgrp(host, name, vdom, output_file)
-    if not output_file:
-        result.print_table_raw(result.results[host], auto_header=True, title=host)
+    _print_result(result, output_file)
 
 
 @app.command()
 def service_custom(
     host: str = typer.Argument(
         "",
-        help="The FortiGate hostname to access (must be defined in the inventory). "
-        "\[default: <all>]",
+        help="The FortiGate hostname to access (must be defined in the inventory). Wildcard * is "
+        "supported in any position. \[default: <all>]",
         show_default=False,
         metavar="[host]",
     ),
@@ -133,7 +151,8 @@ def service_custom(
         None,
         "--output",
         "-o",
-        help="Output file (format is specified by extension)",
+        help="Output file (format is specified by extension, '.csv' and '.jsonl' write one row "
+        "per object)",
         metavar="[file]",
         show_default=False,
     ),
@@ -143,16 +162,15 @@ def service_custom(
         raise GeneralError("With name argument you have to specify one single VDOM (with --vdom)")
 
     result = get_cmdb_firewall_service_custom(host, name, vdom, output_file)
-    if not output_file:
-        result.print_table_raw(result.results[host], auto_header=True, title=host)
+    _print_result(result, output_file)
 
 
 @app.command()
 def service_group(
     host: str = typer.Argument(
         "",
-        help="The FortiGate hostname to access (must be defined in the inventory). "
-        "\[default: <all>]",
+        help="The FortiGate hostname to access (must be defined in the inventory). Wildcard * is "
+        "supported in any position. \[default: <all>]",
         show_default=False,
         metavar="[host]",
     ),
@@ -173,7 +191,8 @@ def service_group(
         None,
         "--output",
         "-o",
-        help="Output file (format is specified by extension)",
+        help="Output file (format is specified by extension, '.csv' and '.jsonl' write one row "
+        "per object)",
         metavar="[file]",
         show_default=False,
     ),
@@ -183,5 +202,4 @@ def service_group(
         raise GeneralError("With name argument you have to specify one single VDOM (with --vdom)")
 
     result = get_cmdb_firewall_service_group(host, name, vdom, output_file)
-    if not output_file:
-        result.print_table_raw(result.results[host], auto_header=True, title=host)
+    _print_result(result, output_file)
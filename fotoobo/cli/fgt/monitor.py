@@ -2,9 +2,11 @@
 The FortiGate check commands
 """
 
+# pylint: disable=anomalous-backslash-in-string
 import logging
+import sys
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import typer
 from rich.pretty import pprint
@@ -120,3 +122,71 @@ def hamaster(
                 headers=["FortiGate Cluster", "Status"],
                 title="FortiGate HA master status",
             )
+
+
+@app.command()
+def watch(  # pylint: disable=too-many-arguments
+    host: str = typer.Argument(
+        "",
+        help="The FortiGate(s) to poll (must be defined in the inventory). Wildcard * is "
+        "supported in any position. \[default: <all>]",
+        show_default=False,
+        metavar="[host]",
+    ),
+    endpoints: List[str] = typer.Option(
+        ["system/ha-checksums"],
+        "--endpoint",
+        "-e",
+        help="The monitor endpoint to poll (e.g. 'system/interface'). Use it more than once to "
+        "poll several endpoints. \[default: system/ha-checksums]",
+        show_default=False,
+        metavar="endpoint",
+    ),
+    interval: float = typer.Option(
+        60,
+        "--interval",
+        "-i",
+        help="The seconds between two polls. \[default: 60]",
+        show_default=False,
+        metavar="seconds",
+    ),
+    jitter: float = typer.Option(
+        0.1,
+        "--jitter",
+        help="The fraction of the interval to spread the polls of a round over. \[default: 0.1]",
+        show_default=False,
+        metavar="fraction",
+    ),
+    output_file: Optional[Path] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="The JSON Lines file to append the changes to. Default is stdout.",
+        show_default=False,
+        metavar="[output]",
+    ),
+    polls: int = typer.Option(
+        0,
+        "--polls",
+        help="Stop after this number of polls. \[default: 0 (until interrupted)]",
+        show_default=False,
+        metavar="number",
+    ),
+) -> None:
+    """
+    Watch monitor endpoints of FortiGates and write their changes.
+
+    The FortiGates are polled on a schedule with their starts spread (jitter) over the interval.
+    Their sessions are kept between the polls. Only the values which changed since the last poll
+    are written, as one JSON document per line. Stop it with Ctrl-C.
+    """
+    try:
+        if output_file:
+            with output_file.open("a", encoding="UTF-8") as sink:
+                fgt.monitor.watch(host, endpoints, sink, interval, jitter, polls)
+
+        else:
+            fgt.monitor.watch(host, endpoints, sys.stdout, interval, jitter, polls)
+
+    except KeyboardInterrupt:
+        log.info("Stopped watching")
@@ -11,16 +11,23 @@ Caution: Use docstrings with care as they are used to print help texts on any co
 import logging
 import os
 import sys
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import typer
 
 from fotoobo import tools
+from fotoobo.exceptions import GeneralError
 from fotoobo.helpers import cli_path
+from fotoobo.helpers.cli import run_app
 from fotoobo.helpers.config import config
+from fotoobo.helpers.daemon import Daemon, get_socket_path
+from fotoobo.helpers.fanout import parse_max_workers
 from fotoobo.helpers.log import Log
+from fotoobo.helpers.metrics import metrics
 from fotoobo.helpers.output import print_logo
+from fotoobo.inventory import Inventory
 
 from . import convert, get
 from .ems import ems
@@ -47,7 +54,7 @@ def version_callback(value: bool) -> None:
 
 
 @app.callback()
-def callback(  # pylint: disable=too-many-arguments
+def callback(  # pylint: disable=too-many-arguments,too-many-branches,too-many-locals
     context: typer.Context,
     config_file: Optional[Path] = typer.Option(
         None,
@@ -71,6 +78,72 @@ def callback(  # pylint: disable=too-many-arguments
     version: Optional[bool] = typer.Option(  # pylint: disable=unused-argument
         None, "--version", "-V", help="Print the fotoobo version.", callback=version_callback
     ),
+    workers: Optional[List[str]] = typer.Option(
+        None,
+        "--workers",
+        help="Devices to process at the same time in fleet commands. Use a number for all device "
+        "types or type=number for one type (repeatable). \[default: 10]",
+        metavar="[workers]",
+        show_default=False,
+    ),
+    rate_limit: Optional[float] = typer.Option(
+        None,
+        "--rate-limit",
+        help="Max devices to start per second in fleet commands. \[default: unlimited]",
+        metavar="[rate]",
+        show_default=False,
+    ),
+    host_timeout: Optional[float] = typer.Option(
+        None,
+        "--host-timeout",
+        help="Deadline in seconds per device in fleet commands. \[default: none]",
+        metavar="[seconds]",
+        show_default=False,
+    ),
+    cache_ttl: Optional[float] = typer.Option(
+        None,
+        "--cache-ttl",
+        help="Cache the responses of GET requests for this many seconds (0 disables the cache). "
+        "\[default: no cache]",
+        metavar="[seconds]",
+        show_default=False,
+    ),
+    deadline: Optional[float] = typer.Option(
+        None,
+        "--deadline",
+        help="Deadline in seconds for the whole run of fleet commands. \[default: none]",
+        metavar="[seconds]",
+        show_default=False,
+    ),
+    record: Optional[Path] = typer.Option(
+        None,
+        "--record",
+        help="Record all the API requests and responses to a cassette file.",
+        metavar="[file]",
+        show_default=False,
+    ),
+    replay: Optional[Path] = typer.Option(
+        None,
+        "--replay",
+        help="Replay all the API responses from a cassette file (no network access).",
+        metavar="[file]",
+        show_default=False,
+    ),
+    replay_latency: Optional[float] = typer.Option(
+        None,
+        "--replay-latency",
+        help="Simulated latency in seconds per replayed response. \[default: as recorded]",
+        metavar="[seconds]",
+        show_default=False,
+    ),
+    metrics_file: Optional[Path] = typer.Option(
+        None,
+        "--metrics",
+        help="Export the API request metrics to a file at the end of the run. Use the suffix .prom "
+        "for the Prometheus text format, JSON otherwise.",
+        metavar="[file]",
+        show_default=False,
+    ),
 ) -> None:
     """
     The Fortinet Toolbox (fotoobo) - make IT easy
@@ -85,6 +158,34 @@ def callback(  # pylint: disable=too-many-arguments
     config.load_configuration(config_file)
     config.no_logo = True if nologo else config.no_logo
 
+    if workers:
+        config.fanout["max_workers"] = parse_max_workers(workers)
+
+    if rate_limit is not None:
+        config.fanout["rate_limit"] = rate_limit
+
+    if host_timeout is not None:
+        config.fanout["timeout"] = host_timeout
+
+    if deadline is not None:
+        config.fanout["deadline"] = deadline
+
+    if cache_ttl is not None:
+        config.cache = {**config.cache, "ttl": cache_ttl} if cache_ttl > 0 else {}
+
+    if record and replay:
+        raise GeneralError("Use either --record or --replay, not both")
+
+    if record or replay:
+        config.cassette = {"file": record or replay, "mode": "record" if record else "replay"}
+
+    if replay_latency is not None and config.cassette:
+        config.cassette["latency"] = replay_latency
+
+    if metrics_file:
+        metrics.enabled = True
+        context.call_on_close(partial(metrics.export, metrics_file))
+
     if log_level:
         log_level = log_level.upper()
 
@@ -99,10 +200,18 @@ def callback(  # pylint: disable=too-many-arguments
     # If a config option is a data-structure (dict) unpack it and write it line-by-line
     # For security reasons all sensitive values are shortened
     for attr in dir(config):
-        if attr.startswith("_") or attr in ["config", "load_configuration"]:
+        if attr.startswith("_") or attr in ["config", "load_configuration", "reset"]:
             continue
 
-        if attr in ["audit_logging", "logging", "vault"] and getattr(config, attr):
+        if attr in [
+            "audit_logging",
+            "cache",
+            "cassette",
+            "circuit_breaker",
+            "fanout",
+            "logging",
+            "vault",
+        ] and getattr(config, attr):
             for sub_attr, value in getattr(config, attr).items():
                 if attr == "vault" and sub_attr in ["role_id", "secret_id"]:
                     value = f"{value[:4]}...{value[-4:]}"
@@ -141,6 +250,51 @@ def greet(
     tools.greet(str(name), bye, log_enabled)
 
 
+@app.command()
+def daemon(
+    socket_path: Optional[Path] = typer.Option(
+        None,
+        "--socket",
+        help="The Unix socket to listen on. \[default: ~/.cache/fotoobo/daemon.sock]",
+        metavar="[socket]",
+        show_default=False,
+    ),
+) -> None:
+    """
+    Run fotoobo as a daemon.
+
+    While the daemon is running the short fotoobo queries (like get version) are forwarded to it.
+    It keeps the inventory, the connections and the sessions to the devices between two commands.
+    Set the environment variable FOTOOBO_DAEMON_SOCKET if you use another socket than the default.
+    """
+    socket_path = socket_path or get_socket_path()
+    if not socket_path:
+        raise GeneralError("No socket for the fotoobo daemon given")
+
+    def _run(argv: List[str]) -> int:
+        """Run a forwarded command with a clean configuration and logging"""
+        config.reset()
+        cli_path.clear()
+        metrics.reset()
+        for logger in [logging.getLogger("fotoobo"), logging.getLogger("audit")]:
+            logger.handlers = []
+
+        return run_app(app, argv)
+
+    Inventory.keep_alive = True
+    with Daemon(socket_path, _run) as server:
+        log.info("fotoobo daemon listening on '%s'", socket_path)
+        try:
+            server.serve_forever()
+
+        except KeyboardInterrupt:
+            log.info("fotoobo daemon stopped")
+
+        finally:
+            Inventory.keep_alive = False
+            Inventory.release_shared_assets()
+
+
 # fotoobo specific commands
 app.add_typer(convert.app, name="convert", help="Convert commands for fotoobo.")
 app.add_typer(get.app, name="get", help="Get information about fotoobo or your configuration.")
@@ -56,6 +56,14 @@ class GeneralError(GeneralException):
     """
 
 
+class CircuitOpenError(GeneralError):
+    """
+    The exception to raise if a request to a device is not sent because its circuit is open.
+    The device has been unreachable for several consecutive requests and is marked as unreachable
+    for a while. As it is a GeneralError any existing error handling still applies.
+    """
+
+
 class GeneralWarning(GeneralException):
     """
     The exception to raise if a general warning occurred.
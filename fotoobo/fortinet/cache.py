@@ -0,0 +1,305 @@
+"""
+The ResponseCache class caches the responses of idempotent API requests on the local disk
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import Any, Dict, Optional
+
+import requests
+
+from fotoobo.helpers.config import config
+
+from .cassette import Cassette
+from .response import dump_response, load_response
+
+log = logging.getLogger("fotoobo")
+
+# The endpoints which are never cached by default because they belong to the session handling or
+# because they are used to detect changes or to poll the progress of a task
+UNCACHED_ENDPOINTS = [
+    "GET /auth/*",
+    "GET /system/serial_number",
+    "GET /monitor/system/ha-checksums",
+    "get /sys/status",
+    "get /task/*",
+]
+
+
+class ResponseCache:
+    """
+    Cache the responses of idempotent API requests (HTTP GET and JSON-RPC 'get') in a directory.
+
+    A response is cached per host, method, URL, parameters, payload and the credentials it has been
+    requested with (like the API token or the FortiManager session key) for 'ttl' seconds. So a
+    response is never handed out to another session. The credentials are only saved as a hash.
+
+    Use 'ttls' to set another time to live for some endpoints. They are given as shell-style
+    patterns of the endpoints as used in the metrics (e.g. "GET /monitor/system/status" or
+    "get /dvmdb/adom/*/device"). The first matching pattern wins and a time to live of 0 disables
+    caching for an endpoint. Only successful responses are cached.
+
+    Every response is saved in its own file. If the files take more than 'max_size' bytes the least
+    recently written ones are removed.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        ttl: float = 60,
+        ttls: Optional[Dict[str, float]] = None,
+        max_size: int = 100 * 1024 * 1024,
+    ) -> None:
+        """
+        Initialize the cache and index the responses already cached in cache_dir.
+
+        Args:
+            cache_dir: The directory to save the cached responses to
+            ttl:       The default time to live of a cached response in seconds
+            ttls:      The time to live per endpoint pattern in seconds
+            max_size:  The max number of bytes of all the cached responses
+        """
+        self.cache_dir = cache_dir.expanduser()
+        self.ttl = float(ttl)
+        self.ttls = {pattern: float(_) for pattern, _ in (ttls or {}).items()}
+        self.max_size = int(max_size)
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[Path, int]" = OrderedDict()
+        self._size = 0
+
+        try:
+            for cache_file in sorted(
+                self.cache_dir.glob("*.json"), key=lambda _: _.stat().st_mtime
+            ):
+                self._index[cache_file] = cache_file.stat().st_size
+                self._size += self._index[cache_file]
+
+        except OSError as err:
+            log.warning("Unable to index response cache '%s': %s", self.cache_dir, err)
+
+    def get_ttl(self, method: str, endpoint: str, payload: Optional[Dict[str, Any]]) -> float:
+        """
+        Get the time to live for the response of a request.
+
+        Args:
+            method:   HTTP request method
+            endpoint: The endpoint of the request (as used in the metrics)
+            payload:  JSON body of the request
+
+        Returns:
+            The time to live in seconds (0 if the response must not be cached)
+        """
+        jsonrpc_method = payload.get("method") if payload else None
+        if method.upper() != "GET" and jsonrpc_method != "get":
+            return 0
+
+        for pattern, ttl in self.ttls.items():
+            if fnmatchcase(endpoint, pattern):
+                return ttl
+
+        if any(fnmatchcase(endpoint, _) for _ in UNCACHED_ENDPOINTS):
+            return 0
+
+        return self.ttl
+
+    def get(  # pylint: disable=too-many-arguments
+        self,
+        hostname: str,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, str]],
+        payload: Optional[Dict[str, Any]],
+        identity: str = "",
+    ) -> Optional[requests.Response]:
+        """
+        Get the cached response of a request.
+
+        Args:
+            hostname: The hostname of the device
+            method:   HTTP request method
+            url:      The full URL of the request
+            params:   Dictionary with parameters
+            payload:  JSON body
+            identity: The credentials the request is sent with
+
+        Returns:
+            The cached response or None if it is not cached or expired
+        """
+        key = self._key(hostname, method, url, params, payload, identity)
+        cache_file = self._cache_file(key)
+
+        try:
+            entry = json.loads(cache_file.read_text(encoding="UTF-8"))
+
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("key") != key or entry.get("expires", 0) <= time():
+            return None
+
+        log.debug('Cache hit: "%s %s" (%s)', method.upper(), url, hostname)
+        return load_response(entry["response"], url)
+
+    def put(  # pylint: disable=too-many-arguments
+        self,
+        hostname: str,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, str]],
+        payload: Optional[Dict[str, Any]],
+        response: requests.Response,
+        ttl: float,
+        identity: str = "",
+    ) -> None:
+        """
+        Save the response of a request to the cache. Unsuccessful responses (HTTP status other than
+        200 or a JSON-RPC status code other than 0) are not saved.
+
+        Args:
+            hostname: The hostname of the device
+            method:   HTTP request method
+            url:      The full URL of the request
+            params:   Dictionary with parameters
+            payload:  JSON body
+            response: The response of the request
+            ttl:      The time to live of the response in seconds
+            identity: The credentials the request has been sent with
+        """
+        if response.status_code != 200 or not self._jsonrpc_successful(response, payload):
+            return
+
+        key = self._key(hostname, method, url, params, payload, identity)
+        cache_file = self._cache_file(key)
+        data = json.dumps(
+            {"key": key, "expires": time() + ttl, "response": dump_response(response)}
+        )
+
+        with self._lock:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                with NamedTemporaryFile(
+                    "w", dir=self.cache_dir, suffix=".tmp", delete=False, encoding="UTF-8"
+                ) as temp_file:
+                    temp_file.write(data)
+
+                os.replace(temp_file.name, cache_file)
+
+            except OSError as err:
+                log.warning("Unable to write response cache '%s': %s", cache_file, err)
+                return
+
+            self._size -= self._index.pop(cache_file, 0)
+            self._index[cache_file] = len(data.encode("UTF-8"))
+            self._size += self._index[cache_file]
+            self._evict()
+
+    @staticmethod
+    def _key(  # pylint: disable=too-many-arguments
+        hostname: str,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, str]],
+        payload: Optional[Dict[str, Any]],
+        identity: str,
+    ) -> str:
+        """
+        Get the key of a request. The secrets are removed from the request and only the hash of
+        the credentials is added, so the key may be saved in the cache file.
+
+        Args:
+            hostname: The hostname of the device
+            method:   HTTP request method
+            url:      The full URL of the request
+            params:   Dictionary with parameters
+            payload:  JSON body
+            identity: The credentials the request is sent with
+
+        Returns:
+            The key of the request
+        """
+        digest = hashlib.sha256(identity.encode("UTF-8")).hexdigest()
+        return json.dumps([Cassette.key(hostname, method, url, params, payload), digest])
+
+    def _cache_file(self, key: str) -> Path:
+        """
+        Get the file of a cached response.
+
+        Args:
+            key: The key of the request
+
+        Returns:
+            The file the response is cached in
+        """
+        return self.cache_dir / f"{hashlib.sha256(key.encode('UTF-8')).hexdigest()}.json"
+
+    def _evict(self) -> None:
+        """Remove the least recently written responses until the cache fits into max_size"""
+        while self._size > self.max_size and self._index:
+            cache_file, size = self._index.popitem(last=False)
+            self._size -= size
+            cache_file.unlink(missing_ok=True)
+            log.debug("Evicted '%s' from response cache", cache_file.name)
+
+    @staticmethod
+    def _jsonrpc_successful(response: requests.Response, payload: Optional[Dict[str, Any]]) -> bool:
+        """
+        Check the status codes of a JSON-RPC response (FortiManager/FortiAnalyzer) which are sent
+        with HTTP status 200 even if the request failed.
+
+        Args:
+            response: The response of the request
+            payload:  JSON body of the request
+
+        Returns:
+            True if the request is no JSON-RPC request or all its results have the status code 0
+        """
+        if not payload or "method" not in payload:
+            return True
+
+        try:
+            return all(_["status"]["code"] == 0 for _ in response.json()["result"])
+
+        except (ValueError, KeyError, TypeError):
+            return False
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """
+    Get the response cache as configured in the 'cache' section of the fotoobo configuration (or
+    given with the command line option --cache-ttl).
+
+    Returns:
+        The response cache or None if it is not configured
+    """
+    global _cache  # pylint: disable=global-statement
+
+    settings = config.cache
+    if not settings:
+        return None
+
+    cache_dir = Path(settings.get("dir", "~/.cache/fotoobo/responses")).expanduser()
+    ttl = float(settings.get("ttl", 60))
+    ttls = {pattern: float(_) for pattern, _ in (settings.get("ttls") or {}).items()}
+    max_size = int(settings.get("max_size", 100 * 1024 * 1024))
+
+    if (
+        _cache is None
+        or _cache.cache_dir != cache_dir
+        or _cache.ttl != ttl
+        or _cache.ttls != ttls
+        or _cache.max_size != max_size
+    ):
+        _cache = ResponseCache(cache_dir, ttl, ttls, max_size)
+
+    return _cache
@@ -0,0 +1,263 @@
+"""
+The Cassette class records the API requests to Fortinet devices and replays them offline
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from time import sleep
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from fotoobo.exceptions import GeneralError
+from fotoobo.helpers.config import config
+
+from .response import dump_response, load_response
+
+log = logging.getLogger("fotoobo")
+
+# The keys in request payloads and parameters which are never written to a cassette
+SECRET_KEYS = ["access_token", "passwd", "password", "session", "token"]
+
+# The transport errors which are raised again when replaying them
+TRANSPORT_ERRORS = ["ConnectionError", "ConnectTimeout", "ReadTimeout", "SSLError"]
+
+
+def redact(data: Any) -> Any:
+    """
+    Replace the values of all the secret keys in a (nested) payload.
+
+    Args:
+        data: The payload or parameters of a request
+
+    Returns:
+        A copy of data with all the secret values replaced by "***"
+    """
+    if isinstance(data, dict):
+        return {key: "***" if key in SECRET_KEYS else redact(value) for key, value in data.items()}
+
+    if isinstance(data, list):
+        return [redact(_) for _ in data]
+
+    return data
+
+
+class Cassette:
+    """
+    Record every API request and its response into a cassette file or replay them from there.
+
+    In record mode every request sent by Fortinet.api() is written to the cassette as one JSON line
+    together with its response (or transport error) and the time it took. In replay mode no request
+    is sent at all. Instead the recorded response is returned after the recorded time (or the
+    given simulated latency). A request is matched by its host, method, URL, parameters and
+    payload. If the same request has been recorded several times (e.g. when polling a FortiManager
+    task) the responses are replayed in the recorded order and the last one is repeated.
+
+    Secrets in request payloads and parameters are not recorded. But the responses are written as
+    they are, so protect your cassettes like you protect your inventory.
+    """
+
+    def __init__(self, cassette_file: Path, mode: str, latency: Optional[float] = None) -> None:
+        """
+        Initialize the cassette. In record mode the cassette file is emptied, in replay mode it is
+        loaded.
+
+        Args:
+            cassette_file: The file to record to or to replay from
+            mode:          Either "record" or "replay"
+            latency:       The simulated latency in seconds when replaying (None = as recorded)
+
+        Raises:
+            GeneralError: If the mode is unknown or the cassette could not be loaded
+        """
+        if mode not in ["record", "replay"]:
+            raise GeneralError(f"Unknown cassette mode '{mode}'")
+
+        self.cassette_file = cassette_file.expanduser()
+        self.mode = mode
+        self.latency = latency
+        self.interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._played: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if self.replaying:
+            self._load()
+
+        else:
+            self.cassette_file.parent.mkdir(parents=True, exist_ok=True)
+            self.cassette_file.write_text("", encoding="UTF-8")
+
+    @property
+    def replaying(self) -> bool:
+        """True if the cassette is in replay mode"""
+        return self.mode == "replay"
+
+    @staticmethod
+    def key(
+        hostname: str,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, str]],
+        payload: Optional[Dict[str, Any]],
+    ) -> str:
+        """
+        Get the key to match a request.
+
+        Args:
+            hostname: The hostname of the device
+            method:   HTTP request method
+            url:      The full URL of the request
+            params:   Dictionary with parameters
+            payload:  JSON body
+
+        Returns:
+            The key of the request
+        """
+        return json.dumps(
+            [hostname, method.upper(), url, redact(params), redact(payload)], sort_keys=True
+        )
+
+    def record(  # pylint: disable=too-many-arguments
+        self,
+        hostname: str,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, str]],
+        payload: Optional[Dict[str, Any]],
+        elapsed: float,
+        response: Optional[requests.Response] = None,
+        error: Optional[GeneralError] = None,
+    ) -> None:
+        """
+        Write a request and its response or its transport error to the cassette.
+
+        Args:
+            hostname: The hostname of the device
+            method:   HTTP request method
+            url:      The full URL of the request
+            params:   Dictionary with parameters
+            payload:  JSON body
+            elapsed:  The time in seconds the request took
+            response: The response of the request
+            error:    The transport error of the request
+        """
+        interaction: Dict[str, Any] = {
+            "key": self.key(hostname, method, url, params, payload),
+            "elapsed": round(elapsed, 6),
+        }
+        if response is not None:
+            interaction["response"] = dump_response(response)
+
+        if error is not None:
+            cause = type(error.__cause__).__name__ if error.__cause__ else ""
+            interaction["error"] = {"message": error.message, "cause": cause}
+
+        line = json.dumps(interaction)
+        with self._lock:
+            with self.cassette_file.open("a", encoding="UTF-8") as cassette:
+                cassette.write(line + "\n")
+
+    def play(  # pylint: disable=too-many-arguments
+        self,
+        hostname: str,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, str]],
+        payload: Optional[Dict[str, Any]],
+    ) -> requests.Response:
+        """
+        Replay the recorded response of a request.
+
+        Args:
+            hostname: The hostname of the device
+            method:   HTTP request method
+            url:      The full URL of the request
+            params:   Dictionary with parameters
+            payload:  JSON body
+
+        Returns:
+            The recorded response
+
+        Raises:
+            GeneralError: If the request has not been recorded or a transport error was recorded
+        """
+        key = self.key(hostname, method, url, params, payload)
+        with self._lock:
+            if key not in self.interactions:
+                raise GeneralError(
+                    f"No recorded response for '{method.upper()} {url}' ({hostname})"
+                )
+
+            recorded = self.interactions[key]
+            played = self._played.get(key, 0)
+            interaction = recorded[min(played, len(recorded) - 1)]
+            self._played[key] = played + 1
+
+        sleep(interaction["elapsed"] if self.latency is None else self.latency)
+
+        if "error" in interaction:
+            error = interaction["error"]
+            cause: Optional[Exception] = None
+            if error["cause"] in TRANSPORT_ERRORS:
+                cause = getattr(requests.exceptions, error["cause"])()
+
+            raise GeneralError(error["message"]) from cause
+
+        return load_response(interaction["response"], url)
+
+    def _load(self) -> None:
+        """
+        Load all the interactions from the cassette file.
+
+        Raises:
+            GeneralError: If the cassette could not be loaded
+        """
+        try:
+            with self.cassette_file.open(encoding="UTF-8") as cassette:
+                for line in cassette:
+                    if line.strip():
+                        interaction = json.loads(line)
+                        self.interactions.setdefault(interaction["key"], []).append(interaction)
+
+        except (OSError, ValueError, KeyError) as err:
+            raise GeneralError(f"Unable to load cassette '{self.cassette_file}': {err}") from err
+
+        log.debug(
+            "Loaded %s interactions from cassette '%s'",
+            sum(len(_) for _ in self.interactions.values()),
+            self.cassette_file,
+        )
+
+
+_cassette: Optional[Cassette] = None
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Get the cassette as configured in the 'cassette' section of the fotoobo configuration (or
+    given with the command line options --record and --replay).
+
+    Returns:
+        The cassette or None if neither recording nor replaying is configured
+    """
+    global _cassette  # pylint: disable=global-statement
+
+    settings = config.cassette
+    if not settings:
+        return None
+
+    cassette_file = Path(settings["file"]).expanduser()
+    latency = settings.get("latency")
+    latency = None if latency is None else float(latency)
+
+    if (
+        _cassette is None
+        or _cassette.cassette_file != cassette_file
+        or _cassette.mode != settings["mode"]
+        or _cassette.latency != latency
+    ):
+        _cassette = Cassette(cassette_file, settings["mode"], latency)
+
+    return _cassette
@@ -0,0 +1,159 @@
+"""
+The CircuitBreaker class keeps track of unreachable Fortinet devices
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import Any, Dict, Optional, Set
+
+from fotoobo.exceptions import CircuitOpenError
+from fotoobo.helpers.config import config
+
+log = logging.getLogger("fotoobo")
+
+
+class CircuitBreaker:
+    """
+    A circuit breaker per device (keyed by hostname) with its state persisted to a local file.
+
+    Every device starts with a closed circuit. After 'threshold' consecutive transport errors
+    (connection errors and timeouts) the circuit opens and all further requests to this device fail
+    fast with a CircuitOpenError. After 'reset_timeout' seconds the circuit is half-open and one
+    single trial request is let through. If it succeeds the circuit is closed again, otherwise it
+    opens for another 'reset_timeout' seconds.
+
+    The state is saved to 'state_file' on every change so that it survives between two runs of
+    fotoobo.
+    """
+
+    def __init__(self, state_file: Path, threshold: int = 3, reset_timeout: float = 300) -> None:
+        """
+        Initialize the circuit breaker and load its state.
+
+        Args:
+            state_file:    The file to persist the state to
+            threshold:     The number of consecutive transport errors to open the circuit
+            reset_timeout: The time in seconds after which an open circuit becomes half-open
+        """
+        self.state_file = state_file.expanduser()
+        self.threshold = max(int(threshold), 1)
+        self.reset_timeout = float(reset_timeout)
+        self.state: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._trials: Set[str] = set()
+        self._load()
+
+    def before_request(self, hostname: str) -> None:
+        """
+        Check whether a request to the device may be sent.
+
+        Args:
+            hostname: The hostname of the device
+
+        Raises:
+            CircuitOpenError: If the circuit for the device is open
+        """
+        with self._lock:
+            host_state = self.state.get(hostname)
+            if not host_state or host_state["failures"] < self.threshold:
+                return
+
+            if time() - host_state["opened"] >= self.reset_timeout and hostname not in self._trials:
+                log.debug("Circuit for '%s' is half-open, sending trial request", hostname)
+                self._trials.add(hostname)
+                return
+
+        raise CircuitOpenError(f"Circuit open, device marked as unreachable ({hostname})")
+
+    def record_failure(self, hostname: str) -> None:
+        """
+        Record a transport error for a device.
+
+        Args:
+            hostname: The hostname of the device
+        """
+        with self._lock:
+            self._trials.discard(hostname)
+            host_state = self.state.setdefault(hostname, {"failures": 0, "opened": 0.0})
+            host_state["failures"] += 1
+            if host_state["failures"] >= self.threshold:
+                log.debug("Circuit for '%s' opened", hostname)
+                host_state["opened"] = time()
+
+            self._save()
+
+    def record_success(self, hostname: str) -> None:
+        """
+        Record a successful request to a device (which closes its circuit).
+
+        Args:
+            hostname: The hostname of the device
+        """
+        with self._lock:
+            self._trials.discard(hostname)
+            if self.state.pop(hostname, None) is not None:
+                log.debug("Circuit for '%s' closed", hostname)
+                self._save()
+
+    def _load(self) -> None:
+        """Load the state from the state file (if it exists)"""
+        try:
+            self.state = json.loads(self.state_file.read_text(encoding="UTF-8"))
+
+        except FileNotFoundError:
+            self.state = {}
+
+        except (OSError, ValueError) as err:
+            log.warning("Unable to load circuit breaker state '%s': %s", self.state_file, err)
+            self.state = {}
+
+    def _save(self) -> None:
+        """Atomically write the state to the state file"""
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            with NamedTemporaryFile(
+                "w", dir=self.state_file.parent, delete=False, encoding="UTF-8"
+            ) as temp_file:
+                json.dump(self.state, temp_file, indent=4)
+
+            os.replace(temp_file.name, self.state_file)
+
+        except OSError as err:
+            log.warning("Unable to save circuit breaker state '%s': %s", self.state_file, err)
+
+
+_circuit_breaker: Optional[CircuitBreaker] = None
+
+
+def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    """
+    Get the circuit breaker as configured in the 'circuit_breaker' section of the fotoobo
+    configuration. The circuit breaker is shared by all the devices.
+
+    Returns:
+        The circuit breaker or None if it is not configured
+    """
+    global _circuit_breaker  # pylint: disable=global-statement
+
+    settings = config.circuit_breaker
+    if not settings:
+        return None
+
+    state_file = Path(settings.get("state_file", "~/.cache/fotoobo/circuit_breaker.json"))
+    threshold = int(settings.get("threshold", 3))
+    reset_timeout = float(settings.get("reset_timeout", 300))
+
+    if (
+        _circuit_breaker is None
+        or _circuit_breaker.state_file != state_file.expanduser()
+        or _circuit_breaker.threshold != threshold
+        or _circuit_breaker.reset_timeout != reset_timeout
+    ):
+        _circuit_breaker = CircuitBreaker(state_file, threshold, reset_timeout)
+
+    return _circuit_breaker
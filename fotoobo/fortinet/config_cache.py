@@ -0,0 +1,281 @@
+"""
+The ConfigCache class caches parsed FortiGate configurations on the local disk
+"""
+
+import hashlib
+import json
+import logging
+import os
+import zlib
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from types import TracebackType
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from fotoobo.helpers.config import config
+
+from .fortigate_config import FortiGateConfig
+
+log = logging.getLogger("fotoobo")
+
+# Increase it whenever the structure of a parsed configuration changes to invalidate the cache
+CACHE_VERSION = 1
+
+
+class ConfigCache:
+    """
+    Cache parsed FortiGate configurations in a directory.
+
+    Every parsed configuration is stored once per content as compressed JSON and named by the
+    SHA-256 hash of the configuration file. An index maps the path of every configuration file to
+    its size, modification time and hash. If the size and the modification time of a file did not
+    change, its parsed configuration is loaded without even reading the file. Otherwise the file is
+    hashed and only parsed if there is no parsed configuration for its content yet.
+
+    The cache directory has the following content:
+
+        index.json          The size, mtime and hash of every configuration file by its path
+        <abcd...>.json.z    The parsed configurations named by the hash of the file
+
+    Without a cache directory every configuration is parsed. Use the cache as a context manager or
+    call save() when done to write the index. Caches in other processes (e.g. the workers of a
+    process pool) do not save their index but hand their changes over with pop_changes() to be
+    merged into the index of the main process with merge().
+    """
+
+    def __init__(self, cache_dir: Optional[Path]) -> None:
+        """
+        Initialize the cache and load its index.
+
+        Args:
+            cache_dir: The directory to save the parsed configurations to (None = no cache)
+        """
+        self.cache_dir = cache_dir.expanduser() if cache_dir else None
+        self.hits = 0
+        self.misses = 0
+        self._index: Dict[str, List[Any]] = {}
+        self._updates: Dict[str, List[Any]] = {}
+        self._changed = False
+
+        if not self.cache_dir:
+            return
+
+        try:
+            index = json.loads((self.cache_dir / "index.json").read_text(encoding="UTF-8"))
+            if index.get("version") == CACHE_VERSION:
+                self._index = index["files"]
+
+        except FileNotFoundError:
+            pass
+
+        except (OSError, ValueError, KeyError, AttributeError) as err:
+            log.warning("Unable to load config cache index '%s': %s", self.cache_dir, err)
+
+    def __enter__(self) -> "ConfigCache":
+        """Use the cache as a context manager"""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Save the index of the cache"""
+        self.save()
+
+    def parse(
+        self, configuration_file: Path, paths: Optional[Iterable[str]] = None
+    ) -> FortiGateConfig:
+        """
+        Get the parsed configuration of a FortiGate configuration file from the cache or parse it.
+
+        The paths are only used without a cache directory. The cache always holds the whole
+        configuration, so it may be used for any paths later on.
+
+        Args:
+            configuration_file: The FortiGate configuration file
+            paths:              The configuration paths to parse (see parse_configuration_file())
+
+        Returns:
+            The parsed FortiGate configuration object
+        """
+        if not self.cache_dir:
+            return FortiGateConfig.parse_configuration_file(configuration_file, paths)
+
+        key = str(configuration_file.resolve())
+        stat = configuration_file.stat()
+        entry = self._index.get(key)
+        if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            digest = entry[2]
+
+        else:
+            digest = self._hash(configuration_file)
+
+        if (fortigate_config := self._load(digest)) is not None:
+            log.debug("Parsed config for '%s' taken from the cache", configuration_file)
+            self.hits += 1
+
+        else:
+            self.misses += 1
+            fortigate_config = FortiGateConfig.parse_configuration_file(configuration_file)
+            self._store(digest, fortigate_config)
+
+        if entry != [stat.st_size, stat.st_mtime_ns, digest]:
+            self._index[key] = self._updates[key] = [stat.st_size, stat.st_mtime_ns, digest]
+            self._changed = True
+            if entry and entry[2] != digest:
+                self._remove_unused(entry[2])
+
+        return fortigate_config
+
+    def pop_changes(self) -> Dict[str, Any]:
+        """
+        Get the changes of the index and the number of hits and misses since the last call.
+
+        Returns:
+            The changes to merge into another cache with merge()
+        """
+        changes = {"files": self._updates, "hits": self.hits, "misses": self.misses}
+        self._updates, self.hits, self.misses = {}, 0, 0
+        return changes
+
+    def merge(self, changes: Dict[str, Any]) -> None:
+        """
+        Merge the changes of another cache of the same directory (see pop_changes()).
+
+        Args:
+            changes: The changes of the other cache
+        """
+        if changes["files"]:
+            self._index.update(changes["files"])
+            self._changed = True
+
+        self.hits += changes["hits"]
+        self.misses += changes["misses"]
+
+    def save(self) -> None:
+        """Write the index of the cache (if it has been changed)"""
+        if not self.cache_dir or not self._changed:
+            return
+
+        data = json.dumps({"version": CACHE_VERSION, "files": self._index}, separators=(",", ":"))
+        try:
+            self._write(self.cache_dir / "index.json", data.encode())
+            self._changed = False
+
+        except OSError as err:
+            log.warning("Unable to save config cache index '%s': %s", self.cache_dir, err)
+
+        log.info("Config cache: %s parsed configs loaded, %s parsed", self.hits, self.misses)
+
+    @staticmethod
+    def _hash(configuration_file: Path) -> str:
+        """
+        Hash the content of a configuration file.
+
+        Args:
+            configuration_file: The FortiGate configuration file
+
+        Returns:
+            The SHA-256 hash of the file
+        """
+        digest = hashlib.sha256()
+        with configuration_file.open("rb") as file:
+            while chunk := file.read(1024 * 1024):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def _cache_file(self, digest: str) -> Path:
+        """
+        Get the file of a parsed configuration.
+
+        Args:
+            digest: The hash of the configuration file
+
+        Returns:
+            The file in the cache directory
+        """
+        return self.cache_dir / f"{digest}.json.z"  # type: ignore
+
+    def _load(self, digest: str) -> Optional[FortiGateConfig]:
+        """
+        Load a parsed configuration from the cache.
+
+        Args:
+            digest: The hash of the configuration file
+
+        Returns:
+            The parsed FortiGate configuration object or None if it is not in the cache
+        """
+        try:
+            data = json.loads(zlib.decompress(self._cache_file(digest).read_bytes()))
+            return FortiGateConfig(data["global"], data["vdom"], data["info"])
+
+        except FileNotFoundError:
+            return None
+
+        except (OSError, ValueError, KeyError, TypeError, zlib.error) as err:
+            log.warning("Ignoring invalid cached config '%s': %s", digest, err)
+            return None
+
+    def _store(self, digest: str, fortigate_config: FortiGateConfig) -> None:
+        """
+        Store a parsed configuration in the cache.
+
+        Args:
+            digest:           The hash of the configuration file
+            fortigate_config: The parsed FortiGate configuration object
+        """
+        data = {
+            "global": fortigate_config.global_config,
+            "vdom": fortigate_config.vdom_config,
+            "info": fortigate_config.info.__dict__,
+        }
+        try:
+            self._write(
+                self._cache_file(digest),
+                zlib.compress(json.dumps(data, separators=(",", ":")).encode(), 1),
+            )
+
+        except OSError as err:
+            log.warning("Unable to write config cache '%s': %s", self.cache_dir, err)
+
+    def _remove_unused(self, digest: str) -> None:
+        """
+        Remove a parsed configuration which is not used by any configuration file anymore.
+
+        Args:
+            digest: The hash of the former content of a configuration file
+        """
+        if all(_[2] != digest for _ in self._index.values()):
+            self._cache_file(digest).unlink(missing_ok=True)
+
+    def _write(self, file: Path, data: bytes) -> None:
+        """
+        Write a file in the cache directory atomically.
+
+        Args:
+            file: The file to write
+            data: The content of the file
+        """
+        file.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile("wb", dir=file.parent, delete=False) as temp_file:
+            temp_file.write(data)
+
+        os.replace(temp_file.name, file)
+
+
+def get_config_cache() -> ConfigCache:
+    """
+    Get a config cache as configured in the 'config_cache' section of the fotoobo configuration.
+
+    Returns:
+        The config cache (which just parses the configurations if it is not configured)
+    """
+    settings = config.config_cache
+    if not settings:
+        return ConfigCache(None)
+
+    return ConfigCache(Path(settings.get("dir", "~/.cache/fotoobo/configs")))
@@ -0,0 +1,158 @@
+"""
+The ConfigNode class is a compact read-only representation of a block of a FortiGate configuration
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Strings up to this length are interned (options, interface names, 'enable', ...). Longer values
+# like UUIDs or comments are mostly unique, so interning them would not save any memory.
+INTERN_MAX_LENGTH = 24
+
+
+class ConfigNode(Mapping):  # type: ignore[type-arg]
+    """
+    A block of a FortiGate configuration which needs a lot less memory than a dict.
+
+    A node has no dict of its own. It stores the keys and the values of the block in two tuples.
+    The keys are interned and the tuple of keys is shared by all the nodes with the same keys
+    (e.g. all the objects of a table), so it is stored only once. Configuration lists are stored
+    as tuples of nodes.
+
+    A node is a read-only mapping, so it may be used like the dict of the block it represents.
+    Finding a key is a linear search in the tuple of keys. Use expand() to turn a node back into
+    dicts and lists.
+    """
+
+    __slots__ = ("_keys", "_values")
+
+    def __init__(self, keys: Tuple[str, ...], values: Tuple[Any, ...]) -> None:
+        """
+        Create the node.
+
+        Args:
+            keys:   The keys of the block
+            values: The values of the block in the order of the keys
+        """
+        self._keys = keys
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        """Get the value of a key"""
+        try:
+            return self._values[self._keys.index(key)]
+
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: object) -> bool:
+        """Check if a key is in the node"""
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys"""
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        """Get the number of keys"""
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        """Show the node like a dict"""
+        return f"ConfigNode({dict(zip(self._keys, self._values))})"
+
+    @staticmethod
+    def compact(data: Any, shared_keys: Dict[Tuple[str, ...], Tuple[str, ...]]) -> Any:
+        """
+        Turn a (partially) parsed block into nodes.
+
+        Only dicts and lists are converted, nodes which are already compact are taken as they are.
+        So a tree is converted block by block while it is parsed, without ever going through the
+        whole tree again.
+
+        Args:
+            data:        The dict or list of the block (or any other value)
+            shared_keys: The tuples of keys to share between the nodes
+
+        Returns:
+            The node of a dict, a tuple for a list or the (interned) value
+        """
+        if isinstance(data, dict):
+            keys = tuple(sys.intern(_) for _ in data)
+            keys = shared_keys.setdefault(keys, keys)
+            values = tuple(ConfigNode.compact(_, shared_keys) for _ in data.values())
+            return ConfigNode(keys, values)
+
+        if isinstance(data, list):
+            return tuple(ConfigNode.compact(_, shared_keys) for _ in data)
+
+        if isinstance(data, str) and len(data) <= INTERN_MAX_LENGTH:
+            return sys.intern(data)
+
+        return data
+
+    @staticmethod
+    def children(data: Any) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate over the keys and values of a block of a configuration (either dicts and lists or
+        nodes).
+
+        The elements of a configuration list are keyed by their id (the number of their 'edit'
+        statement) or by their position if they have no id.
+
+        Args:
+            data: The block of the configuration (or any other value, which has no children)
+
+        Yields:
+            The key and the value of every child of the block
+        """
+        if isinstance(data, ConfigNode):
+            yield from zip(data._keys, data._values)  # pylint: disable=protected-access
+
+        elif isinstance(data, Mapping):
+            yield from data.items()
+
+        elif isinstance(data, (list, tuple)):
+            for position, element in enumerate(data):
+                if isinstance(element, Mapping) and "id" in element:
+                    yield str(element["id"]), element
+
+                else:
+                    yield str(position), element
+
+    @staticmethod
+    def expand(data: Any) -> Any:
+        """
+        Turn nodes back into dicts and lists.
+
+        The nodes are expanded without recursion, so the depth of the configuration does not
+        matter.
+
+        Args:
+            data: A node, a tuple of nodes or any other value
+
+        Returns:
+            The configuration as dicts and lists
+        """
+        if not isinstance(data, (ConfigNode, tuple)):
+            return data
+
+        root: List[Any] = [None]
+        stack: List[Tuple[Any, Any, Any]] = [(root, 0, data)]
+        while stack:
+            parent, key, value = stack.pop()
+            if isinstance(value, ConfigNode):
+                parent[key] = {}
+                items: Any = zip(value._keys, value._values)  # pylint: disable=protected-access
+
+            else:
+                parent[key] = [None] * len(value)
+                items = enumerate(value)
+
+            for child_key, child in items:
+                parent[key][child_key] = child
+                if isinstance(child, (ConfigNode, tuple)):
+                    stack.append((parent[key], child_key, child))
+
+        return root[0]
@@ -8,11 +8,11 @@ import re
 from pathlib import Path
 from typing import Any, Dict, Optional
 
-import requests
-
 from fotoobo.exceptions import APIError, GeneralWarning
 
 from .fortinet import Fortinet
+from .response import ApiResponse
+from .retry import RetryPolicy
 
 log = logging.getLogger("fotoobo")
 
@@ -57,17 +57,23 @@ class FortiClientEMS(Fortinet):
         params: Optional[Dict[str, str]] = None,
         payload: Optional[Dict[str, Any]] = None,
         timeout: Optional[float] = None,
-    ) -> requests.models.Response:
+        retry: Optional[RetryPolicy] = None,
+        stream: bool = False,
+        use_cache: bool = True,
+    ) -> ApiResponse:
         """
         API request to a FortiClientEMS device.
 
         Args:
-            method:  Request method from [get, post]
-            url:     Rest API URL to request data from
-            headers: Additional headers (if needed)
-            params:  Dictionary with parameters (if needed)
-            payload: JSON body for post requests (if needed)
-            timeout: The requests read timeout
+            method:    Request method from [get, post]
+            url:       Rest API URL to request data from
+            headers:   Additional headers (if needed)
+            params:    Dictionary with parameters (if needed)
+            payload:   JSON body for post requests (if needed)
+            timeout:   The requests read timeout
+            retry:     The retry policy for this request (defaults to the policy of the device)
+            stream:    Stream the response body (read it with iter_content())
+            use_cache: Use the response cache (if configured)
 
         Returns:
             Response from the request
@@ -76,7 +82,15 @@ class FortiClientEMS(Fortinet):
             headers = self.session.headers  # type: ignore
 
         return super().api(
-            method, url, payload=payload, params=params, timeout=timeout, headers=headers
+            method,
+            url,
+            payload=payload,
+            params=params,
+            timeout=timeout,
+            headers=headers,
+            retry=retry,
+            stream=stream,
+            use_cache=use_cache,
         )
 
     def get_version(self) -> str:
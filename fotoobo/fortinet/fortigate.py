@@ -2,17 +2,30 @@
 FortiGate Class
 """
 
+import json
 import logging
-from typing import Any, Dict, List, Optional
+import os
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
 
 import requests
 
-from fotoobo.exceptions import APIError, GeneralWarning
+from fotoobo.exceptions import APIError, GeneralError, GeneralWarning
+from fotoobo.helpers.fanout import check_deadline
 
 from .fortinet import Fortinet
+from .response import ApiResponse
+from .retry import RetryPolicy
 
 log = logging.getLogger("fotoobo")
 
+# Every valid FortiGate configuration backup begins with this header
+CONFIG_HEADER = b"#config-version"
+
+# The default number of entries to get with one request in paginated CMDB requests
+DEFAULT_PAGE_SIZE = 1000
+
 
 class FortiGate(Fortinet):
     """
@@ -23,7 +36,7 @@ class FortiGate(Fortinet):
         self,
         hostname: str = "",
         token: str = "",
-        **kwargs: Dict[str, str],
+        **kwargs: Any,
     ) -> None:
         """
         Set some initial parameters.
@@ -32,12 +45,17 @@ class FortiGate(Fortinet):
             hostname: The hostname of the FortiGate to connect to
             token:    API access token from the FortiGate
             **kwargs: See Fortinet class for available arguments
+
+        Keyword Args:
+            page_size: The number of entries to get with one request in paginated CMDB requests
+                (see api_get_paged()). It defaults to DEFAULT_PAGE_SIZE.
         """
         if not hostname:
             raise GeneralWarning("No hostname specified")
 
         super().__init__(hostname=hostname, **kwargs)
         self.api_url = f"https://{self.hostname}:{self.https_port}/api/v2"
+        self.page_size: int = int(kwargs.get("page_size", DEFAULT_PAGE_SIZE))
         self.token = token
         self.type = "fortigate"
 
@@ -49,25 +67,39 @@ class FortiGate(Fortinet):
         params: Optional[Dict[str, str]] = None,
         payload: Optional[Dict[str, Any]] = None,
         timeout: Optional[float] = None,
-    ) -> requests.models.Response:
+        retry: Optional[RetryPolicy] = None,
+        stream: bool = False,
+        use_cache: bool = True,
+    ) -> ApiResponse:
         """Native API request to a FortiGate.
 
         It uses the super.api method but it has to enrich the payload in post requests with the
         needed session key.
 
         Args:
-            method:  Request method from [get, post]
-            url:     Rest API URL to request data from
-            params:  Dictionary with parameters (if needed)
-            payload: JSON body for post requests (if needed)
-            timeout: The requests read timeout
+            method:    Request method from [get, post]
+            url:       Rest API URL to request data from
+            params:    Dictionary with parameters (if needed)
+            payload:   JSON body for post requests (if needed)
+            timeout:   The requests read timeout
+            retry:     The retry policy for this request (defaults to the policy of the device)
+            stream:    Stream the response body (read it with iter_content())
+            use_cache: Use the response cache (if configured)
 
         Returns:
             Response from the request
         """
         self.session.headers.update({"Authorization": f"Bearer {self.token}"})
         return super().api(
-            method, url, payload=payload, params=params, timeout=timeout, headers=headers
+            method,
+            url,
+            payload=payload,
+            params=params,
+            timeout=timeout,
+            headers=headers,
+            retry=retry,
+            stream=stream,
+            use_cache=use_cache,
         )
 
     def api_get(self, url: str, vdom: str = "*", timeout: Optional[float] = None) -> List[Any]:
@@ -85,12 +117,69 @@ class FortiGate(Fortinet):
             The Result object with all the results as list (even if only one result is returned)
         """
         params = {"vdom": vdom}
-        response = self.api(method="get", url=url, params=params, timeout=timeout)
-        data: List[Any] = (
-            [response.json()] if isinstance(response.json(), dict) else response.json()
-        )  # this is to listify the data from the response
+        data = self.api(method="get", url=url, params=params, timeout=timeout).json()
+        listified: List[Any] = [data] if isinstance(data, dict) else data
+
+        return listified
+
+    def api_get_paged(
+        self,
+        url: str,
+        vdom: str = "*",
+        page_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Paginated GET request to a FortiGate CMDB table.
+
+        Other than api_get() this does not get the whole table with one single request. It uses the
+        FortiOS 'start' and 'count' parameters to get the table page by page and yields every page
+        as soon as it arrives. So even tables with a huge number of entries do not run into read
+        timeouts and are never held in memory as a whole.
+
+        Every page is a dictionary for one VDOM as returned by the FortiGate (with the entries in
+        'results'). So a VDOM may be yielded several times. The pages of all the VDOMs are
+        requested together and VDOMs which have been read completely are left out in the next
+        request. If the FortiGate ignores the paging (a page has more than page_size entries or
+        repeats the previous page) the VDOM is not requested anymore and a warning is logged.
+
+        Args:
+            url:       The API endpoint to access
+            vdom:      The VDOM to access ("vdom1" or "vdom1,vdom2" or "*")
+            page_size: The number of entries to get with one request (defaults to the page size of
+                       the FortiGate)
+            timeout:   The time to wait for a response from the FortiGate (for every page)
 
-        return data
+        Yields:
+            The pages with the entries for one VDOM each
+        """
+        page_size = page_size or self.page_size
+        start = 0
+        previous: Dict[str, Any] = {}
+        while vdom:
+            params = {"vdom": vdom, "start": str(start), "count": str(page_size)}
+            data = self.api(method="get", url=url, params=params, timeout=timeout).json()
+            unfinished = []
+            for page in [data] if isinstance(data, dict) else data:
+                name = page.get("vdom", vdom)
+                results = page.get("results")
+                repeated = bool(results) and results == previous.get(name)
+                if isinstance(results, list) and (repeated or len(results) > page_size):
+                    log.warning(
+                        "FortiGate '%s' ignores the paging of '%s' in VDOM '%s'",
+                        self.hostname,
+                        url,
+                        name,
+                    )
+
+                elif isinstance(results, list) and len(results) == page_size:
+                    unfinished.append(name)
+
+                previous[name] = results
+                if not repeated:
+                    yield page
+
+            start += page_size
+            vdom = ",".join(unfinished)
 
     def backup(self, timeout: int = 10) -> str:
         """
@@ -107,6 +196,97 @@ class FortiGate(Fortinet):
         )
         return data.text
 
+    def backup_to_file(self, backup_file: Path, timeout: int = 10, chunk_size: int = 65536) -> int:
+        """
+        Stream the configuration backup from a FortiGate straight into a file.
+
+        The backup is written chunk by chunk as it arrives so it is never held in memory as a
+        whole. It is written to a temporary file which replaces backup_file only if the backup is
+        valid (begins with '#config-version') and has been received completely. So an existing
+        backup file is never overwritten with an invalid or incomplete backup.
+
+        Args:
+            backup_file: The file to write the backup to
+            timeout:     Timeout in sec to wait for the response
+            chunk_size:  The number of bytes to read at once
+
+        Returns:
+            The number of bytes written
+
+        Raises:
+            GeneralWarning: If the FortiGate did not send a valid configuration backup
+            GeneralError:   If the transfer of the backup has been interrupted or the deadline of
+                            the fan-out task has passed
+        """
+        response = self.api(
+            "get",
+            "monitor/system/config/backup",
+            params={"scope": "global"},
+            timeout=timeout,
+            stream=True,
+        )
+        temp_file = backup_file.with_name(f".{backup_file.name}.tmp")
+        size = 0
+
+        try:
+            chunks = response.iter_content(chunk_size)
+            head = b""
+            for chunk in chunks:
+                head += chunk
+                if len(head) >= len(CONFIG_HEADER):
+                    break
+
+            if not head.startswith(CONFIG_HEADER):
+                # This is not a backup but a (small) error message which we may read completely
+                data = head + b"".join(chunks)
+                try:
+                    status = json.loads(data)["http_status"]
+
+                except (ValueError, KeyError, TypeError):
+                    status = "invalid backup"
+
+                raise GeneralWarning(f"Backup '{self.hostname}' failed with error '{status}'")
+
+            with temp_file.open("wb") as backup:
+                for chunk in chain([head], chunks):
+                    check_deadline(self.hostname)
+                    backup.write(chunk)
+                    size += len(chunk)
+
+            os.replace(temp_file, backup_file)
+
+        except requests.exceptions.RequestException as err:
+            raise GeneralError(f"Backup of '{self.hostname}' interrupted: {err}") from err
+
+        finally:
+            response.close()
+            temp_file.unlink(missing_ok=True)
+
+        log.debug("Streamed '%s' bytes of backup to '%s'", size, backup_file)
+        return size
+
+    def get_config_checksum(self) -> str:
+        """
+        Get the checksum of the whole configuration of a FortiGate.
+
+        This is a cheap request to find out whether the configuration has changed since the last
+        backup. In a cluster the checksum of the primary unit is taken.
+
+        Returns:
+            The configuration checksum
+
+        Raises:
+            GeneralWarning: If the FortiGate did not return a checksum
+        """
+        response = self.api("get", "monitor/system/ha-checksums")
+        try:
+            members = response.json()["results"]
+            primary = next((_ for _ in members if _.get("is_root_master")), members[0])
+            return str(primary["checksum"]["all"])
+
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError) as err:
+            raise GeneralWarning(f"No config checksum from '{self.hostname}'") from err
+
     def get_version(self) -> str:
         """
         Get FortiGate version
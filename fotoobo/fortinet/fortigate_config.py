@@ -3,12 +3,14 @@ The FortiGate configuration class represents the whole or parts of a FortiGate c
 """
 
 import logging
+from collections.abc import Mapping
 from pathlib import Path
-from typing import IO, Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from fotoobo.exceptions import GeneralWarning
 from fotoobo.helpers.files import load_json_file, save_json_file
 
+from .config_node import ConfigNode
 from .fortigate_info import FortiGateInfo
 
 log = logging.getLogger("fotoobo")
@@ -19,8 +21,6 @@ class FortiGateConfig:
     The FortiGateConfig class represents a FortiGate configuration (or parts of it)
     """
 
-    _config_path: List[str] = []
-
     def __init__(
         self,
         global_config: Optional[Dict[str, Any]] = None,
@@ -30,6 +30,7 @@ class FortiGateConfig:
         self.global_config = global_config or {}
         self.vdom_config = vdom_config or {}
         self.info = FortiGateInfo(**(info or {}))
+        self._index: Dict[str, Dict[Tuple[str, ...], Any]] = {}
         try:
             self.info.hostname = self.global_config["system"]["global"]["hostname"]
 
@@ -74,7 +75,90 @@ class FortiGateConfig:
                     config = {}
                     break
 
-        return config
+        return ConfigNode.expand(config)
+
+    def query(self, scope: str, pattern: str) -> List[Tuple[str, Any]]:
+        """
+        Find all the configuration paths matching a pattern.
+
+        The pattern is a configuration path where '*' matches every key of a block or every
+        element of a configuration list. The elements of a configuration list are addressed by
+        their id (the number of their 'edit' statement). Examples:
+
+            /*/firewall/policy/*/srcaddr  : The source addresses of every policy in every VDOM
+                                            (in scope vdom)
+            /root/firewall/policy/5       : The policy with id 5 in VDOM root (in scope vdom)
+            /system/interface/*/ip        : The ip of every interface (in scope global)
+
+        The paths are looked up in an index of the configuration which is built with the first
+        query of a scope and used by all the following queries. So the configuration must not be
+        changed after it has been queried.
+
+        Args:
+            scope:   The configuration part to query (global|vdom)
+            pattern: The configuration path to find
+
+        Returns:
+            The path and the value of every match (in the order of the configuration)
+        """
+        index = self._path_index(scope)
+        keys = tuple(_ for _ in pattern.split("/") if _)
+        matches: List[Tuple[Tuple[str, ...], Any]] = [((), index[()])]
+        position = 0
+        while position < len(keys) and matches:
+            if keys[position] == "*":
+                matches = [
+                    (path + (key,), value)
+                    for path, parent in matches
+                    for key, value in ConfigNode.children(parent)
+                ]
+                position += 1
+                continue
+
+            # look up all the keys up to the next wildcard at once
+            end = keys.index("*", position) if "*" in keys[position:] else len(keys)
+            found = []
+            for path, _ in matches:
+                path += keys[position:end]
+                if path in index:
+                    found.append((path, index[path]))
+
+                # leaves are not in the index but in the block they belong to
+                elif end == len(keys) and path[:-1] in index:
+                    found.extend(
+                        (path, value)
+                        for key, value in ConfigNode.children(index[path[:-1]])
+                        if key == path[-1]
+                    )
+
+            matches, position = found, end
+
+        return [("/" + "/".join(path), ConfigNode.expand(value)) for path, value in matches]
+
+    def _path_index(self, scope: str) -> Dict[Tuple[str, ...], Any]:
+        """
+        Get the index of the blocks of a configuration scope by their path (build it if needed).
+
+        Args:
+            scope: The configuration part (global|vdom)
+
+        Returns:
+            The blocks and configuration lists of the scope by the keys of their path
+        """
+        if scope not in self._index:
+            root = self.vdom_config if scope == "vdom" else self.global_config
+            index: Dict[Tuple[str, ...], Any] = {(): root}
+            stack: List[Tuple[Tuple[str, ...], Any]] = [((), root)]
+            while stack:
+                path, block = stack.pop()
+                for key, value in ConfigNode.children(block):
+                    if isinstance(value, (Mapping, list, tuple)):
+                        index[path + (key,)] = value
+                        stack.append((path + (key,), value))
+
+            self._index[scope] = index
+
+        return self._index[scope]
 
     def get_vdoms(self) -> List[str]:
         """
@@ -99,25 +183,45 @@ class FortiGateConfig:
         """
         save_json_file(
             configuration_file,
-            {"global": self.global_config, "vdom": self.vdom_config, "info": self.info.__dict__},
+            {
+                "global": ConfigNode.expand(self.global_config),
+                "vdom": ConfigNode.expand(self.vdom_config),
+                "info": self.info.__dict__,
+            },
         )
 
     @staticmethod
-    def parse_configuration_file(configuration_file: Path) -> "FortiGateConfig":
+    def parse_configuration_file(
+        configuration_file: Path, paths: Optional[Iterable[str]] = None, compact: bool = False
+    ) -> "FortiGateConfig":
         """
         Parse the FortiGate configuration from a file into a python object
 
+        If paths are given only the parts of the configuration below these paths (and the
+        hostname) are parsed, all the other blocks are skipped. This is a lot faster if just a few
+        parts of a large configuration are needed.
+
+        A compact configuration is built of read-only ConfigNode objects instead of dicts and
+        lists, which need a lot less memory (e.g. to load many configurations at once). Use
+        get_configuration() to get parts of it as dicts and lists, just like from a configuration
+        which is not compact.
+
         Args:
             configuration_file: The filename of the FortiGate configuration file
+            paths:              The configuration paths to parse, relative to the global
+                                configuration and to every VDOM (e.g. ['/system/global',
+                                '/firewall/policy']). None parses the whole configuration.
+            compact:            Build a compact configuration (see ConfigNode)
 
         Returns:
             The parsed FortiGate configuration object
         """
         log.debug("Start configuration parser with file '%s'", configuration_file)
+        if paths is not None:
+            paths = [*paths, "/system/global/hostname"]
 
-        FortiGateConfig._config_path = []
         with configuration_file.open(encoding="UTF-8") as forti_file:
-            parsed_config = FortiGateConfig._parse_to_dict(forti_file)
+            parsed_config = FortiGateConfig._parse_to_dict(forti_file, paths, compact)
 
         global_config: Dict[str, Any] = {}
         vdom_config: Dict[str, Any] = {}
@@ -139,8 +243,52 @@ class FortiGateConfig:
             global_config = parsed_config["global"]
             vdom_config = parsed_config["vdom"]
 
+        if compact:
+            global_config = ConfigNode.compact(global_config, {})
+            vdom_config = ConfigNode.compact(vdom_config, {})
+
         return FortiGateConfig(global_config, vdom_config, info)
 
+    @staticmethod
+    def parse_configuration_info(configuration_file: Path) -> FortiGateInfo:
+        """
+        Get the meta information of a FortiGate configuration file without parsing all of it.
+
+        Only the comment lines at the top of the file and the 'config system global' block (for
+        the hostname) are read. The rest of the configuration is skipped and no configuration tree
+        is built. The information is the same as the one of parse_configuration_file().
+
+        Args:
+            configuration_file: The filename of the FortiGate configuration file
+
+        Returns:
+            The meta information of the FortiGate configuration
+        """
+        log.debug("Read configuration info from file '%s'", configuration_file)
+        info: Dict[str, str] = {}
+        hostname, line = "HOSTNAME UNKNOWN", ""
+        with configuration_file.open(encoding="UTF-8") as forti_file:
+            for line in forti_file:
+                line = line.strip()
+                if line.startswith("#"):
+                    FortiGateConfig._parse_config_comment(info, line)
+
+                elif line:
+                    break
+
+            if not info:
+                raise GeneralWarning(f"There is no info in {configuration_file}")
+
+            # any() stops right after the 'config system global' line
+            if line == "config system global" or any(
+                _.strip() == "config system global" for _ in forti_file
+            ):
+                hostname = FortiGateConfig._find_hostname(forti_file) or hostname
+
+        fortigate_info = FortiGateInfo(**info)
+        fortigate_info.hostname = hostname
+        return fortigate_info
+
     @staticmethod
     def load_configuration_file(configuration_file: Path) -> "FortiGateConfig":
         """
@@ -217,6 +365,34 @@ class FortiGateConfig:
 
         return dict(out_dict)
 
+    @staticmethod
+    def _find_hostname(config_block: Iterable[str]) -> Optional[str]:
+        """
+        Find the hostname in the lines of a 'config system global' block.
+
+        Args:
+            config_block: The lines following the 'config system global' statement
+
+        Returns:
+            The hostname or None if it is not set in the block
+        """
+        depth = 0
+        for line in config_block:
+            line = line.strip()
+            if line.startswith("config ") or line.startswith("edit "):
+                depth += 1
+
+            elif line in ("end", "next"):
+                if not depth:
+                    break
+
+                depth -= 1
+
+            elif not depth and line.startswith("set hostname "):
+                return " ".join(line.split(maxsplit=2)[2].replace('"', "").split())
+
+        return None
+
     @staticmethod
     def _parse_config_comment(info: Dict[str, Any], line: str) -> Dict[str, str]:
         """
@@ -243,25 +419,139 @@ class FortiGateConfig:
         return info
 
     @staticmethod
-    # pylint: disable=too-many-branches
-    def _parse_to_dict(config_file: IO[str]) -> Any:
+    def _attach_block(parent: Dict[str, Any], key: Any, config: Any) -> None:
+        """
+        Add the configuration of a closed 'config' or 'edit' block to its parent block.
+
+        Args:
+            parent: The configuration of the parent block
+            key:    The key of the block in its parent or the words of a 'config' statement with
+                    more than one word (e.g. ["system", "global"])
+            config: The configuration of the block
+        """
+        if isinstance(key, str):
+            parent[key] = config
+
+        else:
+            if key[0] not in parent:
+                parent[key[0]] = {}
+
+            nested = FortiGateConfig._get_nested_dict(key[1:], config)
+            parent[key[0]] = {**parent[key[0]], **nested}
+
+    @staticmethod
+    def _select_block(
+        stack: List[List[Any]],
+        key: Any,
+        wanted: Set[Tuple[str, ...]],
+        parents: Set[Tuple[str, ...]],
+    ) -> Tuple[bool, Optional[Tuple[str, ...]]]:
+        """
+        Decide if a new block has to be parsed and get its path.
+
+        The path is relative to the global configuration or the VDOM of the block. In a
+        configuration with VDOMs the 'config global' and 'config vdom' blocks and the 'edit' blocks
+        of the VDOMs are the roots of their configuration, so their path is empty.
+
+        Args:
+            stack:   The stack of the open blocks of the parser (see _parse_to_dict())
+            key:     The key of the new block (see _attach_block())
+            wanted:  The paths to parse
+            parents: All the paths on the way to the paths to parse
+
+        Returns:
+            Whether the block has to be parsed and its path (None if the whole block is parsed)
+        """
+        parent_path: Optional[Tuple[str, ...]] = stack[-1][3]
+        if parent_path is None:
+            return True, None
+
+        if stack[0][1].get("vdom") == "1" and (
+            len(stack) == 1 or (len(stack) == 2 and stack[1][2] == "vdom")
+        ):
+            return True, ()
+
+        path = parent_path + ((key,) if isinstance(key, str) else tuple(key))
+        if path in parents:
+            return True, path
+
+        if any(path[:_] in wanted for _ in range(len(parent_path) + 1, len(path) + 1)):
+            return True, None
+
+        return False, None
+
+    @staticmethod
+    def _skip_block(config_file: Iterator[str]) -> None:
+        """
+        Skip the lines of a block up to and including its 'end' or 'next' statement.
+
+        The nesting of the blocks and multiline strings are tracked, but nothing is parsed.
+
+        Args:
+            config_file: The lines following the 'config' or 'edit' statement of the block
+        """
+        depth = 0
+        multiline = False
+        for line in config_file:
+            line = line.strip()
+            if multiline:
+                multiline = not line.endswith('"')
+
+            elif line.startswith("set "):
+                multiline = line.count('"') % 2 == 1 and not line.endswith('"')
+
+            elif line.startswith("config ") or line.startswith("edit "):
+                depth += 1
+
+            elif line in ("end", "next"):
+                if not depth:
+                    return
+
+                depth -= 1
+
+    @staticmethod
+    # pylint: disable=too-many-branches,too-many-locals,too-many-statements
+    def _parse_to_dict(
+        config_file: Iterable[str], paths: Optional[Iterable[str]] = None, compact: bool = False
+    ) -> Any:
         # should be Union[Dict[str, Any], List[Any]]
         """
         Fabric function to create a FortiGateConfig object from a backup configuration file
-        This recursive method parses a FortiGate configuration from a file line by line
+        This method parses a FortiGate configuration from a file line by line in a single pass.
+
+        Every open 'config' or 'edit' block is a frame on a stack instead of a recursive call, so
+        the depth of the configuration does not matter. All the state of the parser is local to
+        the call, so several configurations may be parsed at the same time (e.g. in threads).
+
+        If paths are given only the blocks on the way to and below these paths are parsed. They
+        are relative to the global configuration and to every VDOM (e.g. '/system/global' or
+        '/firewall/policy'). All the other blocks are skipped without parsing them.
+
+        If compact is set every block is turned into a ConfigNode as soon as it is closed with
+        'end'. The blocks of the top level stay dicts.
 
         Args:
-            config_file: FortiGate configuration file object
+            config_file: FortiGate configuration file object (or any iterable of lines)
+            paths:       The paths to parse (None = parse the whole configuration)
+            compact:     Turn the blocks into ConfigNode objects (see ConfigNode.compact())
 
         Returns:
             A dict which contains the parsed FortiGate configuration
         """
-        config: Any = {}
-        info: Dict[str, str] = {}
+        wanted = {tuple(_ for _ in path.split("/") if _) for path in paths or []}
+        parents = {path[:length] for path in wanted for length in range(len(path))}
+
+        # Every frame is [config, info, key, path] where key is how to attach the config of the
+        # block to its parent block (see _attach_block()) and path is the path of the block (see
+        # _select_block()) or None if the whole block is parsed
+        stack: List[List[Any]] = [[{}, {}, None, None if paths is None or () in wanted else ()]]
+        config: Dict[str, Any] = stack[0][0]
         multiline: str = ""
         multiline_key: str = ""
+        lines = iter(config_file)
+        shared_keys: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
 
-        for line in config_file:
+        for line in lines:
             line = line.strip()
 
             # handle empty lines
@@ -270,7 +560,9 @@ class FortiGateConfig:
 
             # handle comment lines
             if line.startswith("#"):
-                info = FortiGateConfig._parse_config_comment(info, line)
+                FortiGateConfig._parse_config_comment(stack[-1][1], line)
+                if not multiline:
+                    continue
 
             # handle multiline strings (do that before all the other logic)
             if multiline:
@@ -280,56 +572,65 @@ class FortiGateConfig:
 
                 continue
 
-            # check if a multiline string starts. begin with "set" and uneven amount of quotes (")
-            if line.startswith("set ") and line.count('"') % 2 == 1 and not line.endswith('"'):
-                _, multiline_key, value = line.split(maxsplit=2)  # first part is always "set"
-                multiline += value
-                continue
-
-            # handle configuration option
             if line.startswith("set "):
-                _, key, value = line.split(maxsplit=2)  # first part ist always "set"
-                config[key] = " ".join(value.replace('"', "").split())
+                # check if a multiline string starts: uneven amount of quotes (")
+                if line.count('"') % 2 == 1 and not line.endswith('"'):
+                    _, multiline_key, multiline = line.split(maxsplit=2)  # first part is "set"
+
+                # handle configuration option
+                else:
+                    _, key, value = line.split(maxsplit=2)  # first part ist always "set"
+                    config[key] = " ".join(value.replace('"', "").split())
+
+                continue
 
-            # handle recursion
-            if line.startswith("config vdom") and len(FortiGateConfig._config_path) == 1:
+            # the VDOM configurations follow each other in the first 'config vdom' block
+            if line.startswith("config vdom") and len(stack) == 2:
                 continue
 
-            if line.startswith("config "):
-                if len(line[7:].split(" ")) == 1:
-                    FortiGateConfig._config_path.append(line[7:])
-                    config[line[7:].strip('"')] = FortiGateConfig._parse_to_dict(config_file)
+            # handle the start of a block
+            if line.startswith("config ") or line.startswith("edit "):
+                if line.startswith("edit "):
+                    block_key: Any = line[5:].strip('"')
 
-                else:
-                    FortiGateConfig._config_path.append(line[7:])
-                    config_path = [word.strip('"') for word in line[7:].split()]
-                    temp_config = FortiGateConfig._get_nested_dict(
-                        config_path[1:], FortiGateConfig._parse_to_dict(config_file)
-                    )
+                elif len(line[7:].split(" ")) == 1:
+                    block_key = line[7:].strip('"')
 
-                    if config_path[0] not in config:
-                        config[config_path[0]] = {}
+                else:
+                    block_key = [word.strip('"') for word in line[7:].split()]
 
-                    config[config_path[0]] = {**config[config_path[0]], **temp_config}
+                parse, path = FortiGateConfig._select_block(stack, block_key, wanted, parents)
+                if not parse:
+                    FortiGateConfig._skip_block(lines)
+                    continue
 
-            if line.startswith("edit "):
-                FortiGateConfig._config_path.append(line[5:])
-                config[line[5:].strip('"')] = FortiGateConfig._parse_to_dict(config_file)
+                stack.append([{}, {}, block_key, path])
+                config = stack[-1][0]
+                continue
 
             # handle section ends
-            if line == "end":
-                FortiGateConfig._config_path.pop()
-                if FortiGateConfig._config_is_list(config):
-                    config = FortiGateConfig._config_convert_dict_to_list(config)
+            if line in ("end", "next") and len(stack) > 1:
+                block, _, key, _ = stack.pop()
+                if line == "end" and FortiGateConfig._config_is_list(block):
+                    block = FortiGateConfig._config_convert_dict_to_list(block)
+
+                # the blocks of an 'edit' are compacted together with their table
+                if line == "end" and compact:
+                    block = ConfigNode.compact(block, shared_keys)
+
+                FortiGateConfig._attach_block(stack[-1][0], key, block)
+                config = stack[-1][0]
 
-                return config
+        # close the blocks which are still open at the end of the file and append their info dict
+        while stack:
+            block, info, key, _ = stack.pop()
+            if len(info) > 0:
+                block["info"] = info
 
-            if line == "next":
-                FortiGateConfig._config_path.pop()
-                return config
+            if stack:
+                if compact:
+                    block = ConfigNode.compact(block, shared_keys)
 
-        # append info dict to config if it's set
-        if len(info) > 0:
-            config["info"] = info
+                FortiGateConfig._attach_block(stack[-1][0], key, block)
 
-        return config
+        return block
@@ -28,6 +28,39 @@ class FortiGateConfigCheck:
         self.checks = checks
         self.result = result
 
+    @staticmethod
+    def get_paths(checks: Any) -> List[str]:
+        """
+        Get all the configuration paths the checks need (from 'path' and 'filter-config').
+
+        Use them to parse only the needed parts of a configuration (see
+        FortiGateConfig.parse_configuration_file()). Paths with wildcards are cut before their
+        first wildcard, as everything below it is needed. The filter paths of checks with scope
+        'vdom' begin with the name of the VDOM (e.g. '/root/system/settings'), so the VDOM is
+        removed from them.
+
+        Args:
+            checks: The checks to do against the FortiGate configuration
+
+        Returns:
+            The sorted configuration paths
+        """
+        paths = set()
+        for check in checks or []:
+            if isinstance(check.get("path"), str):
+                paths.add(check["path"])
+
+            for path in check.get("filter-config") or []:
+                if not isinstance(path, str):
+                    continue
+
+                if check.get("scope") == "vdom":
+                    path = "/" + "/".join(path.strip("/").split("/")[1:])
+
+                paths.add(path)
+
+        return sorted({_.split("*")[0] for _ in paths})
+
     def add_message(self, chk: Dict[str, Any], msg: str) -> None:
         """
         Generates a styled message and appends it to the results.
@@ -105,29 +138,48 @@ class FortiGateConfigCheck:
                 )
                 continue
 
+            configs: List[Any] = []
             if check["scope"] == "global":
-                config = self.config.get_configuration(check["scope"], check["path"])
-                getattr(self, "_check_" + check["type"])(config, check)
+                configs = self._get_configs("global", check["path"])
 
             if check["scope"] == "vdom":
                 if self.config.info.vdom == "0":
                     if check["path"].startswith("/system/"):
-                        config = self.config.get_configuration("global", check["path"])
+                        configs = self._get_configs("global", check["path"])
 
                     else:
-                        config = self.config.get_configuration("vdom", "/root" + check["path"])
-
-                    getattr(self, "_check_" + check["type"])(config, check)
+                        configs = self._get_configs("vdom", "/root" + check["path"])
 
                 elif self.config.info.vdom == "1":
                     for vdom in self.config.get_vdoms():
-                        config = self.config.get_configuration(
-                            check["scope"], vdom + "/" + check["path"]
-                        )
-                        getattr(self, "_check_" + check["type"])(config, check)
+                        configs += self._get_configs("vdom", f"/{vdom}/{check['path']}")
+
+            for config in configs:
+                getattr(self, "_check_" + check["type"])(config, check)
 
         return self.result
 
+    def _get_configs(self, scope: str, path: str) -> List[Any]:
+        """
+        Get the configurations to check for the path of a check.
+
+        The paths are looked up with FortiGateConfig.query(), so they may contain wildcards (e.g.
+        '/firewall/policy/*'). Every match is checked. A path without wildcards which does not
+        exist is checked as an empty configuration.
+
+        Args:
+            scope: The configuration part (global|vdom)
+            path:  The configuration path of the check
+
+        Returns:
+            The configurations to check
+        """
+        configs = [value for _, value in self.config.query(scope, path)]
+        if not configs and "*" not in path:
+            configs.append({})
+
+        return configs
+
     def _check_count(self, config: Any, chk: Dict[str, Any]) -> None:
         """
         Check the configuration list count.
@@ -2,18 +2,26 @@
 FortiManager Class
 """
 
+# pylint: disable=too-many-lines
 import logging
 import re
+from dataclasses import replace
+from functools import partial
 from pathlib import Path
 from time import sleep
 from typing import Any, Dict, List, Optional
 
-import requests
+from fotoobo.helpers.fanout import check_deadline
 
 from .fortinet import Fortinet
+from .response import ApiResponse
+from .retry import RetryPolicy
 
 log = logging.getLogger("fotoobo")
 
+# The JSON-RPC status code of a request with an invalid (e.g. expired) session
+INVALID_SESSION_CODE = -11
+
 
 class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
     """
@@ -68,7 +76,7 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
             "rootp",
         ]
 
-    def api_delete(self, url: str) -> requests.models.Response:
+    def api_delete(self, url: str) -> ApiResponse:
         """DELETE method for API requests
 
         Args:
@@ -85,13 +93,13 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
 
     def api_get(
         self, url: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
-    ) -> requests.models.Response:
+    ) -> ApiResponse:
         """GET method for API requests
 
         Args:
-            url:     API endpoint to access
-            params:  Additional query parameters if needed
-            timeout: The requests read timeout in seconds
+            url:       API endpoint to access
+            params:    Additional query parameters if needed
+            timeout:   The requests read timeout in seconds
 
         Result:
             FortiManager result item
@@ -114,20 +122,30 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
         params: Optional[Dict[str, str]] = None,
         payload: Optional[Dict[str, Any]] = None,
         timeout: Optional[float] = None,
-    ) -> requests.models.Response:
+        retry: Optional[RetryPolicy] = None,
+        stream: bool = False,
+        use_cache: bool = True,
+    ) -> ApiResponse:
         """
         API request to a FortiManager device.
 
         It uses the super.api method but it has to enrich the payload in post requests with the
-        needed session key.
+        needed session key. If the session key is refused (e.g. because the session expired) it
+        logs in again and repeats the request once.
+
+        Every JSON-RPC request is sent with the HTTP method POST. As JSON-RPC 'get' requests are
+        idempotent they may be retried even if the retry policy only allows to retry GET requests.
 
         Args:
-            method:  Request method from [get, post]
+            method:    Request method from [get, post]
             url:     Rest API URL to request data from
-            headers: Dictionary with headers (if needed)
+            headers:   Dictionary with headers (if needed)
             params:  Dictionary with parameters (if needed)
-            payload: JSON body for post requests (if needed)
+            payload:   JSON body for post requests (if needed)
             timeout: The requests read timeout in seconds
+            retry:     The retry policy for this request (defaults to the policy of the device)
+            stream:    Stream the response body (read it with iter_content())
+            use_cache: Use the response cache (if configured)
 
         Returns:
             Response from the request
@@ -139,9 +157,33 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
         if method.lower() == "post":
             payload["session"] = self.session_key
 
-        return super().api(
-            method, url, headers=headers, payload=payload, params=params, timeout=timeout
+        if payload.get("method") == "get":
+            policy = retry or self.retry
+            if policy.retries_method("GET") and not policy.retries_method(method):
+                retry = replace(policy, methods=[*policy.methods, method.upper()])
+
+        request = partial(
+            super().api,
+            method,
+            url,
+            headers=headers,
+            payload=payload,
+            params=params,
+            timeout=timeout,
+            retry=retry,
+            stream=stream,
+            use_cache=use_cache,
         )
+        response = request()
+        if not stream and self._session_invalid(method, url, payload, response):
+            # The session expired (e.g. while the fotoobo daemon was idle), so login again
+            log.debug("Session to '%s' is invalid, login again", self.hostname)
+            self.session_key = ""
+            if self.login() == 200 and self.session_key:
+                payload["session"] = self.session_key
+                response = request()
+
+        return response
 
     def assign_all_objects(self, adoms: str, policy: str) -> int:
         """
@@ -179,15 +221,16 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
         response = self.api("post", payload=payload)
 
         if response.status_code == 200:
-            if response.json()["result"][0]["status"]["code"] == 0:
-                task_id = response.json()["result"][0]["data"]["task"]
+            result = response.json()["result"][0]
+            if result["status"]["code"] == 0:
+                task_id = result["data"]["task"]
                 log.debug("Assign task created with id '%s'", task_id)
 
             else:
                 log.debug(
                     "Did not assign to '%s' with error '%s'",
                     adoms,
-                    response.json()["result"][0]["status"]["message"],
+                    result["status"]["message"],
                 )
                 task_id = 0
 
@@ -788,7 +831,7 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
                         "params": [{"url": "/sys/status"}],
                         "session": self.session_key,
                     }
-                    response = super().api("post", payload=payload)
+                    response = super().api("post", payload=payload, use_cache=False)
                     status = response.status_code
 
                     if (
@@ -817,9 +860,9 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
             }
             response = super().api("post", payload=payload)
             if response.status_code == 200:
-                if "session" in response.json():
+                if "session" in (data := response.json()):
                     log.debug("store session key")
-                    self.session_key = response.json()["session"]
+                    self.session_key = data["session"]
 
                     if self.session_path:
                         log.debug("Saving session key into file '%s'", session_file)
@@ -833,11 +876,16 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
 
     def logout(self) -> int:
         """
-        Logout from FortiManager.
+        Logout from FortiManager. If the session has to be kept alive (in the fotoobo daemon) the
+        session key is kept for the next command and no request is sent.
 
         Returns:
             Status code from the FortiManager logout
         """
+        if self.keep_alive:
+            log.debug("Keeping the session to '%s' alive", self.hostname)
+            return 200
+
         payload: Dict[str, Any] = {
             "method": "exec",
             "params": [{"url": "/sys/logout"}],
@@ -890,6 +938,33 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
 
         return results
 
+    def _session_invalid(
+        self, method: str, url: str, payload: Dict[str, Any], response: ApiResponse
+    ) -> bool:
+        """
+        Check whether a JSON-RPC request has been refused because its session is invalid and a new
+        session may be started for it (not for the logout).
+
+        Args:
+            method:   Request method of the request
+            url:      URL of the request
+            payload:  JSON body of the request
+            response: The response of the request
+
+        Returns:
+            True if the request should be sent again with a new session
+        """
+        if "session" not in payload or not (self.username and self.password):
+            return False
+
+        try:
+            return self._endpoint(method, url, payload) != "exec /sys/logout" and any(
+                _["status"]["code"] == INVALID_SESSION_CODE for _ in response.json()["result"]
+            )
+
+        except (ValueError, KeyError, TypeError):
+            return False
+
     def wait_for_task(self, task_id: int, timeout: int = 60) -> List[Any]:
         """
         Wait for a task with a given id for its end and returns the message(s).
@@ -900,6 +975,9 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
 
         Returns:
             Message list
+
+        Raises:
+            GeneralError: If the deadline of the fan-out task has passed
         """
         log.debug("Waiting for task id '%s'", task_id)
         messages: List[Any] = []
@@ -910,7 +988,8 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
         percent_cache = -1
 
         while timeout:
-            response = self.api("post", payload=payload)
+            check_deadline(self.hostname)
+            response = self.api("post", payload=payload, use_cache=False)
             percent = response.json()["result"][0]["data"]["percent"]
             if percent > percent_cache:
                 log.debug("FortiManager task progress: '%s%%'", percent)
@@ -927,7 +1006,7 @@ class FortiManager(Fortinet):  # pylint: disable=too-many-public-methods
             "method": "get",
             "params": [{"url": f"/task/task/{task_id}/line"}],
         }
-        response = self.api("post", payload=payload)
+        response = self.api("post", payload=payload, use_cache=False)
 
         if response.status_code == 200:
             messages = response.json()["result"][0]["data"]
@@ -3,15 +3,24 @@ This is the Fortinet abstract base class (ABC) which is used to define some glob
 variables and methods.
 """
 
+import json
 import logging
 from abc import ABC, abstractmethod
-from time import time
+from time import sleep, time
 from typing import Any, Dict, Optional, Union
 
 import requests
 import urllib3
 
 from fotoobo.exceptions import APIError, GeneralError
+from fotoobo.helpers.fanout import check_deadline, remaining_time
+from fotoobo.helpers.metrics import metrics
+
+from .cache import get_cache
+from .cassette import SECRET_KEYS, get_cassette
+from .circuit_breaker import get_circuit_breaker
+from .response import ApiResponse
+from .retry import RetryPolicy
 
 log = logging.getLogger("fotoobo")
 
@@ -23,6 +32,8 @@ class Fortinet(ABC):
     defined here with the abstractmethod decorator.
     """
 
+    # pylint: disable=too-many-instance-attributes
+
     # Use the ALLOWED_HTTP_METHODS class constant to define the supported HTTP methods. By default
     # we should support GET and POST but you may override this list of supported methods in every
     # subclass. Treat this setting as a constant which must not be redefined during runtime.
@@ -52,6 +63,8 @@ class Fortinet(ABC):
                 disable the warnings in urllib3. This prevents unwanted SSL warnings to be
                 logged.
             timeout: Connection timeout in seconds
+            retry: The retry policy for API requests as a dict with the attributes of RetryPolicy
+                (e.g. {"attempts": 3, "backoff": 1}). By default requests are not retried.
         """
         self.api_url: str = ""
         self.hostname: str = hostname
@@ -70,7 +83,19 @@ class Fortinet(ABC):
         self.timeout = kwargs.get("timeout", 3)
         self.type: str = ""
 
-    def api(  # pylint: disable=too-many-arguments
+        # Keep the session to the device when logging out (used by the fotoobo daemon)
+        self.keep_alive: bool = False
+
+        retry = kwargs.get("retry") or {}
+        try:
+            self.retry: RetryPolicy = (
+                retry if isinstance(retry, RetryPolicy) else RetryPolicy(**retry)
+            )
+
+        except TypeError as err:
+            raise GeneralError(f"Invalid retry policy for '{hostname}': {retry}") from err
+
+    def api(  # pylint: disable=too-many-arguments,too-many-branches,too-many-locals
         self,
         method: str,
         url: str = "",
@@ -78,10 +103,20 @@ class Fortinet(ABC):
         params: Optional[Dict[str, str]] = None,
         payload: Optional[Dict[str, Any]] = None,
         timeout: Optional[float] = None,
-    ) -> requests.models.Response:
+        retry: Optional[RetryPolicy] = None,
+        stream: bool = False,
+        use_cache: bool = True,
+    ) -> ApiResponse:
         """
         API request to a Fortinet device.
 
+        Failed requests are retried as defined in the retry policy. Only connection errors,
+        timeouts and the HTTP status codes defined in the policy are retried. If a circuit breaker
+        is configured, requests to a device which is marked as unreachable fail fast. If a response
+        cache is configured, the responses of idempotent requests are taken from the cache (but
+        not while recording or replaying a cassette). Within a fan-out task with a deadline the
+        timeout is limited to the time left and no request or retry is started after the deadline.
+
         Args:
             method:     HTTP request method
             url:        Rest API URL to request data from
@@ -89,25 +124,260 @@ class Fortinet(ABC):
             params:     Dictionary with parameters (if needed)
             payload:    JSON body for post requests (if needed)
             timeout:    The requests read timeout
+            retry:      The retry policy for this request (defaults to the policy of the device)
+            stream:     Stream the response body (read it with iter_content())
+            use_cache:  Use the response cache (if configured). Disable it to always get the
+                        current state from the device.
 
         Returns:
             Response from the request
+
+        Raises:
+            CircuitOpenError: If the circuit for the device is open
+            GeneralError:     If the deadline of the fan-out task has passed
         """
         full_url = f"{self.api_url}/{url.strip('/')}".strip("/")
         timeout = timeout or self.timeout
-        start = time()
+        policy = retry or self.retry
+
+        check_deadline(self.hostname)
+        if (remaining := remaining_time()) is not None:
+            timeout = min(timeout, remaining)
 
         if method.upper() not in self.ALLOWED_HTTP_METHODS:
             error = f"HTTP method '{method.upper()}' is not implemented"
             log.error(error)
             raise NotImplementedError(error)
 
+        cache = None if stream or not use_cache or get_cassette() else get_cache()
+        cache_ttl = (
+            cache.get_ttl(method, self._endpoint(method, full_url, payload), payload)
+            if cache
+            else 0
+        )
+        if cache and cache_ttl:
+            identity = self._identity(headers, payload)
+            if cached := cache.get(self.hostname, method, full_url, params, payload, identity):
+                return ApiResponse(cached)
+
+        breaker = get_circuit_breaker()
+        if breaker:
+            breaker.before_request(self.hostname)
+
+        attempt = 1
+        while True:
+            may_retry = attempt < policy.attempts and policy.retries_method(method)
+
+            try:
+                response = self._send(method, full_url, headers, params, payload, timeout, stream)
+
+            except GeneralError as err:
+                if not may_retry or not self._is_retryable(err.__cause__):
+                    # Do not blame the device for a timeout which has been cut by the deadline
+                    if breaker and ((remaining := remaining_time()) is None or remaining > 0):
+                        breaker.record_failure(self.hostname)
+
+                    raise
+
+                delay = policy.delay(attempt)
+                log.warning("%s, retry %s in %.1fs", err.message, attempt, delay)
+
+            else:
+                if not may_retry or response.status_code not in policy.status_codes:
+                    break
+
+                delay = policy.delay(attempt, response.headers.get("Retry-After"))
+                log.warning(
+                    "HTTP/%s from '%s', retry %s in %.1fs",
+                    response.status_code,
+                    self.hostname,
+                    attempt,
+                    delay,
+                )
+
+            if (remaining := remaining_time()) is not None and delay >= remaining:
+                raise GeneralError(f"Deadline exceeded ({self.hostname})")
+
+            sleep(delay)
+            attempt += 1
+
+        if breaker:
+            breaker.record_success(self.hostname)
+
+        try:
+            response.raise_for_status()
+
+        except requests.exceptions.HTTPError as err:
+            raise APIError(err) from err
+
+        if cache and cache_ttl:
+            cache.put(
+                self.hostname, method, full_url, params, payload, response, cache_ttl, identity
+            )
+
+        return ApiResponse(response)
+
+    def _send(  # pylint: disable=too-many-arguments
+        self,
+        method: str,
+        full_url: str,
+        headers: Optional[Dict[str, str]],
+        params: Optional[Dict[str, str]],
+        payload: Optional[Dict[str, Any]],
+        timeout: float,
+        stream: bool = False,
+    ) -> requests.models.Response:
+        """
+        Send one single request to the Fortinet device. If a cassette is configured the request is
+        recorded to it or replayed from it. Note that recording a streamed response reads its whole
+        body into memory.
+
+        Args:
+            method:   HTTP request method
+            full_url: The full URL to request
+            headers:  Dictionary with headers (if needed)
+            params:   Dictionary with parameters (if needed)
+            payload:  JSON body for post requests (if needed)
+            timeout:  The requests read timeout
+            stream:   Stream the response body
+
+        Returns:
+            Response from the request
+
+        Raises:
+            GeneralError: On any transport error (the requests exception is chained)
+        """
+        cassette = get_cassette()
+        recording = cassette is not None and not cassette.replaying
+        endpoint = self._endpoint(method, full_url, payload)
+        start = time()
+
+        try:
+            if cassette and cassette.replaying:
+                response = cassette.play(self.hostname, method, full_url, params, payload)
+
+            else:
+                response = self._request(
+                    method, full_url, headers, params, payload, timeout, stream
+                )
+
+        except GeneralError as err:
+            elapsed = time() - start
+            metrics.observe(self.hostname, endpoint, elapsed, error=True)
+            if cassette and recording:
+                cassette.record(
+                    self.hostname, method, full_url, params, payload, elapsed, error=err
+                )
+
+            raise
+
+        elapsed = time() - start
+        log.debug(
+            'Request time: [bold green]%2dms[/] "%s %s"',
+            (elapsed * 1000),
+            method.upper(),
+            full_url,
+        )
+        metrics.observe(
+            self.hostname,
+            endpoint,
+            elapsed,
+            size=(
+                int(response.headers.get("Content-Length", 0))
+                if stream
+                else len(response.content or b"")
+            ),
+            error=response.status_code >= 400,
+        )
+
+        if cassette and recording:
+            cassette.record(
+                self.hostname, method, full_url, params, payload, elapsed, response=response
+            )
+
+        return response
+
+    def _endpoint(self, method: str, full_url: str, payload: Optional[Dict[str, Any]]) -> str:
+        """
+        Get the endpoint of a request for the metrics.
+
+        For JSON-RPC requests (FortiManager/FortiAnalyzer) this is the JSON-RPC method and URL,
+        for all the other requests the HTTP method and the URL relative to the API base URL.
+
+        Args:
+            method:   HTTP request method
+            full_url: The full URL of the request
+            payload:  JSON body of the request
+
+        Returns:
+            The endpoint (e.g. "GET /monitor/system/status" or "get /sys/status")
+        """
+        try:
+            return f"{payload['method']} {payload['params'][0]['url']}"  # type: ignore
+
+        except (KeyError, IndexError, TypeError):
+            path = full_url[len(self.api_url) :] if full_url.startswith(self.api_url) else full_url
+            return f"{method.upper()} /{path.strip('/')}"
+
+    def _identity(
+        self, headers: Optional[Dict[str, str]], payload: Optional[Dict[str, Any]]
+    ) -> str:
+        """
+        Get the credentials a request is sent with (the API token or the CSRF token in the headers,
+        the session cookies and the session key in the payload) for the response cache.
+
+        Args:
+            headers: Additional headers of the request
+            payload: JSON body of the request
+
+        Returns:
+            The credentials of the request as a string
+        """
+        return json.dumps(
+            [
+                {**self.session.headers, **(headers or {})},
+                [(_.name, _.value) for _ in self.session.cookies],
+                {key: value for key, value in (payload or {}).items() if key in SECRET_KEYS},
+            ],
+            sort_keys=True,
+            default=str,
+        )
+
+    def _request(  # pylint: disable=too-many-arguments
+        self,
+        method: str,
+        full_url: str,
+        headers: Optional[Dict[str, str]],
+        params: Optional[Dict[str, str]],
+        payload: Optional[Dict[str, Any]],
+        timeout: float,
+        stream: bool = False,
+    ) -> requests.models.Response:
+        """
+        Send the request with the session of the device and translate the transport errors.
+
+        Args:
+            method:   HTTP request method
+            full_url: The full URL to request
+            headers:  Dictionary with headers (if needed)
+            params:   Dictionary with parameters (if needed)
+            payload:  JSON body for post requests (if needed)
+            timeout:  The requests read timeout
+            stream:   Stream the response body
+
+        Returns:
+            Response from the request
+
+        Raises:
+            GeneralError: On any transport error (the requests exception is chained)
+        """
         try:
             response: requests.Response = getattr(self.session, method.lower())(
                 full_url,
                 headers=headers,
                 json=payload,
                 params=params,
+                stream=stream,
                 timeout=timeout,
                 verify=self.ssl_verify,
             )
@@ -152,20 +422,27 @@ class Fortinet(ABC):
             log.error(err)
             raise GeneralError(f"Read timeout ({self.hostname})") from err
 
-        log.debug(
-            'Request time: [bold green]%2dms[/] "%s %s"',
-            ((time() - start) * 1000),
-            method.upper(),
-            full_url,
-        )
+        return response
 
-        try:
-            response.raise_for_status()
+    @staticmethod
+    def _is_retryable(err: Optional[BaseException]) -> bool:
+        """
+        Check whether a transport error may be retried.
 
-        except requests.exceptions.HTTPError as err:
-            raise APIError(err) from err
+        Args:
+            err: The requests exception which caused the error
 
-        return response
+        Returns:
+            True for connection errors and timeouts (but not for SSL errors)
+        """
+        return isinstance(
+            err,
+            (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.ConnectTimeout,
+                requests.exceptions.ReadTimeout,
+            ),
+        ) and not isinstance(err, requests.exceptions.SSLError)
 
     @staticmethod
     def get_vendor() -> str:
@@ -0,0 +1,168 @@
+"""
+The ApiResponse class wraps the response of an API request to a Fortinet device
+"""
+
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    # Use the faster orjson backend if it is installed (pip install orjson)
+    from orjson import loads
+
+    JSON_BACKEND = "orjson"
+
+except ImportError:  # pragma: no cover
+    from json import loads
+
+    JSON_BACKEND = "json"
+
+# Marker for a body which has not been decoded yet (None is a valid JSON document)
+_NOT_DECODED = object()
+
+
+def dump_response(response: requests.Response) -> Dict[str, Any]:
+    """
+    Convert a response into a dict which may be saved as JSON (e.g. to a cassette or the cache).
+
+    Args:
+        response: The response from the requests module
+
+    Returns:
+        The status, headers and body of the response
+    """
+    return {
+        "status_code": response.status_code,
+        "reason": response.reason,
+        "headers": dict(response.headers),
+        "encoding": response.encoding,
+        "content": response.content.decode("UTF-8", errors="surrogateescape"),
+    }
+
+
+def load_response(data: Dict[str, Any], url: str) -> requests.Response:
+    """
+    Create a response from a dict as returned by dump_response().
+
+    Args:
+        data: The status, headers and body of the response
+        url:  The URL of the request
+
+    Returns:
+        The response as if it had been received by the requests module
+    """
+    response = requests.Response()
+    response.status_code = data["status_code"]
+    response.reason = data["reason"]
+    response.headers = CaseInsensitiveDict(data["headers"])
+    response.encoding = data["encoding"]
+    response.url = url
+    response._content_consumed = True  # type: ignore # pylint: disable=protected-access
+    response._content = data["content"].encode(  # pylint: disable=protected-access
+        "UTF-8", errors="surrogateescape"
+    )
+
+    return response
+
+
+class ApiResponse:
+    """
+    Wrap a response from the requests module so that its JSON body is decoded only once.
+
+    The body is decoded lazily on the first call of json() and the decoded data is cached. Every
+    further call returns the very same object, so do not change it in place if you still need the
+    original data. All the other attributes are taken from the wrapped response.
+    """
+
+    def __init__(self, response: requests.Response) -> None:
+        """
+        Wrap the response.
+
+        Args:
+            response: The response from the requests module
+        """
+        self.response = response
+        self._json: Any = _NOT_DECODED
+
+    def __getattr__(self, name: str) -> Any:
+        """Get any attribute not defined here from the wrapped response"""
+        return getattr(self.response, name)
+
+    @property
+    def content(self) -> bytes:
+        """The body of the response as bytes"""
+        return self.response.content
+
+    @property
+    def headers(self) -> "CaseInsensitiveDict[str]":
+        """The headers of the response"""
+        return self.response.headers
+
+    @property
+    def ok(self) -> bool:
+        """True if the status code is less than 400"""
+        return self.response.ok
+
+    @property
+    def reason(self) -> Optional[str]:
+        """The textual reason of the status code (e.g. "Not Found")"""
+        return self.response.reason
+
+    @property
+    def status_code(self) -> int:
+        """The HTTP status code of the response"""
+        return self.response.status_code
+
+    @property
+    def text(self) -> str:
+        """The body of the response as text"""
+        return self.response.text
+
+    def json(self) -> Any:
+        """
+        Get the decoded JSON body of the response. It is decoded on the first call only.
+
+        Returns:
+            The decoded JSON body
+
+        Raises:
+            requests.exceptions.JSONDecodeError: If the body is not valid JSON
+        """
+        if self._json is _NOT_DECODED:
+            try:
+                self._json = loads(self.response.content)
+
+            except ValueError as err:
+                raise requests.exceptions.JSONDecodeError(
+                    str(err), self.response.text, getattr(err, "pos", 0)
+                ) from err
+
+        return self._json
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        """
+        Iterate over the body of the response in chunks (use it with streamed requests).
+
+        Args:
+            chunk_size: The number of bytes per chunk
+
+        Returns:
+            An iterator over the chunks of the body
+        """
+        return self.response.iter_content(chunk_size)
+
+    def close(self) -> None:
+        """
+        Release the connection of a streamed response back to the pool.
+        """
+        self.response.close()
+
+    def raise_for_status(self) -> None:
+        """
+        Raise an HTTPError if the request failed.
+
+        Raises:
+            requests.exceptions.HTTPError: If the status code is 400 or higher
+        """
+        self.response.raise_for_status()
@@ -0,0 +1,84 @@
+"""
+The RetryPolicy class defines if and how often a failed API request to a Fortinet device is retried
+"""
+
+import random
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from time import time
+from typing import List, Optional
+
+
+@dataclass(eq=False, order=False)
+class RetryPolicy:
+    """
+    This dataclass holds the retry policy for API requests.
+
+    A request is retried on connection errors, connection timeouts, read timeouts and on the HTTP
+    status codes given in status_codes. Only the idempotent HTTP methods given in methods are
+    retried. The delay between the attempts grows exponentially (backoff * 2 ** retry) up to
+    backoff_max and is randomized with full jitter. A Retry-After header sent by the device always
+    takes precedence.
+
+    The default policy does not retry at all (attempts = 1).
+    """
+
+    # The total number of attempts (1 means no retry)
+    attempts: int = 1
+
+    # The base delay in seconds between two attempts
+    backoff: float = 0.5
+
+    # The maximum delay in seconds between two attempts
+    backoff_max: float = 30.0
+
+    # Randomize the delay between 0 and the calculated backoff (full jitter)
+    jitter: bool = True
+
+    # The HTTP methods to retry (idempotent methods only by default)
+    methods: List[str] = field(default_factory=lambda: ["DELETE", "GET", "HEAD", "PUT"])
+
+    # The HTTP status codes to retry
+    status_codes: List[int] = field(default_factory=lambda: [429, 503])
+
+    def retries_method(self, method: str) -> bool:
+        """
+        Check whether requests with the given HTTP method may be retried.
+
+        Args:
+            method: The HTTP method
+
+        Returns:
+            True if the method may be retried
+        """
+        return self.attempts > 1 and method.upper() in [_.upper() for _ in self.methods]
+
+    def delay(self, retry: int, retry_after: Optional[str] = None) -> float:
+        """
+        Get the delay in seconds to wait before the next attempt.
+
+        Args:
+            retry:       The number of the retry (starting with 1)
+            retry_after: The value of the Retry-After header if the device sent one. It may either
+                         be a number of seconds or a HTTP date.
+
+        Returns:
+            The delay in seconds
+        """
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.backoff_max)
+
+            except ValueError:
+                try:
+                    seconds = parsedate_to_datetime(retry_after).timestamp() - time()
+                    return min(max(seconds, 0.0), self.backoff_max)
+
+                except (TypeError, ValueError):
+                    pass
+
+        delay: float = min(self.backoff * 2 ** (retry - 1), self.backoff_max)
+        if self.jitter:
+            delay = random.uniform(0, delay)  # nosec: not used for security
+
+        return delay
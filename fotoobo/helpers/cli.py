@@ -1,12 +1,50 @@
 """
-Helper functions for testing the cli
+Helper functions for the cli
 """
 
+import traceback
 from typing import Any, Dict, List, Optional
 
+import typer
 from rich.text import Text
 from rich.tree import Tree
 
+from fotoobo.exceptions import APIError, GeneralError, GeneralWarning
+
+
+def run_app(app: typer.Typer, args: Optional[List[str]] = None) -> int:
+    """
+    Run the typer cli and translate its exceptions into the fotoobo exit codes.
+
+    Args:
+        app:  The typer cli to run
+        args: The command line arguments (defaults to sys.argv)
+
+    Returns:
+        The exit code
+    """
+    try:
+        app(args=args, prog_name="fotoobo")
+
+    except SystemExit as exc:
+        return exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+
+    except GeneralWarning as warn:  # pragma: no cover
+        print(f"Warning: {warn.message}")
+        return 30
+
+    except (GeneralError, APIError) as err:  # pragma: no cover
+        print(f"Error: {err.message}")
+        return 40
+
+    except Exception:  # pylint: disable=broad-except # pragma: no cover
+        print("oops, something did not work as expected. See traceback.log for more info")
+        with open("traceback.log", "w", encoding="UTF-8") as exc_file:
+            traceback.print_exc(file=exc_file)
+        return 50
+
+    return 0
+
 
 def walk_cli_info(
     info: Dict[str, Any], tree: Tree, command_path: Optional[List[str]] = None
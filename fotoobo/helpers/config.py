@@ -8,7 +8,7 @@ line option, the command line option takes precedence over the global configurat
 """
 
 import os
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from pathlib import Path
 from typing import Any, Dict, Optional
 
@@ -24,15 +24,31 @@ class Config:
     If an option is not defined here it is not guaranteed that it may be used later in the code.
     """
 
+    # pylint: disable=too-many-instance-attributes
+
     # set default values
     inventory_file: Path = Path("inventory.yaml")
     logging: Optional[Dict[str, Any]] = None
     audit_logging: Optional[Dict[str, Any]] = None
     no_logo: bool = False
+    cache: Dict[str, Any] = field(default_factory=dict)
+    cassette: Dict[str, Any] = field(default_factory=dict)
+    circuit_breaker: Dict[str, Any] = field(default_factory=dict)
+    config_cache: Dict[str, Any] = field(default_factory=dict)
     cli_info: Dict[str, Any] = field(default_factory=dict)
+    fanout: Dict[str, Any] = field(default_factory=dict)
     vault: Dict[str, str] = field(default_factory=dict)
 
-    def load_configuration(  # pylint: disable=too-many-branches
+    def reset(self) -> None:
+        """
+        Reset all the configuration options to their defaults (e.g. before the fotoobo daemon runs
+        the next command).
+        """
+        defaults = Config()
+        for option in fields(self):
+            setattr(self, option.name, getattr(defaults, option.name))
+
+    def load_configuration(  # pylint: disable=too-many-branches,too-many-statements
         self, config_file: Optional[Path] = None
     ) -> None:
         """
@@ -96,6 +112,37 @@ class Config:
 
                 self.no_logo = loaded_config.get("no_logo", self.no_logo)
 
+                self.cache = loaded_config.get("cache", {}) or {}
+                if not isinstance(self.cache, dict):
+                    raise GeneralError("Setting cache has to be a dictionary")
+                if not isinstance(self.cache.get("ttls", {}) or {}, dict):
+                    raise GeneralError("Setting cache.ttls has to be a dictionary")
+
+                self.cassette = loaded_config.get("cassette", {}) or {}
+                if not isinstance(self.cassette, dict):
+                    raise GeneralError("Setting cassette has to be a dictionary")
+                if self.cassette:
+                    if not self.cassette.get("file"):
+                        raise GeneralError("Missing cassette configuration: file")
+                    if self.cassette.get("mode") not in ["record", "replay"]:
+                        raise GeneralError("Setting cassette.mode has to be 'record' or 'replay'")
+
+                self.circuit_breaker = loaded_config.get("circuit_breaker", {}) or {}
+                if not isinstance(self.circuit_breaker, dict):
+                    raise GeneralError("Setting circuit_breaker has to be a dictionary")
+
+                self.config_cache = loaded_config.get("config_cache", {}) or {}
+                if not isinstance(self.config_cache, dict):
+                    raise GeneralError("Setting config_cache has to be a dictionary")
+
+                self.fanout = loaded_config.get("fanout", {}) or {}
+                if not isinstance(self.fanout, dict):
+                    raise GeneralError("Setting fanout has to be a dictionary")
+                if not isinstance(self.fanout.get("max_workers", 0), (int, dict)):
+                    raise GeneralError(
+                        "Setting fanout.max_workers has to be a number or dictionary"
+                    )
+
                 self.vault = loaded_config.get("vault", {})
                 if self.vault:
                     # role_id and secret_id may be stored in environment variables (they overwrite
@@ -0,0 +1,221 @@
+"""
+The daemon helper keeps fotoobo running in the background and lets the CLI forward commands to it.
+
+Started with 'fotoobo daemon' it listens on a Unix socket. Every fotoobo command invoked while the
+daemon is running is sent to it and executed there. So the daemon keeps the inventory, the HTTPS
+connections, the FortiManager session keys and the FortiClient EMS cookies between two commands.
+
+This module is imported by the command line client before anything else. So do not import any
+other fotoobo module (or other expensive modules) here.
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+from contextlib import redirect_stderr, redirect_stdout
+from functools import partial
+from io import StringIO
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger("fotoobo")
+
+# The default socket of the daemon (set the environment variable FOTOOBO_DAEMON_SOCKET to change it
+# or set it to an empty string to never forward any command to a daemon)
+DEFAULT_SOCKET = "~/.cache/fotoobo/daemon.sock"
+
+# The commands which are forwarded to the daemon. The daemon runs one command after the other, so
+# only the short queries which benefit from the warm inventory and sessions are forwarded. Long
+# running commands (like a fleet backup) or commands which do not terminate (like watching the
+# monitor endpoints) always run locally, so they never block the daemon.
+FORWARDED_COMMANDS = [
+    ["ems", "get"],
+    ["ems", "monitor"],
+    ["faz", "get"],
+    ["fgt", "get", "version"],
+    ["fgt", "monitor", "hamaster"],
+    ["fmg", "get"],
+    ["get"],
+]
+
+
+def get_socket_path() -> Optional[Path]:
+    """
+    Get the path of the daemon socket.
+
+    Returns:
+        The path of the socket or None if forwarding commands to a daemon is disabled
+    """
+    socket_path = os.getenv("FOTOOBO_DAEMON_SOCKET", DEFAULT_SOCKET)
+    return Path(socket_path).expanduser() if socket_path else None
+
+
+def is_forwarded(argv: List[str]) -> bool:
+    """
+    Check whether a command is forwarded to the daemon.
+
+    Args:
+        argv: The command line arguments (without the program name)
+
+    Returns:
+        True if the command is one of the FORWARDED_COMMANDS
+    """
+    for command in FORWARDED_COMMANDS:
+        words = iter(argv)
+        if all(word in words for word in command):
+            return True
+
+    return False
+
+
+def forward(argv: List[str], socket_path: Optional[Path] = None) -> Optional[Tuple[int, str]]:
+    """
+    Forward a command to a running daemon and wait for its output.
+
+    Only the FORWARDED_COMMANDS are forwarded. The command is run with the environment of the
+    client (e.g. the vault credentials in FOTOOBO_VAULT_ROLE_ID and FOTOOBO_VAULT_SECRET_ID).
+
+    Args:
+        argv:        The command line arguments (without the program name)
+        socket_path: The socket of the daemon (defaults to get_socket_path())
+
+    Returns:
+        The exit code and the output of the command or None if there is no daemon to run it
+    """
+    socket_path = socket_path or get_socket_path()
+    if not socket_path or not is_forwarded(argv) or not socket_path.is_socket():
+        return None
+
+    request = {"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(str(socket_path))
+
+        except OSError:
+            # There is a socket file left but no daemon is listening (anymore)
+            return None
+
+        try:
+            client.sendall(json.dumps(request).encode("UTF-8") + b"\n")
+            client.shutdown(socket.SHUT_WR)
+            data = b"".join(iter(partial(client.recv, 65536), b""))
+            response = json.loads(data)
+            return int(response["exit_code"]), str(response["output"])
+
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            return 40, f"Error: Lost connection to the fotoobo daemon ({err})\n"
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    """
+    Handle one forwarded command: read the request, run the command and write back its output.
+    """
+
+    server: "Daemon"
+
+    def handle(self) -> None:
+        """Handle the request"""
+        try:
+            request = json.loads(self.rfile.readline())
+            argv = [str(_) for _ in request["argv"]]
+            cwd = request.get("cwd")
+            env = {str(key): str(value) for key, value in (request.get("env") or {}).items()}
+
+        except (ValueError, KeyError, TypeError):
+            exit_code, output = 2, "Error: Invalid request to the fotoobo daemon\n"
+
+        else:
+            exit_code, output = self.server.run_command(argv, cwd, env)
+
+        self.wfile.write(
+            json.dumps({"exit_code": exit_code, "output": output}).encode("UTF-8") + b"\n"
+        )
+
+
+class Daemon(socketserver.UnixStreamServer):
+    """
+    The fotoobo daemon listens on a Unix socket and runs the forwarded commands.
+
+    The commands are run one after the other in the working directory and with the environment of
+    the client. Their output (stdout and stderr) is sent back to the client when they are finished.
+    As the commands share the configuration, the working directory and the environment of the
+    daemon they cannot run at the same time. So only short commands are accepted (see
+    FORWARDED_COMMANDS). The socket is only accessible by the user running the daemon.
+    """
+
+    def __init__(self, socket_path: Path, runner: Callable[[List[str]], int]) -> None:
+        """
+        Create the daemon and bind it to its socket.
+
+        Args:
+            socket_path: The socket to listen on (an existing socket file is replaced)
+            runner:      The function to run a command (gets the arguments, returns the exit code)
+        """
+        self.socket_path = socket_path.expanduser()
+        self.runner = runner
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.is_socket():
+            self.socket_path.unlink()
+
+        super().__init__(str(self.socket_path), _CommandHandler)
+
+    def server_bind(self) -> None:
+        """Bind the socket with permissions for the current user only"""
+        # The socket is created with these permissions, so it is never accessible by others
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+
+        finally:
+            os.umask(umask)
+
+    def server_close(self) -> None:
+        """Close the socket and remove the socket file"""
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+    def run_command(
+        self, argv: List[str], cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, str]:
+        """
+        Run a command and capture its output.
+
+        Args:
+            argv: The command line arguments (without the program name)
+            cwd:  The working directory to run the command in
+            env:  The environment variables to run the command with (instead of the ones of the
+                  daemon)
+
+        Returns:
+            The exit code and the output of the command
+        """
+        if not is_forwarded(argv):
+            return 2, f"Error: '{' '.join(argv)}' cannot run in the fotoobo daemon\n"
+
+        log.debug("Running forwarded command '%s'", " ".join(argv))
+        output = StringIO()
+        previous_cwd = os.getcwd()
+        previous_env = dict(os.environ)
+        try:
+            if cwd:
+                os.chdir(cwd)
+
+            if env is not None:
+                os.environ.clear()
+                os.environ.update(env)
+
+            with redirect_stdout(output), redirect_stderr(output):
+                exit_code = self.runner(argv)
+
+        except OSError as err:
+            output.write(f"Error: {err}\n")
+            exit_code = 40
+
+        finally:
+            os.chdir(previous_cwd)
+            os.environ.clear()
+            os.environ.update(previous_env)
+
+        return exit_code, output.getvalue()
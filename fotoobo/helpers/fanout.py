@@ -0,0 +1,477 @@
+"""
+The fan-out helper runs a task against many assets from the inventory concurrently.
+
+Use it for any fleet operation (like backing up or querying all FortiGates) instead of writing your
+own thread pool. The concurrency limits, the rate limit, the per host deadline and the deadline of
+the whole run are taken from the 'fanout' section in the fotoobo configuration and may be
+overwritten on the command line.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from time import monotonic
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from rich.progress import Progress
+
+from fotoobo.exceptions import GeneralError
+from fotoobo.helpers.config import config
+
+log = logging.getLogger("fotoobo")
+
+T = TypeVar("T")
+
+# The number of assets processed at the same time if nothing else is configured
+DEFAULT_MAX_WORKERS = 10
+
+# The deadline of the task running in the current thread
+_task = threading.local()
+
+
+def remaining_time() -> Optional[float]:
+    """
+    Get the time left until the deadline of the fan-out task running in the current thread.
+
+    Use it in long running tasks (like Fortinet.api() does) to not start any work which cannot be
+    finished anymore and to limit the timeouts.
+
+    Returns:
+        The time left in seconds (0 or less if the deadline has passed) or None if there is no
+        deadline
+    """
+    deadline: Optional[float] = getattr(_task, "deadline", None)
+    return None if deadline is None else deadline - monotonic()
+
+
+def check_deadline(hostname: str) -> None:
+    """
+    Stop the fan-out task running in the current thread if its deadline has passed.
+
+    A thread cannot be stopped from the outside. So call this in every loop of a long running task
+    (like streaming a backup or polling a task) to stop it as soon as it ran out of time.
+
+    Args:
+        hostname: The name of the device the task is working on (for the error message)
+
+    Raises:
+        GeneralError: If the deadline has passed
+    """
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise GeneralError(f"Deadline exceeded ({hostname})")
+
+
+async def run_async(
+    func: Callable[[], T],
+    semaphore: Optional[asyncio.Semaphore] = None,
+    executor: Optional[Executor] = None,
+) -> T:
+    """
+    Run a blocking function from within an asyncio event loop.
+
+    The HTTP transport of fotoobo (requests) is blocking. So the call is handed over to a thread
+    pool. The number of concurrent calls is limited by the optional semaphore and by the size of
+    the executor. Without an executor the default executor of the loop is used, which has no more
+    than min(32, CPUs + 4) threads. So give an executor with as many threads as calls you want in
+    flight (like FanOut does).
+
+    Args:
+        func:      The callable to run (use functools.partial to pass arguments)
+        semaphore: Bound the number of calls in flight (shared by all concurrent callers)
+        executor:  The thread pool to run the call in (defaults to the loop's default executor)
+
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    if semaphore is None:
+        return await loop.run_in_executor(executor, func)
+
+    async with semaphore:
+        return await loop.run_in_executor(executor, func)
+
+
+def parse_max_workers(values: List[str]) -> Dict[str, int]:
+    """
+    Parse the max workers given on the command line.
+
+    Every value is either a number which is used as the default for all device types or a
+    'type=number' pair which is only used for the given device type.
+
+    Args:
+        values: The values to parse (e.g. ["20", "fortimanager=2"])
+
+    Returns:
+        The max workers by device type (the key 'default' is used for all other types)
+
+    Raises:
+        GeneralError: If a value could not be parsed
+    """
+    max_workers: Dict[str, int] = {}
+    for value in values:
+        device_type, _, number = value.rpartition("=")
+        try:
+            max_workers[device_type or "default"] = int(number)
+
+        except ValueError as err:
+            raise GeneralError(f"Invalid max workers '{value}'") from err
+
+    return max_workers
+
+
+class FanOut(Generic[T]):
+    """
+    Run a task against many assets concurrently.
+
+    The task is a blocking function which is called with the name and the asset from the inventory.
+    All the tasks are scheduled in one asyncio event loop and handed over to a thread pool (with
+    run_async()) which has a thread for every task which may run at the same time. How many tasks
+    run at the same time is limited per device type (the type attribute of the asset).
+
+    With a deadline for the whole run every task gets its share of the time left when it starts:
+    the time left divided by the number of rounds the pending tasks of its device type still need.
+    So fast devices leave more time to the ones started later and no single device can use up the
+    whole budget. Tasks which could not be started before the deadline are not started at all.
+    Tasks which do not finish within their share are reported as timed out right away, but they keep
+    their slot until their thread returns. So the concurrency limits hold and the next task does not
+    wait behind a straggler in the thread pool. A thread cannot be killed, so long running tasks
+    have to call check_deadline() to stop in time.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        description: str = "",
+        max_workers: Union[int, Dict[str, int], None] = None,
+        rate_limit: Optional[float] = None,
+        timeout: Optional[float] = None,
+        ordered: Optional[bool] = None,
+        deadline: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize the fan-out engine. Every argument you omit is taken from the 'fanout' section
+        in the fotoobo configuration.
+
+        Args:
+            description: The text to show in the progress bar (no progress bar if empty)
+            max_workers: The number of tasks to run at the same time. Either one number for all
+                         device types or a dict with the number by device type. Use the key
+                         'default' for all the device types not listed.
+            rate_limit:  The maximum number of tasks to start per second (0 = unlimited)
+            timeout:     The deadline in seconds for the task of a single asset (0 = no deadline)
+            ordered:     Deliver the results in the order of the assets (True) or as soon as they
+                         are completed (False)
+            deadline:    The deadline in seconds for the whole run (0 = no deadline)
+        """
+        settings = config.fanout
+        self.description = description
+        self.max_workers: Union[int, Dict[str, int]] = (
+            max_workers
+            if max_workers is not None
+            else settings.get("max_workers", DEFAULT_MAX_WORKERS)
+        )
+        self.rate_limit: float = float(
+            rate_limit if rate_limit is not None else settings.get("rate_limit", 0) or 0
+        )
+        self.timeout: float = float(
+            timeout if timeout is not None else settings.get("timeout", 0) or 0
+        )
+        self.ordered: bool = bool(ordered if ordered is not None else settings.get("ordered"))
+        self.deadline: float = float(
+            deadline if deadline is not None else settings.get("deadline", 0) or 0
+        )
+
+        # The names of the assets which did not finish within the deadline
+        self.timed_out: List[str] = []
+
+        self._next_start: float = 0.0
+        self._deadline_at: float = 0.0
+        self._pending: Dict[str, int] = {}
+
+    def limit(self, device_type: str) -> int:
+        """
+        Get the number of tasks to run at the same time for a device type.
+
+        Args:
+            device_type: The type of the asset (e.g. "fortigate")
+
+        Returns:
+            The max number of concurrent tasks (at least 1)
+        """
+        if isinstance(self.max_workers, dict):
+            limit = self.max_workers.get(
+                device_type, self.max_workers.get("default", DEFAULT_MAX_WORKERS)
+            )
+
+        else:
+            limit = self.max_workers
+
+        return max(int(limit), 1)
+
+    def run(
+        self,
+        func: Callable[[str, Any], T],
+        assets: Dict[str, Any],
+        on_result: Optional[Callable[[str, T], None]] = None,
+        on_timeout: Optional[Callable[[str, str], None]] = None,
+    ) -> List[Tuple[str, T]]:
+        """
+        Run the task for all the assets given.
+
+        Args:
+            func:       The blocking task to run. It is called with the name and the asset and has
+                        to handle its own exceptions.
+            assets:     The assets to process with their name as key
+            on_result:  Optional callback which is called with the name and the result as soon as
+                        a result is delivered (in the main thread)
+            on_timeout: Optional callback which is called with the name and a message for every
+                        asset which ran out of time (in the main thread, e.g. Result.push_timed_out)
+
+        Returns:
+            List of (name, result) tuples. Assets which ran into the deadline are not in this list
+            but in the timed_out attribute.
+        """
+        self.timed_out = []
+        if not assets:
+            return []
+
+        progress = Progress(disable=not self.description)
+        # Do not even start a disabled progress bar as it still writes a line break when it stops
+        display: ContextManager[Any] = nullcontext()
+        if self.description:
+            display = progress
+
+        with display:
+            task = progress.add_task(self.description, total=len(assets))
+
+            def _deliver(name: str, data: Optional[T], finished: bool) -> None:
+                if finished:
+                    if on_result:
+                        on_result(name, data)  # type: ignore
+
+                else:
+                    log.warning("Deadline exceeded for '%s'", name)
+                    self.timed_out.append(name)
+                    if on_timeout:
+                        on_timeout(name, "Deadline exceeded")
+
+                progress.update(task, advance=1)
+
+            return asyncio.run(self._run(func, assets, _deliver))
+
+    async def _run(
+        self,
+        func: Callable[[str, Any], T],
+        assets: Dict[str, Any],
+        deliver: Callable[[str, Optional[T], bool], None],
+    ) -> List[Tuple[str, T]]:
+        """
+        Schedule all the tasks in the event loop and deliver the results.
+
+        Args:
+            func:    The blocking task to run
+            assets:  The assets to process with their name as key
+            deliver: Called with name, result and finished flag in the order of delivery
+
+        Returns:
+            List of (name, result) tuples in the order of delivery
+        """
+        semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._pending = {}
+        for asset in assets.values():
+            device_type = getattr(asset, "type", "")
+            semaphores.setdefault(device_type, asyncio.Semaphore(self.limit(device_type)))
+            self._pending[device_type] = self._pending.get(device_type, 0) + 1
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(sum(self.limit(_) for _ in semaphores), len(assets))
+        )
+        self._next_start = monotonic()
+        self._deadline_at = self._next_start + self.deadline
+        tasks = [
+            asyncio.ensure_future(
+                self._run_single(
+                    func, name, asset, semaphores[getattr(asset, "type", "")], executor
+                )
+            )
+            for name, asset in assets.items()
+        ]
+        results: List[Tuple[str, T]] = []
+
+        try:
+            for next_done in tasks if self.ordered else asyncio.as_completed(tasks):
+                name, finished, data = await next_done
+                if finished:
+                    results.append((name, data))  # type: ignore
+
+                deliver(name, data, finished)
+
+        finally:
+            executor.shutdown(wait=False)
+
+        return results
+
+    async def _run_single(  # pylint: disable=too-many-arguments
+        self,
+        func: Callable[[str, Any], T],
+        name: str,
+        asset: Any,
+        semaphore: asyncio.Semaphore,
+        executor: ThreadPoolExecutor,
+    ) -> Tuple[str, bool, Optional[T]]:
+        """
+        Run the task for one single asset within its concurrency limit and deadline. The task is
+        not started at all if the deadline of the run has already passed.
+
+        Args:
+            func:      The blocking task to run
+            name:      The name of the asset
+            asset:     The asset to run the task for
+            semaphore: The semaphore of the device type of the asset
+            executor:  The thread pool to run the task in
+
+        Returns:
+            The name, whether the task finished within its deadline and the result of the task
+        """
+        data: Optional[T] = None
+        finished = False
+        if not await self._acquire(semaphore):
+            log.debug("Fan-out task for '%s' not started, no free slot before the deadline", name)
+            return name, finished, data
+
+        try:
+            await self._throttle()
+            timeout = self._task_timeout(getattr(asset, "type", ""))
+
+        except BaseException:
+            semaphore.release()
+            raise
+
+        if timeout is not None and timeout <= 0:
+            semaphore.release()
+            log.debug("Fan-out task for '%s' not started, no time left", name)
+            return name, finished, data
+
+        log.debug("Fan-out task for '%s' started (timeout: %ss)", name, timeout)
+        future = asyncio.ensure_future(
+            run_async(partial(self._call, func, name, asset, timeout), executor=executor)
+        )
+        # The slot is only given back when the thread returns, even if the task ran out of time.
+        # Otherwise the next task would be queued behind the straggler in the thread pool.
+        future.add_done_callback(lambda _: self._release(semaphore, _))
+        try:
+            data, finished = await asyncio.wait_for(asyncio.shield(future), timeout)
+
+        except asyncio.TimeoutError:
+            pass
+
+        return name, finished, data
+
+    async def _acquire(self, semaphore: asyncio.Semaphore) -> bool:
+        """
+        Wait for a free slot of a device type, but not longer than the deadline of the run.
+
+        Args:
+            semaphore: The semaphore of the device type
+
+        Returns:
+            True if the slot was acquired, False if the deadline passed before
+        """
+        if not self.deadline:
+            await semaphore.acquire()
+            return True
+
+        try:
+            await asyncio.wait_for(semaphore.acquire(), max(self._deadline_at - monotonic(), 0))
+
+        except asyncio.TimeoutError:
+            return False
+
+        return True
+
+    @staticmethod
+    def _release(semaphore: asyncio.Semaphore, future: "asyncio.Future[Any]") -> None:
+        """
+        Give back the slot of a task once its thread has returned.
+
+        Args:
+            semaphore: The semaphore of the device type of the task
+            future:    The future of the task
+        """
+        semaphore.release()
+        if not future.cancelled() and future.exception():
+            # The task ran out of time and nobody is waiting for it anymore
+            log.debug("Fan-out task failed after its deadline: %s", future.exception())
+
+    def _task_timeout(self, device_type: str) -> Optional[float]:
+        """
+        Get the timeout for the next task of a device type and count it as started.
+
+        Args:
+            device_type: The type of the asset of the task
+
+        Returns:
+            The timeout in seconds (0 or less if there is no time left) or None for no timeout
+        """
+        timeouts = [self.timeout] if self.timeout else []
+        if self.deadline:
+            rounds = math.ceil(self._pending[device_type] / self.limit(device_type))
+            timeouts.append((self._deadline_at - monotonic()) / rounds)
+
+        self._pending[device_type] -= 1
+        return min(timeouts) if timeouts else None
+
+    @staticmethod
+    def _call(
+        func: Callable[[str, Any], T], name: str, asset: Any, timeout: Optional[float]
+    ) -> Tuple[T, bool]:
+        """
+        Call the task in the thread pool with its deadline set for remaining_time(). The deadline
+        starts when the thread picks up the task.
+
+        Args:
+            func:    The blocking task to run
+            name:    The name of the asset
+            asset:   The asset to run the task for
+            timeout: The time in seconds the task may take or None
+
+        Returns:
+            The result of the task and whether it finished before its deadline
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        _task.deadline = deadline
+        try:
+            data = func(name, asset)
+
+        finally:
+            _task.deadline = None
+
+        return data, deadline is None or monotonic() < deadline
+
+    async def _throttle(self) -> None:
+        """Wait for the next free slot if a rate limit is set"""
+        if self.rate_limit <= 0:
+            return
+
+        now = monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + 1 / self.rate_limit
+        if start > now:
+            await asyncio.sleep(start - now)
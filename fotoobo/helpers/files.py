@@ -2,12 +2,15 @@
 Some helper functions for file manipulation.
 """
 
+import csv
+import gzip
 import json
 import logging
 import re
 from ftplib import FTP, FTP_TLS
 from pathlib import Path
-from typing import Any, Dict, List, Union
+from types import TracebackType
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, TextIO, Type, Union
 from zipfile import ZIP_DEFLATED, ZipFile
 
 import yaml
@@ -16,6 +19,9 @@ from fotoobo.exceptions import GeneralError
 
 log = logging.getLogger("fotoobo")
 
+# The compressions for CompressedStream and the file extensions they add
+COMPRESSIONS = {"zip": ".zip", "gzip": ".gz", "zstd": ".zst"}
+
 
 def create_dir(directory: Path) -> None:
     """
@@ -35,6 +41,74 @@ def create_dir(directory: Path) -> None:
             raise GeneralError(f"Unable to create directory {directory}") from err
 
 
+def ftp_connect(server: Any) -> FTP:
+    """
+    Connect and login to a ftp server and change into the upload directory.
+
+    Args:
+        server: The ftp sever definition (see file_to_ftp())
+
+    Returns:
+        The ftp connection (use it as a context manager or call quit() when done)
+
+    Raises:
+        GeneralError: If the protocol is unknown
+    """
+    protocol = getattr(server, "protocol", "sftp")
+    ftp: FTP
+    if protocol == "sftp":
+        ftp = FTP_TLS(server.hostname)
+        log.debug("SFTP transfer for '%s'", server.hostname)
+        ftp.sendcmd(f"USER {server.username}")
+        ftp.sendcmd(f"PASS {server.password}")
+
+    elif protocol == "ftp":
+        ftp = FTP(server.hostname, server.username, server.password)
+        log.debug("FTP transfer for '%s'", server.hostname)
+
+    else:
+        raise GeneralError(f'Unknown FTP protocol "{protocol}" for server "{server.hostname}"')
+
+    try:
+        ftp.cwd(server.directory)
+
+    except Exception:
+        ftp.close()
+        raise
+
+    return ftp
+
+
+def ftp_store(
+    ftp: FTP, file: Path, name: Optional[str] = None, compression: Optional[str] = None
+) -> int:
+    """
+    Upload a file over an open ftp connection.
+
+    Args:
+        ftp:         The ftp connection (see ftp_connect())
+        file:        The file to upload
+        name:        The name of the file on the server (defaults to the name of the file)
+        compression: Compress the file on the fly while it is uploaded (see CompressedStream)
+
+    Returns:
+        Return code (0 if the transfer has been completed)
+    """
+    ftp_file: Union[BinaryIO, CompressedStream]
+    ftp_file = CompressedStream(file, compression) if compression else file.open("rb")
+    try:
+        response = ftp.storbinary(f"STOR {name or file.name}", ftp_file)
+
+    finally:
+        ftp_file.close()
+
+    if response != "226 Transfer complete.":
+        if code := re.search(r"^([0-9]{0,3})\s", response):
+            return int(code[1])
+
+    return 0
+
+
 def file_to_ftp(file: Path, server: Any) -> int:
     """
     Upload a file to a ftp server.
@@ -51,46 +125,11 @@ def file_to_ftp(file: Path, server: Any) -> int:
     Returns:
         Return code
     """
-    return_code = 0
-
-    if file.is_file():
-        if hasattr(server, "protocol"):
-            protocol = server.protocol
+    if not file.is_file():
+        return 666
 
-        else:
-            protocol = "sftp"
-
-        if protocol == "sftp":
-            with FTP_TLS(server.hostname) as ftp:
-                log.debug("SFTP transfer for '%s'", server.hostname)
-                ftp.sendcmd(f"USER {server.username}")
-                ftp.sendcmd(f"PASS {server.password}")
-                ftp.cwd(server.directory)
-
-                with file.open("rb") as ftp_file:
-                    response = ftp.storbinary(f"STOR {file.name}", ftp_file)
-                    if response != "226 Transfer complete.":
-                        if code := re.search(r"^([0-9]{0,3})\s", response):
-                            return_code = int(code[1])
-
-        elif protocol == "ftp":
-            with FTP(server.hostname, server.username, server.password) as ftp:
-                log.debug("FTP transfer for '%s'", server.hostname)
-                ftp.cwd(server.directory)
-
-                with file.open("rb") as ftp_file:
-                    response = ftp.storbinary(f"STOR {file.name}", ftp_file)
-                    if response != "226 Transfer complete.":
-                        if code := re.search(r"^([0-9]{0,3})\s", response):
-                            return_code = int(code[1])
-
-        else:
-            raise GeneralError(f'Unknown FTP protocol "{protocol}" for server "{server.hostname}"')
-
-    else:
-        return_code = 666
-
-    return return_code
+    with ftp_connect(server) as ftp:
+        return ftp_store(ftp, file)
 
 
 def file_to_zip(src: Path, dst: Path, level: int = 9) -> None:
@@ -115,6 +154,135 @@ def file_to_zip(src: Path, dst: Path, level: int = 9) -> None:
             archive.write(src, arcname=inner_file.name)
 
 
+class _Buffer:
+    """The (not seekable) output of the compressors which CompressedStream reads from"""
+
+    def __init__(self) -> None:
+        """Create the empty buffer"""
+        self.data = bytearray()
+
+    def write(self, data: bytes) -> int:
+        """Append compressed data to the buffer"""
+        self.data += data
+        return len(data)
+
+    def flush(self) -> None:
+        """Nothing to flush as the data is kept in memory"""
+
+    def close(self) -> None:
+        """Keep the data when the compressor closes its output"""
+
+
+class CompressedStream:
+    """
+    Read a file compressed on the fly.
+
+    Only a few chunks of the file are held in memory at any time and nothing is written to disk.
+    So the stream may directly be uploaded (e.g. with ftplib.FTP.storbinary()). The compression is
+    one of:
+
+        zip:  A zip archive with the file in it (like file_to_zip())
+        gzip: The gzip compressed file
+        zstd: The zstd compressed file (needs the package 'zstandard': pip install zstandard)
+    """
+
+    def __init__(
+        self,
+        file: Path,
+        compression: str = "zip",
+        level: Optional[int] = None,
+        chunk_size: int = 65536,
+    ) -> None:
+        """
+        Open the file to read it compressed.
+
+        Args:
+            file:        The file to compress
+            compression: The compression to use (zip, gzip or zstd)
+            level:       The compression level (defaults to the default of the compression)
+            chunk_size:  The size of the chunks to read from the file
+
+        Raises:
+            GeneralError: If the compression is unknown or not available
+        """
+        if compression not in COMPRESSIONS:
+            raise GeneralError(
+                f"Unknown compression '{compression}' (use one of {', '.join(COMPRESSIONS)})"
+            )
+
+        self.chunk_size = chunk_size
+        self._buffer = _Buffer()
+        self._archive: Optional[ZipFile] = None
+        self._compressor: Any
+        # The compressors stay open until the whole file has been read
+        # pylint: disable=consider-using-with
+        if compression == "zip":
+            self._archive = ZipFile(
+                self._buffer, "w", ZIP_DEFLATED, compresslevel=level  # type: ignore
+            )
+            self._compressor = self._archive.open(file.name, "w", force_zip64=True)
+
+        elif compression == "gzip":
+            self._compressor = gzip.GzipFile(
+                file.name, "wb", 9 if level is None else level, self._buffer
+            )
+
+        else:
+            try:
+                import zstandard  # pylint: disable=import-outside-toplevel
+
+            except ImportError as err:
+                raise GeneralError(
+                    "zstd compression needs the package 'zstandard' (pip install zstandard)"
+                ) from err
+
+            self._compressor = zstandard.ZstdCompressor(
+                level=3 if level is None else level
+            ).stream_writer(self._buffer)
+
+        self._file = file.open("rb")
+        self._eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read compressed data.
+
+        Args:
+            size: The max number of bytes to read (all if negative)
+
+        Returns:
+            The compressed data (empty when the end of the stream is reached)
+        """
+        while not self._eof and (size < 0 or len(self._buffer.data) < size):
+            if chunk := self._file.read(self.chunk_size):
+                self._compressor.write(chunk)
+
+            else:
+                self._finish()
+
+        if size < 0:
+            size = len(self._buffer.data)
+
+        data = bytes(self._buffer.data[:size])
+        del self._buffer.data[:size]
+        return data
+
+    def close(self) -> None:
+        """Close the file and the compressor (even if the stream has not been read to its end)"""
+        self._file.close()
+        self._finish()
+        self._buffer.data.clear()
+
+    def _finish(self) -> None:
+        """Flush the compressor to end the stream"""
+        if not self._eof:
+            self._compressor.close()
+            if self._archive:
+                self._archive.close()
+
+            self._eof = True
+
+
 def load_json_file(json_file: Path) -> Union[List[Any], Dict[str, Any], None]:
     """
     Loads the content of a json file into a list or dict.
@@ -210,3 +378,87 @@ def save_yaml_file(yaml_file: Path, data: Union[List[Any], Dict[str, Any]]) -> b
         status = False
 
     return status
+
+
+class RowWriter:
+    """
+    Write rows (flat dictionaries) into a CSV or JSON Lines file one batch after the other.
+
+    The format is given by the extension of the file ('.csv' or '.jsonl'). Every batch is written
+    and flushed at once, so the rows do not have to be held in memory until all of them are known.
+    In a CSV file the columns are taken from the first row written.
+
+    Use it as a context manager:
+
+        with RowWriter(Path("objects.csv")) as writer:
+            writer.write([{"name": "host1", "type": "fqdn"}])
+    """
+
+    FORMATS = {".csv": "csv", ".jsonl": "jsonl"}
+
+    def __init__(self, file: Path) -> None:
+        """
+        Create the writer.
+
+        Args:
+            file: The file to write the rows into (an existing file is overwritten)
+
+        Raises:
+            GeneralError: If the extension of the file is not supported
+        """
+        if file.suffix not in self.FORMATS:
+            raise GeneralError(
+                f"Unsupported file format '{file.suffix}' (use one of {', '.join(self.FORMATS)})"
+            )
+
+        self.file = file
+        self.format = self.FORMATS[file.suffix]
+        self.rows = 0
+        self._handle: Optional[TextIO] = None
+        self._csv: Optional["csv.DictWriter[str]"] = None
+
+    def __enter__(self) -> "RowWriter":
+        """Open the file"""
+        try:
+            self._handle = self.file.open("w", encoding="UTF-8", newline="")
+
+        except OSError as err:
+            raise GeneralError(f"Unable to write file '{self.file}': {err}") from err
+
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the file"""
+        if self._handle:
+            self._handle.close()
+            self._handle = None
+
+    def write(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Write a batch of rows into the file.
+
+        Args:
+            rows: The rows to write
+        """
+        if not self._handle:
+            raise GeneralError(f"File '{self.file}' is not open for writing")
+
+        for row in rows:
+            if self.format == "csv":
+                if not self._csv:
+                    self._csv = csv.DictWriter(self._handle, list(row), extrasaction="ignore")
+                    self._csv.writeheader()
+
+                self._csv.writerow(row)
+
+            else:
+                self._handle.write(json.dumps(row) + "\n")
+
+            self.rows += 1
+
+        self._handle.flush()
@@ -0,0 +1,274 @@
+"""
+The metrics helper collects the timing of all the API requests to Fortinet devices.
+
+If enabled, every request sent by Fortinet.api() is counted per host and per endpoint into a
+histogram with fixed buckets. At the end of a run the metrics may be exported as JSON or as a
+Prometheus textfile (see the command line option --metrics) to find the endpoints and devices which
+dominate the run time.
+"""
+
+import logging
+import math
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from fotoobo.helpers.files import save_json_file, save_txt_file
+
+log = logging.getLogger("fotoobo")
+
+# The upper bounds in seconds of the histogram buckets for the request durations. Requests which
+# take longer are counted in an additional bucket without upper bound (+Inf).
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+# The quantiles to estimate for every endpoint
+QUANTILES = [0.5, 0.95, 0.99]
+
+
+@dataclass(eq=False, order=False)
+class EndpointMetrics:
+    """
+    This dataclass holds the metrics of one endpoint on one host.
+    """
+
+    # The number of requests per histogram bucket (the last one is +Inf)
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+
+    # The number of requests
+    count: int = 0
+
+    # The total duration of all requests in seconds
+    sum: float = 0.0
+
+    # The duration of the longest request in seconds
+    max: float = 0.0
+
+    # The total number of bytes received
+    bytes: int = 0
+
+    # The number of requests which failed (transport error or HTTP status 400 and above)
+    errors: int = 0
+
+    def observe(self, duration: float) -> None:
+        """
+        Count the duration of one request into the histogram.
+
+        Args:
+            duration: The duration of the request in seconds
+        """
+        index = next((i for i, bound in enumerate(BUCKETS) if duration <= bound), len(BUCKETS))
+        self.buckets[index] += 1
+        self.count += 1
+        self.sum += duration
+        self.max = max(self.max, duration)
+
+
+def quantile(buckets: List[int], q: float, maximum: float) -> float:
+    """
+    Estimate the quantile of the durations in a histogram with the nearest-rank method.
+
+    The estimate is the upper bound of the bucket which holds the nearest rank. It is never more
+    than the longest duration observed.
+
+    Args:
+        buckets: The number of durations per bucket (see BUCKETS, the last one is +Inf)
+        q:       The quantile to get (0 < q <= 1)
+        maximum: The longest duration observed
+
+    Returns:
+        The quantile or 0 if there are no durations
+    """
+    count = sum(buckets)
+    if not count:
+        return 0.0
+
+    rank = max(math.ceil(q * count), 1)
+    seen = 0
+    for bound, bucket in zip(BUCKETS, buckets):
+        seen += bucket
+        if seen >= rank:
+            return min(bound, maximum)
+
+    return maximum
+
+
+class Metrics:
+    """
+    Collect the metrics of the API requests by host and endpoint.
+
+    Use the global instance 'metrics' of this module. It is disabled by default, so requests are
+    only observed if the metrics are exported (see the command line option --metrics). It is safe
+    to observe requests from many threads at the same time.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        """
+        Create an empty metrics collection
+
+        Args:
+            enabled: Whether to observe the requests
+        """
+        self.enabled = enabled
+        self.endpoints: Dict[Tuple[str, str], EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    def observe(  # pylint: disable=too-many-arguments
+        self, host: str, endpoint: str, duration: float, size: int = 0, error: bool = False
+    ) -> None:
+        """
+        Observe one request. Nothing is recorded if the metrics are disabled.
+
+        Args:
+            host:     The hostname of the device
+            endpoint: The endpoint requested (e.g. the URL or the JSON-RPC URL)
+            duration: The duration of the request in seconds
+            size:     The number of bytes received
+            error:    Whether the request failed
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            endpoint_metrics = self.endpoints.setdefault((host, endpoint), EndpointMetrics())
+            endpoint_metrics.observe(duration)
+            endpoint_metrics.bytes += size
+            endpoint_metrics.errors += int(error)
+
+    def reset(self) -> None:
+        """
+        Remove all the metrics collected so far and disable the metrics
+        """
+        with self._lock:
+            self.enabled = False
+            self.endpoints = {}
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Summarize the metrics of every endpoint.
+
+        Returns:
+            One dict per host and endpoint with the number of requests, the errors, the bytes
+            received, the total and max of the durations, their estimated quantiles and the
+            histogram buckets (cumulative, by upper bound). The list is sorted by the total duration
+            (longest first).
+        """
+        with self._lock:
+            endpoints = [
+                (key, replace(value, buckets=list(value.buckets)))
+                for key, value in self.endpoints.items()
+            ]
+
+        summary = []
+        for (host, endpoint), endpoint_metrics in endpoints:
+            data: Dict[str, Any] = {
+                "host": host,
+                "endpoint": endpoint,
+                "count": endpoint_metrics.count,
+                "errors": endpoint_metrics.errors,
+                "bytes": endpoint_metrics.bytes,
+                "sum": endpoint_metrics.sum,
+                "max": endpoint_metrics.max,
+            }
+            for q in QUANTILES:
+                data[f"p{round(q * 100)}"] = quantile(
+                    endpoint_metrics.buckets, q, endpoint_metrics.max
+                )
+
+            cumulative = 0
+            data["buckets"] = {}
+            for bound, bucket in zip(BUCKETS + [math.inf], endpoint_metrics.buckets):
+                cumulative += bucket
+                data["buckets"][_bound(bound)] = cumulative
+
+            summary.append(data)
+
+        return sorted(summary, key=lambda _: float(_["sum"]), reverse=True)
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            The metrics as text to be read by the Prometheus node exporter textfile collector
+        """
+        summary = self.summary()
+        lines = [
+            "# HELP fotoobo_api_request_duration_seconds Duration of the API requests",
+            "# TYPE fotoobo_api_request_duration_seconds histogram",
+        ]
+        for data in summary:
+            labels = _labels(data["host"], data["endpoint"])
+            for bound, cumulative in data["buckets"].items():
+                lines.append(
+                    f'fotoobo_api_request_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                    f"{cumulative}"
+                )
+
+            lines.append(f"fotoobo_api_request_duration_seconds_sum{{{labels}}} {data['sum']}")
+            lines.append(f"fotoobo_api_request_duration_seconds_count{{{labels}}} {data['count']}")
+
+        for name, key, description in [
+            ("fotoobo_api_response_bytes_total", "bytes", "Bytes received from the API"),
+            ("fotoobo_api_request_errors_total", "errors", "Failed API requests"),
+        ]:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            for data in summary:
+                lines.append(f"{name}{{{_labels(data['host'], data['endpoint'])}}} {data[key]}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, metrics_file: Path) -> None:
+        """
+        Export the metrics to a file. Files with the suffix '.prom' are written in the Prometheus
+        text format, any other file is written as JSON. The file is replaced atomically so that a
+        collector never reads a partially written file.
+
+        Args:
+            metrics_file: The file to export the metrics to
+        """
+        temp_file = metrics_file.with_name(f".{metrics_file.name}.tmp")
+        if metrics_file.suffix == ".prom":
+            save_txt_file(temp_file, self.to_prometheus())
+
+        else:
+            save_json_file(temp_file, self.summary())
+
+        os.replace(temp_file, metrics_file)
+        log.debug("Exported metrics to '%s'", metrics_file)
+
+
+def _bound(bound: float) -> str:
+    """
+    Render the upper bound of a histogram bucket as in Prometheus.
+
+    Args:
+        bound: The upper bound in seconds
+
+    Returns:
+        The upper bound (e.g. "0.005", "1.0" or "+Inf")
+    """
+    return "+Inf" if math.isinf(bound) else str(bound)
+
+
+def _labels(host: str, endpoint: str) -> str:
+    """
+    Render the Prometheus labels for a host and endpoint.
+
+    Args:
+        host:     The hostname of the device
+        endpoint: The endpoint requested
+
+    Returns:
+        The labels (without the curly braces)
+    """
+
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return f'host="{escape(host)}",endpoint="{escape(endpoint)}"'
+
+
+metrics = Metrics()
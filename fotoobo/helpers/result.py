@@ -33,6 +33,8 @@ class Result(Generic[T]):
     It can then be rendered to some command line output (CLI) or JSON response (REST API).
     """
 
+    # pylint: disable=too-many-instance-attributes
+
     OUTPUT_FORMAT_MAPPING = {".json": "json", ".txt": "text"}
 
     def __init__(self) -> None:
@@ -45,6 +47,12 @@ class Result(Generic[T]):
         # The devices where the processing gave an error
         self.failed: List[str] = []
 
+        # The devices which have been skipped (e.g. because they are known to be unreachable)
+        self.skipped: List[str] = []
+
+        # The devices which ran out of time (e.g. because the deadline of the run has passed)
+        self.timed_out: List[str] = []
+
         # The total number of devices processed
         self.total: int = 0
 
@@ -59,7 +67,8 @@ class Result(Generic[T]):
 
     def push_result(self, key: str, data: T, successful: bool = True) -> None:
         """
-        Add a result for the given key
+        Add a result for the given key. Keys which have been skipped or timed out before are neither
+        counted as successful nor as failed.
 
         Args:
             key:        The key to push the results for
@@ -68,12 +77,42 @@ class Result(Generic[T]):
         """
         self.results[key] = data
 
+        if key in self.skipped or key in self.timed_out:
+            return
+
         if successful:
             self.successful.append(key)
 
         else:
             self.failed.append(key)
 
+    def push_skipped(self, key: str, message: str, level: str = "warning") -> None:
+        """
+        Mark the given key as skipped and add the reason as a message
+
+        Args:
+            key:     The key to mark as skipped
+            message: The reason why the key has been skipped
+            level:   The level of the message [default: warning]
+        """
+        if key not in self.skipped:
+            self.skipped.append(key)
+
+        self.push_message(key, message, level=level)
+
+    def push_timed_out(self, key: str, message: str) -> None:
+        """
+        Mark the given key as timed out and add the reason as a warning message
+
+        Args:
+            key:     The key to mark as timed out
+            message: The reason why the key has timed out
+        """
+        if key not in self.timed_out:
+            self.timed_out.append(key)
+
+        self.push_message(key, message, level="warning")
+
     def push_message(self, host: str, message: str, level: str = "info") -> None:
         """
         Add a message for the host
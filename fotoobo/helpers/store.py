@@ -0,0 +1,293 @@
+"""
+The store helper keeps the history of configuration backups in a content addressed archive.
+
+Every revision is identified by the SHA-256 hash of its content. Identical revisions are stored only
+once, even across devices. A new revision of a device is stored as a line based delta against the
+previous revision of the same device. To keep the retrieval of any revision fast, a full copy is
+stored again after a configurable number of deltas. All objects are compressed with zlib.
+
+The store is a directory with the following content:
+
+    index.sqlite             The index of all the revisions and objects
+    objects/<ab>/<abcd...>   The (compressed) objects named by their hash
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from difflib import SequenceMatcher
+from pathlib import Path
+from time import time
+from types import TracebackType
+from typing import Any, List, Optional, Tuple, Type, Union
+
+from fotoobo.exceptions import GeneralError
+
+log = logging.getLogger("fotoobo")
+
+# The object types (first byte of every object file)
+FULL = b"F"
+DELTA = b"D"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    hash TEXT PRIMARY KEY,
+    base TEXT,
+    depth INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    stored INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revisions (
+    device TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    hash TEXT NOT NULL REFERENCES objects (hash)
+);
+CREATE INDEX IF NOT EXISTS revisions_device ON revisions (device, timestamp);
+"""
+
+
+def make_delta(base: bytes, content: bytes) -> bytes:
+    """
+    Create a line based delta which turns base into content.
+
+    The delta is a JSON list where a list [start, end] copies the lines start to end from base and a
+    string inserts its text.
+
+    Args:
+        base:    The content to create the delta against
+        content: The content to encode
+
+    Returns:
+        The delta
+    """
+    base_lines = base.decode("UTF-8", "surrogateescape").splitlines(keepends=True)
+    lines = content.decode("UTF-8", "surrogateescape").splitlines(keepends=True)
+    operations: List[Union[List[int], str]] = []
+    for tag, base_start, base_end, start, end in SequenceMatcher(
+        None, base_lines, lines
+    ).get_opcodes():
+        if tag == "equal":
+            operations.append([base_start, base_end])
+
+        elif tag in ("replace", "insert"):
+            operations.append("".join(lines[start:end]))
+
+    return json.dumps(operations).encode()
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """
+    Apply a delta created with make_delta() to its base.
+
+    Args:
+        base:  The content the delta has been created against
+        delta: The delta
+
+    Returns:
+        The content
+    """
+    base_lines = base.decode("UTF-8", "surrogateescape").splitlines(keepends=True)
+    content = "".join(
+        "".join(base_lines[_[0] : _[1]]) if isinstance(_, list) else _ for _ in json.loads(delta)
+    )
+    return content.encode("UTF-8", "surrogateescape")
+
+
+class BackupStore:
+    """
+    A content addressed and delta compressed archive of configuration backups.
+
+    Use it as a context manager:
+
+        with BackupStore(Path("archive")) as store:
+            digest = store.add("fgt1", Path("fgt1.conf").read_bytes())
+            content = store.get(digest)
+    """
+
+    def __init__(self, directory: Path, max_depth: int = 30) -> None:
+        """
+        Open (or create) the store.
+
+        Args:
+            directory: The directory of the store
+            max_depth: The max number of deltas to apply to get a revision. If a new delta would
+                       exceed it, a full copy is stored instead.
+
+        Raises:
+            GeneralError: If the store cannot be opened
+        """
+        self.directory = directory
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        try:
+            (directory / "objects").mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(directory / "index.sqlite"), check_same_thread=False)
+            self._db.executescript(SCHEMA)
+
+        except (OSError, sqlite3.Error) as err:
+            raise GeneralError(f"Unable to open backup store '{directory}': {err}") from err
+
+    def __enter__(self) -> "BackupStore":
+        """Use the store as a context manager"""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the store"""
+        self.close()
+
+    def close(self) -> None:
+        """Close the index of the store"""
+        self._db.close()
+
+    def add(self, device: str, content: bytes, timestamp: Optional[float] = None) -> str:
+        """
+        Add a revision of a device to the store.
+
+        If the content is already in the store (from any device) only the revision is recorded.
+        Otherwise it is stored as a delta against the latest revision of the device.
+
+        Args:
+            device:    The name of the device
+            content:   The content of the revision (e.g. the configuration backup)
+            timestamp: The time of the revision (defaults to now)
+
+        Returns:
+            The hash of the revision
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock, self._db:
+            if not self._db.execute("SELECT 1 FROM objects WHERE hash = ?", (digest,)).fetchone():
+                self._add_object(device, digest, content)
+
+            self._db.execute(
+                "INSERT INTO revisions (device, timestamp, hash) VALUES (?, ?, ?)",
+                (device, time() if timestamp is None else timestamp, digest),
+            )
+
+        log.debug("Added revision '%s' of '%s' to the backup store", digest, device)
+        return digest
+
+    def _add_object(self, device: str, digest: str, content: bytes) -> None:
+        """
+        Store a new object as a delta against the latest revision of the device or as a full copy.
+
+        Args:
+            device:  The name of the device
+            digest:  The hash of the content
+            content: The content to store
+        """
+        base: Optional[str] = None
+        depth = 0
+        data = FULL + zlib.compress(content)
+        latest = self._db.execute(
+            "SELECT o.hash, o.depth FROM revisions r JOIN objects o ON r.hash = o.hash "
+            "WHERE r.device = ? ORDER BY r.timestamp DESC, r.rowid DESC LIMIT 1",
+            (device,),
+        ).fetchone()
+        if latest and latest[1] < self.max_depth:
+            delta = DELTA + zlib.compress(make_delta(self._get(latest[0]), content))
+            if len(delta) < len(data):
+                base, depth, data = latest[0], latest[1] + 1, delta
+
+        object_file = self._object_file(digest)
+        object_file.parent.mkdir(exist_ok=True)
+        temp_file = object_file.with_suffix(".tmp")
+        temp_file.write_bytes(data)
+        os.replace(temp_file, object_file)
+        self._db.execute(
+            "INSERT INTO objects (hash, base, depth, size, stored) VALUES (?, ?, ?, ?, ?)",
+            (digest, base, depth, len(content), len(data)),
+        )
+
+    def get(self, digest: str) -> bytes:
+        """
+        Get the content of a revision.
+
+        Args:
+            digest: The hash of the revision
+
+        Returns:
+            The content of the revision
+
+        Raises:
+            GeneralError: If the revision is not in the store or it is corrupt
+        """
+        with self._lock:
+            return self._get(digest)
+
+    def _get(self, digest: str) -> bytes:
+        """
+        Get the content of an object by applying its chain of deltas to the full copy.
+
+        Args:
+            digest: The hash of the object
+
+        Returns:
+            The content of the object
+        """
+        chain: List[bytes] = []
+        current: Optional[str] = digest
+        while current:
+            row = self._db.execute("SELECT base FROM objects WHERE hash = ?", (current,)).fetchone()
+            if not row:
+                raise GeneralError(f"Revision '{current}' not found in the backup store")
+
+            try:
+                data = self._object_file(current).read_bytes()
+
+            except OSError as err:
+                raise GeneralError(f"Unable to read revision '{current}': {err}") from err
+
+            chain.append(data)
+            current = row[0]
+
+        content = b""
+        for data in reversed(chain):
+            payload = zlib.decompress(data[1:])
+            content = apply_delta(content, payload) if data[:1] == DELTA else payload
+
+        if hashlib.sha256(content).hexdigest() != digest:
+            raise GeneralError(f"Revision '{digest}' in the backup store is corrupt")
+
+        return content
+
+    def revisions(self, device: str) -> List[Tuple[float, str, int]]:
+        """
+        Get all the revisions of a device.
+
+        Args:
+            device: The name of the device
+
+        Returns:
+            The timestamp, the hash and the size of every revision (the oldest first)
+        """
+        with self._lock:
+            rows: List[Any] = self._db.execute(
+                "SELECT r.timestamp, r.hash, o.size FROM revisions r "
+                "JOIN objects o ON r.hash = o.hash WHERE r.device = ? "
+                "ORDER BY r.timestamp, r.rowid",
+                (device,),
+            ).fetchall()
+
+        return [(float(_[0]), str(_[1]), int(_[2])) for _ in rows]
+
+    def _object_file(self, digest: str) -> Path:
+        """
+        Get the file of an object.
+
+        Args:
+            digest: The hash of the object
+
+        Returns:
+            The path of the object file
+        """
+        return self.directory / "objects" / digest[:2] / digest
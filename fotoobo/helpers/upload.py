@@ -0,0 +1,216 @@
+"""
+The upload helper uploads files to a ftp server in the background.
+
+The uploads run in a small pool of worker threads which reuse their logged in ftp connections. So
+they can run while other work (e.g. downloading backups) is still going on. Files may be compressed
+on the fly while they are uploaded. Failed transfers are retried with an exponential backoff.
+"""
+
+import ftplib
+import logging
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from time import sleep
+from typing import Any, Dict, Iterator, Optional, Union
+
+from fotoobo.exceptions import GeneralError
+from fotoobo.helpers.files import ftp_connect, ftp_store
+
+log = logging.getLogger("fotoobo")
+
+
+class FtpPool:
+    """
+    A pool of logged in connections to one ftp server.
+
+    A connection is only given back to the pool if it has been used without an error. An idle
+    connection is checked with a NOOP before it is reused.
+    """
+
+    def __init__(self, server: Any) -> None:
+        """
+        Create the (empty) pool.
+
+        Args:
+            server: The ftp server definition (see file_to_ftp())
+        """
+        self.server = server
+        self._idle: "queue.LifoQueue[ftplib.FTP]" = queue.LifoQueue()
+
+    @contextmanager
+    def connection(self) -> Iterator[ftplib.FTP]:
+        """
+        Get a connection from the pool (or open a new one) and give it back when done.
+
+        Yields:
+            The ftp connection
+        """
+        ftp = self._get()
+        try:
+            yield ftp
+
+        except BaseException:
+            ftp.close()
+            raise
+
+        self._idle.put(ftp)
+
+    def _get(self) -> ftplib.FTP:
+        """
+        Get an idle connection which is still alive or open a new one.
+
+        Returns:
+            The ftp connection
+        """
+        while True:
+            try:
+                ftp = self._idle.get_nowait()
+
+            except queue.Empty:
+                return ftp_connect(self.server)
+
+            try:
+                ftp.voidcmd("NOOP")
+                return ftp
+
+            except ftplib.all_errors:
+                ftp.close()
+
+    def close(self) -> None:
+        """Log out and close all the idle connections"""
+        while True:
+            try:
+                ftp = self._idle.get_nowait()
+
+            except queue.Empty:
+                return
+
+            try:
+                ftp.quit()
+
+            except ftplib.all_errors:
+                ftp.close()
+
+
+class Uploader:
+    """
+    Upload files to a ftp server in the background.
+
+    Submit the files to upload with submit(). Use wait() to get the outcome of all the uploads.
+    The number of parallel uploads and the number of retries may be set in the ftp server
+    definition of the inventory with 'connections' (default: 2) and 'retries' (default: 2).
+    """
+
+    def __init__(
+        self,
+        server: Any,
+        connections: Optional[int] = None,
+        retries: Optional[int] = None,
+        backoff: float = 1.0,
+    ) -> None:
+        """
+        Create the uploader.
+
+        Args:
+            server:      The ftp server definition (see file_to_ftp())
+            connections: The max number of parallel uploads (and connections)
+            retries:     The number of times a failed upload is retried
+            backoff:     The delay in seconds before the first retry (doubles with every retry)
+        """
+        self.server = server
+        self.connections = connections or int(getattr(server, "connections", 2))
+        self.retries = retries if retries is not None else int(getattr(server, "retries", 2))
+        self.backoff = backoff
+        self.pool = FtpPool(server)
+        self._executor = ThreadPoolExecutor(self.connections, thread_name_prefix="fotoobo-upload")
+        self._futures: Dict[str, "Future[int]"] = {}
+
+    def __enter__(self) -> "Uploader":
+        """Use the uploader as a context manager"""
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        """Wait for the uploads and close the connections"""
+        self.close()
+
+    def submit(
+        self,
+        name: str,
+        file: Path,
+        remote_name: Optional[str] = None,
+        compression: Optional[str] = None,
+    ) -> None:
+        """
+        Add a file to the uploads.
+
+        Args:
+            name:        The name to report the outcome of the upload with (e.g. the device name)
+            file:        The file to upload
+            remote_name: The name of the file on the server (defaults to the name of the file)
+            compression: Compress the file on the fly while it is uploaded (zip, gzip or zstd,
+                         see CompressedStream). No temporary file is written.
+        """
+        log.debug("Queueing upload of '%s' to '%s'", file, self.server.hostname)
+        self._futures[name] = self._executor.submit(
+            self._upload, file, remote_name or file.name, compression
+        )
+
+    def _upload(self, file: Path, remote_name: str, compression: Optional[str]) -> int:
+        """
+        Upload one file and retry it on failure.
+
+        Args:
+            file:        The file to upload
+            remote_name: The name of the file on the server
+            compression: The compression to use while uploading
+
+        Returns:
+            The return code of the upload (see file_to_ftp())
+
+        Raises:
+            GeneralError: If the upload failed after all retries
+        """
+        try:
+            retry = 0
+            while True:
+                try:
+                    with self.pool.connection() as ftp:
+                        return ftp_store(ftp, file, remote_name, compression)
+
+                except ftplib.all_errors as err:
+                    if retry >= self.retries:
+                        raise GeneralError(
+                            f"Upload of '{remote_name}' to '{self.server.hostname}' failed: {err}"
+                        ) from err
+
+                    delay = self.backoff * 2**retry
+                    log.warning("Upload of '%s' failed (%s), retry in %ss", remote_name, err, delay)
+                    sleep(delay)
+                    retry += 1
+
+        except OSError as err:
+            raise GeneralError(f"Upload of '{remote_name}' failed: {err}") from err
+
+    def wait(self) -> Dict[str, Union[int, GeneralError]]:
+        """
+        Wait until all the submitted uploads are done.
+
+        Returns:
+            The return code or the error of every upload by name
+        """
+        outcome: Dict[str, Union[int, GeneralError]] = {}
+        for name, future in self._futures.items():
+            try:
+                outcome[name] = future.result()
+
+            except GeneralError as err:
+                outcome[name] = err
+
+        return outcome
+
+    def close(self) -> None:
+        """Wait for the running uploads and close all the connections"""
+        self._executor.shutdown(wait=True)
+        self.pool.close()
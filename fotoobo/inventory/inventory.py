@@ -5,13 +5,14 @@ Devices class for storing device information
 import logging
 import re
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, ClassVar, Dict, Optional, Tuple
 
-from fotoobo.exceptions import GeneralWarning
+from fotoobo.exceptions import APIError, GeneralError, GeneralWarning
 from fotoobo.fortinet.fortianalyzer import FortiAnalyzer
 from fotoobo.fortinet.forticlientems import FortiClientEMS
 from fotoobo.fortinet.fortigate import FortiGate
 from fotoobo.fortinet.fortimanager import FortiManager
+from fotoobo.fortinet.fortinet import Fortinet
 from fotoobo.helpers.config import config
 from fotoobo.helpers.files import load_yaml_file
 from fotoobo.helpers.vault import Client
@@ -26,8 +27,16 @@ class Inventory:
     Represents an inventory full of Fortinet and generic devices. Instantiate the inventory by
     providing an inventory file in yaml format as described in the documentation at
     https://fotoobo.readthedocs.io/en/latest/usage/inventory.html
+
+    If keep_alive is set (as done by the fotoobo daemon) the assets of an inventory file are loaded
+    only once and shared by all the inventories of this file until the file changes. So the device
+    objects with their sessions and session keys are reused. The sessions of the assets which are
+    replaced (or released when the daemon stops) are logged out.
     """
 
+    keep_alive: ClassVar[bool] = False
+    _shared_assets: ClassVar[Dict[Path, Tuple[float, Dict[str, Any]]]] = {}
+
     def __init__(self, inventory_file: Path) -> None:
         """Initialize the inventory
 
@@ -45,13 +54,16 @@ class Inventory:
         self.assets: Dict[str, Any] = {}
         self.vault_data: Dict[str, Dict[str, str]] = {}
 
-        # Load assets from inventory file
-        self._load_inventory()
+        if not self._load_shared_assets():
+            # Load assets from inventory file
+            self._load_inventory()
 
-        # Load credentials from a configured Hashicorp vault and enrich assets
-        if config.vault:
-            self._load_data_from_vault(config.vault)
-            self._replace_with_vault_data()
+            # Load credentials from a configured Hashicorp vault and enrich assets
+            if config.vault:
+                self._load_data_from_vault(config.vault)
+                self._replace_with_vault_data()
+
+            self._share_assets()
 
         # Create object for FortiGates
         self.fortigates = {
@@ -194,6 +206,82 @@ class Inventory:
                 self.assets[name] = GenericDevice(**asset)
     """
 
+    def _load_shared_assets(self) -> bool:
+        """
+        Take the shared assets of the inventory file (if keep_alive is set)
+
+        Returns:
+            True if the shared assets are still valid and have been taken
+        """
+        if not self.keep_alive:
+            return False
+
+        try:
+            inventory_file = self._inventory_file.expanduser().resolve()
+            mtime = inventory_file.stat().st_mtime
+
+        except OSError:
+            return False
+
+        shared = self._shared_assets.get(inventory_file)
+        if not shared or shared[0] != mtime:
+            return False
+
+        log.debug("Reusing the assets loaded from '%s'", inventory_file)
+        self.assets = shared[1]
+        return True
+
+    def _share_assets(self) -> None:
+        """Share the assets and keep their sessions alive (if keep_alive is set)"""
+        if not self.keep_alive:
+            return
+
+        try:
+            inventory_file = self._inventory_file.expanduser().resolve()
+            mtime = inventory_file.stat().st_mtime
+
+        except OSError:
+            return
+
+        for asset in self.assets.values():
+            if isinstance(asset, Fortinet):
+                asset.keep_alive = True
+
+        if replaced := self._shared_assets.get(inventory_file):
+            self._release_assets(replaced[1])
+
+        self._shared_assets[inventory_file] = (mtime, self.assets)
+
+    @classmethod
+    def release_shared_assets(cls) -> None:
+        """Log out from all the shared assets and forget them (e.g. when the daemon stops)"""
+        for _, assets in cls._shared_assets.values():
+            cls._release_assets(assets)
+
+        cls._shared_assets.clear()
+
+    @staticmethod
+    def _release_assets(assets: Dict[str, Any]) -> None:
+        """
+        Stop keeping the sessions of shared assets alive and log out from the FortiManagers which
+        do not save their session key.
+
+        Args:
+            assets: The shared assets to release
+        """
+        for name, asset in assets.items():
+            if not isinstance(asset, Fortinet):
+                continue
+
+            asset.keep_alive = False
+            if isinstance(asset, FortiManager) and asset.session_key and not asset.session_path:
+                log.debug("Logging out from released asset '%s'", name)
+                try:
+                    asset.logout()
+
+                except (APIError, GeneralError) as err:
+                    log.warning("Unable to log out from '%s': %s", name, err.message)
+
     def _load_data_from_vault(self, vault_dict: Dict[str, Any]) -> None:
         """Load the credentials from a vault
 
@@ -2,7 +2,8 @@
 This is the main project entry point.
 
 When invoking fotoobo it starts the main() function in this file. Its main purpose is to start the
-typer cli with app().
+typer cli with app(). If a fotoobo daemon is running the command is forwarded to it instead (see
+'fotoobo daemon').
 The second task is to catch all exceptions and print a friendly message on the screen instead of
 a traceback. The traceback is written to a traceback.log file in the local directory for debug
 purposes.
@@ -12,32 +13,40 @@ exits with its own exit codes (1 or 2) when an exception rises.
 """
 
 import sys
-import traceback
+from typing import List, Optional
 
-from fotoobo.cli.main import app
-from fotoobo.exceptions import APIError, GeneralError, GeneralWarning
+from fotoobo.helpers.daemon import forward
+
+
+def run(args: Optional[List[str]] = None) -> int:
+    """
+    Run the typer cli and translate its exceptions into the fotoobo exit codes.
+
+    Args:
+        args: The command line arguments (defaults to sys.argv)
+
+    Returns:
+        The exit code
+    """
+    # The cli is imported here so that forwarding a command to the daemon does not need to import
+    # it at all
+    # pylint: disable=import-outside-toplevel
+    from fotoobo.cli.main import app
+    from fotoobo.helpers.cli import run_app
+
+    return run_app(app, args)
 
 
 def main() -> None:
     """
     This is the main function
     """
-    try:
-        app()
-
-    except GeneralWarning as warn:  # pragma: no cover
-        print(f"Warning: {warn.message}")
-        sys.exit(30)
-
-    except (GeneralError, APIError) as err:  # pragma: no cover
-        print(f"Error: {err.message}")
-        sys.exit(40)
-
-    except Exception:  # pylint: disable=broad-except # pragma: no cover
-        print("oops, something did not work as expected. See traceback.log for more info")
-        with open("traceback.log", "w", encoding="UTF-8") as exc_file:
-            traceback.print_exc(file=exc_file)
-        sys.exit(50)
+    if forwarded := forward(sys.argv[1:]):  # pragma: no cover
+        exit_code, output = forwarded
+        sys.stdout.write(output)
+        sys.exit(exit_code)
+
+    sys.exit(run())
 
 
 if __name__ == "__main__":  # pragma: no cover
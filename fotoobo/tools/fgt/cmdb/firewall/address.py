@@ -1,62 +1,44 @@
 """FortiGate CMDB firewall address module"""
 
-from pathlib import Path
 from typing import Any, Dict, List
 
-from fotoobo.fortinet.fortigate import FortiGate
-from fotoobo.helpers.config import config
 from fotoobo.helpers.result import Result
-from fotoobo.inventory import Inventory
+from fotoobo.tools.fgt.cmdb.objects import get_cmdb_objects
 
 
-def get_cmdb_firewall_address(
-    host: str, name: str, vdom: str, output_file: str
-) -> Result[List[Any]]:
-    """Get the firewall address object(s)
-
-    The FortiGate api endpoint is: /cmdb/firewall/address
-    """
-    inventory = Inventory(config.inventory_file)
-    fgt: FortiGate = inventory.get_item(host, "fortigate")
-    result = Result[List[Any]]()
-
-    address_list = fgt.api_get(url=f"/cmdb/firewall/address/{name}", vdom=vdom)
-    result.push_result(key=host, data=address_list)
+def _normalize(vdom: str, asset: Dict[str, Any]) -> Dict[str, str]:
+    """Turn a firewall address object into a row"""
+    data: Dict[str, str] = {
+        "name": asset["name"],
+        "vdom": vdom,
+        "type": asset["type"],
+    }
 
-    if output_file:
-        result.push_result(key=host, data=address_list)
-        result.save_raw(file=Path(output_file), key=host)
+    if asset["type"] == "fqdn":
+        data["content"] = asset["fqdn"]
 
-    assets = []
-    if address_list:
-        for vd in address_list:
-            for asset in vd["results"]:
+    elif asset["type"] == "geography":
+        data["content"] = asset["country"]
 
-                data: Dict[str, str] = {
-                    "name": asset["name"],
-                    "vdom": vd["vdom"],
-                    "type": asset["type"],
-                }
+    elif asset["type"] == "ipmask":
+        data["content"] = "/".join([asset["subnet"].split(" ")[0], asset["subnet"].split(" ")[1]])
 
-                if asset["type"] == "fqdn":
-                    data["content"] = asset["fqdn"]
+    elif asset["type"] == "iprange":
+        data["content"] = " - ".join([asset["start-ip"], asset["end-ip"]])
 
-                elif asset["type"] == "geography":
-                    data["content"] = asset["country"]
+    else:
+        data["content"] = ""
 
-                elif asset["type"] == "ipmask":
-                    data["content"] = "/".join(
-                        [asset["subnet"].split(" ")[0], asset["subnet"].split(" ")[1]]
-                    )
+    return data
 
-                elif asset["type"] == "iprange":
-                    data["content"] = " - ".join([asset["start-ip"], asset["end-ip"]])
 
-                else:
-                    data["content"] = ""
-
-                assets.append(data)
+def get_cmdb_firewall_address(
+    host: str, name: str, vdom: str, output_file: str
+) -> Result[List[Any]]:
+    """Get the firewall address object(s)
 
-    result.push_result(host, assets)
+    The FortiGate api endpoint is: /cmdb/firewall/address
 
-    return result
+    See get_cmdb_objects() for the supported host patterns and output files.
+    """
+    return get_cmdb_objects(host, f"/cmdb/firewall/address/{name}", vdom, output_file, _normalize)
@@ -1,60 +1,47 @@
 """FortiGate CMDB firewall service custom module"""
 
-from pathlib import Path
 from typing import Any, Dict, List
 
-from fotoobo.fortinet.fortigate import FortiGate
-from fotoobo.helpers.config import config
 from fotoobo.helpers.result import Result
-from fotoobo.inventory import Inventory
+from fotoobo.tools.fgt.cmdb.objects import get_cmdb_objects
 
 
-def get_cmdb_firewall_service_custom(
-    host: str, name: str, vdom: str, output_file: str
-) -> Result[List[Any]]:
-    """Get the firewall service custom object(s)
-
-    The FortiGate api endpoint is: /cmdb/firewall.service/custom
-    """
-    inventory = Inventory(config.inventory_file)
-    fgt: FortiGate = inventory.get_item(host, "fortigate")
-    result = Result[List[Any]]()
-
-    service_custom_list = fgt.api_get(url=f"/cmdb/firewall.service/custom/{name}", vdom=vdom)
+def _normalize(vdom: str, asset: Dict[str, Any]) -> Dict[str, str]:
+    """Turn a firewall service custom object into a row"""
+    data: Dict[str, str] = {
+        "name": asset["name"],
+        "vdom": vdom,
+        "protocol": asset["protocol"],
+    }
 
-    if output_file:
-        result.push_result(key=host, data=service_custom_list)
-        result.save_raw(file=Path(output_file), key=host)
+    if asset["protocol"] == "TCP/UDP/SCTP":
+        data["data_1"] = asset.get("tcp-portrange", "")
+        data["data_2"] = asset.get("udp-portrange", "")
 
-    assets = []
-    if service_custom_list:
-        for vd in service_custom_list:
-            for asset in vd["results"]:
+    elif asset["protocol"] in ["ICMP", "ICMP6"]:
+        data["data_1"] = asset.get("icmptype", "")
+        data["data_2"] = asset.get("icmpcode", "")
 
-                data: Dict[str, str] = {
-                    "name": asset["name"],
-                    "vdom": vd["vdom"],
-                    "protocol": asset["protocol"],
-                }
+    elif asset["protocol"] == "IP":
+        data["data_1"] = asset.get("protocol-number", "")
+        data["data_2"] = ""
 
-                if asset["protocol"] == "TCP/UDP/SCTP":
-                    data["data_1"] = asset.get("tcp-portrange", "")
-                    data["data_2"] = asset.get("udp-portrange", "")
+    else:
+        data["data_1"] = ""
+        data["data_2"] = ""
 
-                elif asset["protocol"] in ["ICMP", "ICMP6"]:
-                    data["data_1"] = asset.get("icmptype", "")
-                    data["data_2"] = asset.get("icmpcode", "")
+    return data
 
-                elif asset["protocol"] == "IP":
-                    data["data_1"] = asset.get("protocol-number", "")
-                    data["data_2"] = ""
 
-                else:
-                    data["data_1"] = ""
-                    data["data_2"] = ""
-
-                assets.append(data)
+def get_cmdb_firewall_service_custom(
+    host: str, name: str, vdom: str, output_file: str
+) -> Result[List[Any]]:
+    """Get the firewall service custom object(s)
 
-    result.push_result(host, assets)
+    The FortiGate api endpoint is: /cmdb/firewall.service/custom
 
-    return result
+    See get_cmdb_objects() for the supported host patterns and output files.
+    """
+    return get_cmdb_objects(
+        host, f"/cmdb/firewall.service/custom/{name}", vdom, output_file, _normalize
+    )
@@ -1,12 +1,18 @@
 """FortiGate CMDB firewall service group module"""
 
-from pathlib import Path
 from typing import Any, Dict, List
 
-from fotoobo.fortinet.fortigate import FortiGate
-from fotoobo.helpers.config import config
 from fotoobo.helpers.result import Result
-from fotoobo.inventory import Inventory
+from fotoobo.tools.fgt.cmdb.objects import get_cmdb_objects
+
+
+def _normalize(vdom: str, asset: Dict[str, Any]) -> Dict[str, str]:
+    """Turn a firewall service group object into a row"""
+    return {
+        "name": asset["name"],
+        "vdom": vdom,
+        "content": "\n".join(_["name"] for _ in asset["member"]),
+    }
 
 
 def get_cmdb_firewall_service_group(
@@ -15,29 +21,7 @@ def get_cmdb_firewall_service_group(
     """Get the firewall service group object(s)
 
     The FortiGate api endpoint is: /cmdb/firewall.service/group
-    """
-    inventory = Inventory(config.inventory_file)
-    fgt: FortiGate = inventory.get_item(host, "fortigate")
-    result = Result[List[Any]]()
-
-    service_group_list = fgt.api_get(url=f"/cmdb/firewall/addrgrp/{name}", vdom=vdom)
-
-    if output_file:
-        result.push_result(key=host, data=service_group_list)
-        result.save_raw(file=Path(output_file), key=host)
 
-    assets = []
-    if service_group_list:
-        for vd in service_group_list:
-            for asset in vd["results"]:
-                data: Dict[str, str] = {
-                    "name": asset["name"],
-                    "vdom": vd["vdom"],
-                    "content": "\n".join(_["name"] for _ in asset["member"]),
-                }
-
-                assets.append(data)
-
-    result.push_result(host, assets)
-
-    return result
+    See get_cmdb_objects() for the supported host patterns and output files.
+    """
+    return get_cmdb_objects(host, f"/cmdb/firewall/addrgrp/{name}", vdom, output_file, _normalize)
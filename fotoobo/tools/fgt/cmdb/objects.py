@@ -0,0 +1,134 @@
+"""FortiGate CMDB objects module"""
+
+import logging
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from fotoobo.exceptions import APIError, CircuitOpenError, GeneralError, GeneralWarning
+from fotoobo.fortinet.fortigate import FortiGate
+from fotoobo.helpers.config import config
+from fotoobo.helpers.fanout import FanOut
+from fotoobo.helpers.files import RowWriter
+from fotoobo.helpers.result import Result
+from fotoobo.inventory import Inventory
+
+log = logging.getLogger("fotoobo")
+
+
+def get_cmdb_objects(  # pylint: disable=too-many-locals
+    host: str,
+    url: str,
+    vdom: str,
+    output_file: str,
+    normalize: Callable[[str, Dict[str, Any]], Dict[str, str]],
+) -> Result[List[Any]]:
+    """Get CMDB objects from one or many FortiGates and normalize them into rows.
+
+    The FortiGates are queried concurrently with the fan-out helper and every CMDB table is read
+    page by page. If the output file is a CSV ('.csv') or JSON Lines ('.jsonl') file, the rows of
+    every FortiGate are written into it as soon as the FortiGate has completed. The rows then get
+    the name of the FortiGate in the column 'fortigate' and they are not kept in the result. With
+    any other output file the raw responses are saved into it.
+
+    If one single FortiGate is requested by its name (without wildcard) and it fails, the error is
+    raised instead of returned in the result.
+
+    Args:
+        host:        The FortiGate(s) from the inventory to query. Wildcard * is supported in any
+                     position. If blank all the FortiGates in the inventory are queried.
+        url:         The CMDB endpoint to query
+        vdom:        The VDOM to query ("vdom1" or "vdom1,vdom2" or "*")
+        output_file: The file to write the objects to (optional)
+        normalize:   The function which turns one object into a row (gets the VDOM and the object)
+
+    Returns:
+        The Result object with the rows per FortiGate
+
+    Raises:
+        APIError:       The single FortiGate requested returned an HTTP error
+        GeneralError:   The single FortiGate requested failed or did not complete in time
+        GeneralWarning: The single FortiGate requested returned a warning
+    """
+    inventory = Inventory(config.inventory_file)
+    fgts = inventory.get(host, "fortigate")
+    result = Result[List[Any]]()
+    writer: Optional[RowWriter] = None
+    if output_file and Path(output_file).suffix in RowWriter.FORMATS:
+        writer = RowWriter(Path(output_file))
+
+    raw: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, Exception] = {}
+
+    def _get_single_objects(name: str, fgt: FortiGate) -> Optional[List[Dict[str, str]]]:
+        """Get the CMDB objects from a single FortiGate.
+
+        This private method is used for the fan-out.
+
+        Args:
+            name: The name of the FortiGate (as defined in the inventory)
+            fgt:  The FortiGate object to query
+
+        Returns:
+            The rows of the FortiGate or None if the query failed
+        """
+        log.debug("Getting '%s' from FortiGate '%s'", url, name)
+        raw_vdoms: Dict[str, Dict[str, Any]] = {}
+        rows = []
+        try:
+            for vd in fgt.api_get_paged(url=url, vdom=vdom):
+                if output_file and not writer:
+                    raw_vdoms.setdefault(vd["vdom"], {**vd, "results": []})["results"].extend(
+                        vd["results"]
+                    )
+
+                rows += [normalize(vd["vdom"], asset) for asset in vd["results"]]
+
+        except CircuitOpenError as err:
+            errors[name] = err
+            result.push_skipped(name, err.message)
+            return None
+
+        except (GeneralWarning, GeneralError) as err:
+            errors[name] = err
+            result.push_message(name, err.message, level="error")
+            return None
+
+        except APIError as err:
+            errors[name] = err
+            result.push_message(name, f"{name} returned {err.message}", level="error")
+            return None
+
+        raw[name] = list(raw_vdoms.values())
+        return rows
+
+    def _push_result(name: str, rows: Optional[List[Dict[str, str]]]) -> None:
+        """Push the rows to the results or write them into the output file"""
+        if rows is not None and writer:
+            writer.write({"fortigate": name, **row} for row in rows)
+            result.push_message(name, f"{len(rows)} objects written to '{output_file}'")
+            rows = []
+
+        result.push_result(name, rows or [], successful=rows is not None)
+
+    fan_out = FanOut[Optional[List[Dict[str, str]]]]("Getting FortiGate CMDB objects...")
+    with writer or nullcontext():
+        fan_out.run(
+            _get_single_objects, fgts, on_result=_push_result, on_timeout=result.push_timed_out
+        )
+
+    if host and "*" not in host:
+        if host in errors:
+            raise errors[host]
+
+        if host in fan_out.timed_out:
+            raise GeneralError(f"Deadline exceeded ({host})")
+
+    if output_file and not writer:
+        raw_result = Result[List[Any]]()
+        for name, data in raw.items():
+            raw_result.push_result(name, data)
+
+        raw_result.save_raw(file=Path(output_file), key=host if host in raw else None)
+
+    return result
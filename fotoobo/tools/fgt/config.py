@@ -3,12 +3,14 @@ FortiGate configuration check utility
 """
 
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 
 import typer
 
 from fotoobo.exceptions import GeneralError, GeneralWarning
+from fotoobo.fortinet.config_cache import ConfigCache, get_config_cache
 from fotoobo.fortinet.fortigate_config import FortiGateConfig
 from fotoobo.fortinet.fortigate_config_check import FortiGateConfigCheck
 from fotoobo.fortinet.fortigate_info import FortiGateInfo
@@ -18,15 +20,157 @@ from fotoobo.helpers.result import Result
 app = typer.Typer(no_args_is_help=True, rich_markup_mode="rich")
 log = logging.getLogger("fotoobo")
 
+T = TypeVar("T")
 
-def check(config: Path, bundles: Path) -> Result[List[str]]:
+# The config cache of a worker process (see _init_worker())
+_worker_cache: Optional[ConfigCache] = None
+
+
+def _init_worker(cache_dir: Optional[Path]) -> None:
+    """
+    Initialize a worker process of the process pool.
+
+    Args:
+        cache_dir: The directory of the config cache (None = no cache)
+    """
+    global _worker_cache  # pylint: disable=global-statement
+    _worker_cache = ConfigCache(cache_dir)
+
+
+def _run_in_worker(
+    func: Callable[..., T], file: Path, args: Tuple[Any, ...]
+) -> Tuple[T, Dict[str, Any]]:
+    """
+    Run a task for one configuration file in a worker process.
+
+    Args:
+        func: The task to run (see _map_files())
+        file: The configuration file
+        args: Additional arguments for the task
+
+    Returns:
+        The result of the task and the changes of the config cache of the worker
+    """
+    cache = _worker_cache or ConfigCache(None)
+    partial = func(cache, file, *args)
+    return partial, cache.pop_changes()
+
+
+def _map_files(func: Callable[..., T], files: List[Path], jobs: int, *args: Any) -> List[T]:
+    """
+    Run a task for every configuration file, in a pool of worker processes if jobs > 1.
+
+    The task is called with the config cache, the file and args. It has to be a module level
+    function and its result has to be picklable to be run in a worker process. The results are
+    returned in the order of the files no matter in which order the workers complete them. The
+    changes the workers made to the config cache are merged and saved in this process.
+
+    Args:
+        func:  The task to run
+        files: The configuration files
+        jobs:  The number of worker processes
+        args:  Additional arguments for the task
+
+    Returns:
+        The results of the task in the order of the files
+    """
+    with get_config_cache() as cache:
+        if jobs <= 1 or len(files) <= 1:
+            return [func(cache, file, *args) for file in files]
+
+        log.debug("Processing %s configuration files with %s jobs", len(files), jobs)
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(files)), initializer=_init_worker, initargs=(cache.cache_dir,)
+        ) as executor:
+            results: List[T] = []
+            for partial, changes in executor.map(
+                _run_in_worker,
+                [func] * len(files),
+                files,
+                [args] * len(files),
+                chunksize=max(len(files) // (jobs * 4), 1),
+            ):
+                results.append(partial)
+                cache.merge(changes)
+
+        return results
+
+
+def _check_file(
+    cache: ConfigCache, file: Path, checks: Any, paths: List[str]
+) -> Tuple[Optional[str], List[Dict[str, str]]]:
+    """
+    Check one configuration file.
+
+    Args:
+        cache:  The config cache to get the parsed configuration from
+        file:   The configuration file
+        checks: The checks to execute
+        paths:  The configuration paths the checks need
+
+    Returns:
+        The hostname and the messages of the checks (or no hostname and the warning why the file
+        could not be checked)
+    """
+    try:
+        fortigate_config = cache.parse(file, paths)
+        result = Result[List[str]]()
+        FortiGateConfigCheck(fortigate_config, checks, result).execute_checks()
+
+    except GeneralWarning as warn:
+        return None, [{"message": warn.message, "level": "warning"}]
+
+    return fortigate_config.info.hostname, result.get_messages(fortigate_config.info.hostname)
+
+
+def _get_file(cache: ConfigCache, file: Path, scope: str, path: str) -> Tuple[str, Any]:
+    """
+    Get the configuration of one configuration file.
+
+    Args:
+        cache: The config cache to get the parsed configuration from
+        file:  The configuration file
+        scope: The configuration scope (global|vdom)
+        path:  The configuration path
+
+    Returns:
+        The hostname and the configuration
+    """
+    conf = cache.parse(file)
+    return conf.info.hostname, conf.get_configuration(scope, path)
+
+
+def _info_file(_: ConfigCache, file: Path) -> Tuple[str, FortiGateInfo]:
+    """
+    Get the information of one configuration file.
+
+    Only the header and the hostname are read from the file (which is faster than loading the
+    parsed configuration from the config cache), so the config cache is not used.
+
+    Args:
+        _:    The config cache (not used)
+        file: The configuration file
+
+    Returns:
+        The hostname and the information
+    """
+    fortigate_info = FortiGateConfig.parse_configuration_info(file)
+    return fortigate_info.hostname, fortigate_info
+
+
+def check(config: Path, bundles: Path, jobs: int = 1) -> Result[List[str]]:
     """
     The FortiGate configuration check
 
+    Only the parts of the configurations the checks need (their 'path' and 'filter-config') are
+    parsed. The parsed configurations are taken from the config cache if it is configured. With
+    more than one job the files are parsed and checked in a pool of worker processes.
+
     Args:
         config:  The configuration to check (either a file or directory)
                  in case it's a directory all .conf files in it will be checked.
         bundles: The check bundle to check the configuration against
+        jobs:    The number of configuration files to process at the same time
 
     Raises:
         GeneralWarning: GeneralWarning
@@ -40,7 +184,7 @@ def check(config: Path, bundles: Path) -> Result[List[str]]:
 
     elif config.is_dir():
         log.debug("Given config is a directory")
-        files = [file for file in config.iterdir() if file.suffix == ".conf"]
+        files = sorted(file for file in config.iterdir() if file.suffix == ".conf")
 
     else:
         log.error("No valid configuration file")
@@ -57,21 +201,25 @@ def check(config: Path, bundles: Path) -> Result[List[str]]:
         log.error("No valid bundle file")
         raise GeneralError("No valid bundle file")
 
+    if not checks:
+        log.error("There are no checks defined")
+        raise GeneralError("There are no checks defined")
+
     total_results: int = 0
     result = Result[List[str]]()
 
-    for file in files:
-        try:
-            fortigate_config = FortiGateConfig.parse_configuration_file(file)
-            conf_check = FortiGateConfigCheck(fortigate_config, checks, result)
-
-        except GeneralWarning as warn:
-            log.warning(warn.message)
+    paths = FortiGateConfigCheck.get_paths(checks)
+    for file, (hostname, messages) in zip(
+        files, _map_files(_check_file, files, jobs, checks, paths)
+    ):
+        if hostname is None:
+            log.warning(messages[0]["message"])
             continue
 
-        conf_check.execute_checks()
+        for message in messages:
+            result.push_message(hostname, message["message"], message["level"])
 
-        num_results = len(result.get_messages(fortigate_config.info.hostname))
+        num_results = len(result.get_messages(hostname))
         log.info("All checks in '%s' done with '%s' messages", file.name, num_results)
         total_results += num_results
 
@@ -83,13 +231,19 @@ def check(config: Path, bundles: Path) -> Result[List[str]]:
     return result
 
 
-def get(config: Path, scope: str = "", path: str = "") -> Result[FortiGateInfo]:
+def get(config: Path, scope: str = "", path: str = "", jobs: int = 1) -> Result[FortiGateInfo]:
     """
     The FortiGate get configuration utility.
 
+    The parsed configurations are taken from the config cache if it is configured. With more
+    than one job the files are parsed in a pool of worker processes.
+
     Args:
         config: The configuration to get the information from (either a file or directory)
                 In case it's a directory all .conf files in it will be checked.
+        scope:  The configuration scope (global|vdom)
+        path:   The configuration path
+        jobs:   The number of configuration files to parse at the same time
 
     Returns:
         Configuration as result object
@@ -103,7 +257,9 @@ def get(config: Path, scope: str = "", path: str = "") -> Result[FortiGateInfo]:
 
     elif config.is_dir():
         log.debug("Given config is a directory")
-        files = [file for file in config.iterdir() if file.is_file() and file.suffix == ".conf"]
+        files = sorted(
+            file for file in config.iterdir() if file.is_file() and file.suffix == ".conf"
+        )
 
     if not files:
         log.warning("There are no configuration files")
@@ -111,21 +267,23 @@ def get(config: Path, scope: str = "", path: str = "") -> Result[FortiGateInfo]:
 
     result = Result[Any]()
 
-    for file in files:
-        conf = FortiGateConfig.parse_configuration_file(file)
-        output = conf.get_configuration(scope, path)
-        result.push_result(conf.info.hostname, output)
+    for hostname, output in _map_files(_get_file, files, jobs, scope, path):
+        result.push_result(hostname, output)
 
     return result
 
 
-def info(config: Path) -> Result[FortiGateInfo]:
+def info(config: Path, jobs: int = 1) -> Result[FortiGateInfo]:
     """
     The FortiGate configuration information utility.
 
+    Only the header and the hostname are read from every configuration file, the configurations
+    are not parsed. With more than one job the files are read in a pool of worker processes.
+
     Args:
         config: The configuration to get the information from (either a file or directory)
                 In case it's a directory all .conf files in it will be checked.
+        jobs:   The number of configuration files to parse at the same time
 
     Returns:
         FortiGate information as result object
@@ -139,7 +297,9 @@ def info(config: Path) -> Result[FortiGateInfo]:
 
     elif config.is_dir():
         log.debug("Given config is a directory")
-        files = [file for file in config.iterdir() if file.is_file() and file.suffix == ".conf"]
+        files = sorted(
+            file for file in config.iterdir() if file.is_file() and file.suffix == ".conf"
+        )
 
     if not files:
         log.warning("There are no configuration files")
@@ -147,8 +307,7 @@ def info(config: Path) -> Result[FortiGateInfo]:
 
     result = Result[FortiGateInfo]()
 
-    for file in files:
-        conf = FortiGateConfig.parse_configuration_file(file)
-        result.push_result(conf.info.hostname, conf.info)
+    for hostname, fortigate_info in _map_files(_info_file, files, jobs):
+        result.push_result(hostname, fortigate_info)
 
     return result
@@ -2,21 +2,24 @@
 FortiGate backup utility
 """
 
-import concurrent.futures
 import json
 import logging
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
 
-from rich.progress import Progress
-
-from fotoobo.exceptions import APIError, GeneralError
+from fotoobo.exceptions import APIError, CircuitOpenError, GeneralError, GeneralWarning
 from fotoobo.fortinet.fortigate import FortiGate
 from fotoobo.helpers.config import config
+from fotoobo.helpers.fanout import FanOut
+from fotoobo.helpers.files import load_json_file, save_json_file
 from fotoobo.helpers.result import Result
 from fotoobo.inventory import Inventory
 
 log = logging.getLogger("fotoobo")
 
+# The file in the backup directory which holds the config checksums of the last backups
+CHECKSUM_FILE = ".checksums.json"
+
 
 def backup(
     host: Optional[str] = None,
@@ -24,6 +27,8 @@ def backup(
     """
     Create a FortiGate configuration backup into a file and optionally upload it to an FTP server.
 
+    FortiGates which are known to be unreachable (open circuit) are skipped and do not get a result.
+
     Args:
         host: The host from the inventory to get the backup. If no host is given all FortiGate
               devices in the inventory are backed up.
@@ -35,10 +40,10 @@ def backup(
     inventory = Inventory(config.inventory_file)
     fgts = inventory.get(host, "fortigate")
 
-    def _get_single_backup(name: str, fgt: FortiGate) -> Tuple[str, str]:
+    def _get_single_backup(name: str, fgt: FortiGate) -> str:
         """Get the configuration backup from a single FortiGate.
 
-        This private method is used for multithreading. It only queries one single FortiGate for its
+        This private method is used for the fan-out. It only queries one single FortiGate for its
         configuration backup and returns it.
 
         Args:
@@ -46,8 +51,7 @@ def backup(
             fgt:  The FortiGate object to query
 
         Returns:
-            name: The name of the FortiGate (as defined in the inventory)
-            data: The configuration backup of the FortiGate (fgt)
+            The configuration backup of the FortiGate (fgt)
         """
         log.debug("Backup FortiGate '%s'", name)
         data: str = ""
@@ -65,24 +69,139 @@ def backup(
                 log.error(message)
                 result.push_message(name, message, level="error")
 
+        except CircuitOpenError as err:
+            result.push_skipped(name, err.message)
+
         except GeneralError as err:
             result.push_message(name, err.message, level="error")
 
         except APIError as err:
             result.push_message(name, f"{name} returned {err.message}", level="error")
 
-        return name, data
+        return data
+
+    def _push_result(name: str, data: str) -> None:
+        """Push the backup to the results unless the FortiGate has been skipped"""
+        if name not in result.skipped:
+            result.push_result(name, data)
+
+    FanOut[str]("Getting FortiGate backups...").run(
+        _get_single_backup, fgts, on_result=_push_result, on_timeout=result.push_timed_out
+    )
+
+    return result
+
+
+def backup_to_dir(
+    host: Optional[str],
+    backup_dir: Path,
+    skip_unchanged: bool = False,
+    on_backup: Optional[Callable[[str, Path], None]] = None,
+) -> Result[Dict[str, Any]]:
+    """
+    Stream FortiGate configuration backups straight into files in a directory.
+
+    Other than backup() this does not hold the configurations in memory. Every backup is written to
+    '<backup_dir>/<name>.conf' as it arrives and the result only holds its metadata. An existing
+    backup file is only replaced by a valid and complete backup. FortiGates which are known to be
+    unreachable (open circuit) are skipped and do not get a result.
+
+    With skip_unchanged the config checksum of every FortiGate is compared with the checksum of its
+    last backup (stored in '<backup_dir>/.checksums.json') first. If it has not changed and the
+    backup file still exists, the backup is skipped. These FortiGates are reported as skipped and
+    their result is marked as 'unchanged'. If the checksum cannot be read the backup is done anyway.
+
+    Use on_backup to process the backups (e.g. upload them) while the other FortiGates are still
+    being backed up. It is called for every new backup as soon as its file is complete.
+
+    Args:
+        host:           The host from the inventory to get the backup. If no host is given all
+                        FortiGate devices in the inventory are backed up.
+        backup_dir:     The directory to write the backup files to
+        skip_unchanged: Skip the backup of FortiGates whose configuration has not changed
+        on_backup:      Optional callback which is called with the name and the file of every new
+                        backup
+
+    Returns:
+        The Result object with the file name and the size of every successful backup
+    """
+    result = Result[Dict[str, Any]]()
+    inventory = Inventory(config.inventory_file)
+    fgts = inventory.get(host, "fortigate")
+    checksum_file = backup_dir / CHECKSUM_FILE
+    checksums: Dict[str, str] = {}
+    if skip_unchanged:
+        try:
+            checksums = dict(load_json_file(checksum_file) or {})
+
+        except (ValueError, TypeError):
+            log.warning("Ignoring invalid checksum file '%s'", checksum_file)
+
+    def _stream_single_backup(name: str, fgt: FortiGate) -> Dict[str, Any]:
+        """Stream the configuration backup from a single FortiGate into its file.
+
+        This private method is used for the fan-out.
+
+        Args:
+            name: The name of the FortiGate (as defined in the inventory)
+            fgt:  The FortiGate object to query
+
+        Returns:
+            The metadata of the backup file (empty if the backup failed)
+        """
+        backup_file = backup_dir / Path(name).with_suffix(".conf")
+
+        try:
+            checksum = ""
+            if skip_unchanged:
+                try:
+                    checksum = fgt.get_config_checksum()
+
+                except (GeneralWarning, APIError) as err:
+                    log.warning("Unable to get the config checksum of '%s': %s", name, err.message)
+
+                if checksum and checksum == checksums.get(name) and backup_file.is_file():
+                    log.info("Config of '%s' unchanged, skipping backup", name)
+                    result.push_skipped(name, "Config unchanged, backup skipped", level="info")
+                    return {"file": str(backup_file), "size": 0, "unchanged": True}
+
+            log.debug("Backup FortiGate '%s'", name)
+            size = fgt.backup_to_file(backup_file)
+            message = f"Config backup for '{name}' succeeded"
+            log.info(message)
+            result.push_message(name, message)
+            if checksum:
+                checksums[name] = checksum
+
+            return {"file": str(backup_file), "size": size}
+
+        except CircuitOpenError as err:
+            result.push_skipped(name, err.message)
+
+        except (GeneralWarning, GeneralError) as err:
+            log.error(err.message)
+            result.push_message(name, err.message, level="error")
+
+        except APIError as err:
+            result.push_message(name, f"{name} returned {err.message}", level="error")
+
+        return {}
+
+    def _push_result(name: str, data: Dict[str, Any]) -> None:
+        """Push the metadata to the results unless the FortiGate has been skipped"""
+        if name not in result.skipped or data.get("unchanged"):
+            result.push_result(name, data, successful=bool(data))
+
+        if on_backup and data and not data.get("unchanged"):
+            on_backup(name, Path(data["file"]))
 
-    with Progress() as progress:
-        task = progress.add_task("Getting FortiGate versions...", total=len(fgts))
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            futures = []
-            for name, fgt in fgts.items():
-                futures.append(executor.submit(_get_single_backup, name, fgt))
+    FanOut[Dict[str, Any]]("Getting FortiGate backups...").run(
+        _stream_single_backup, fgts, on_result=_push_result, on_timeout=result.push_timed_out
+    )
 
-            for future in concurrent.futures.as_completed(futures):
-                name, configuration_backup = future.result()
-                result.push_result(name, configuration_backup)
-                progress.update(task, advance=1)
+    if skip_unchanged:
+        save_json_file(checksum_file, checksums)
+        unchanged = [_ for _, data in result.all_results().items() if data.get("unchanged")]
+        log.info("Skipped %s of %s FortiGate backups (config unchanged)", len(unchanged), len(fgts))
 
     return result
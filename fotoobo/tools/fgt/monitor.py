@@ -1,22 +1,25 @@
 """
-FortiGate check hamaster utility
+FortiGate monitor utilities
 """
 
-import concurrent.futures
+import json
 import logging
-from typing import Dict, Tuple
-
-from rich.progress import Progress
+import threading
+from datetime import datetime
+from time import monotonic
+from typing import Any, Dict, List, Optional, Set, TextIO, Tuple
 
+from fotoobo.exceptions import APIError, GeneralError, GeneralWarning
 from fotoobo.fortinet.fortigate import FortiGate
 from fotoobo.helpers.config import config
+from fotoobo.helpers.fanout import FanOut
 from fotoobo.helpers.result import Result
 from fotoobo.inventory import Inventory
 
 log = logging.getLogger("fotoobo")
 
 
-def hamaster(host: str) -> Result[str]:  # pylint: disable=too-many-locals
+def hamaster(host: str) -> Result[str]:
     """FortiGate check hamaster.
 
     This method first gets all the devices from a FortiManager to find all the managed FortiGates
@@ -32,19 +35,18 @@ def hamaster(host: str) -> Result[str]:  # pylint: disable=too-many-locals
         The Result object with all the results
     """
 
-    def _get_single_status(name: str, fgt: FortiGate) -> Tuple[str, str]:
+    def _get_single_status(_: str, fgt: FortiGate) -> str:
         """Get the HA master status from a FortiGate.
 
-        This private method is used for multithreading. It only queries one single FortiGate for its
+        This private method is used for the fan-out. It only queries one single FortiGate for its
         HA master status and returns it.
 
         Args:
-            name: The name of the FortiGate (as defined in the inventory)
-            fgt:  The FortiGate object to query
+            _:   The name of the FortiGate (as defined in the inventory)
+            fgt: The FortiGate object to query
 
         Returns:
-            name:   The name of the FortiGate (as defined in the inventory)
-            status: The HA status of the FortiGate (fgt)
+            The HA status of the FortiGate (fgt)
         """
         response = fgt.api("get", "/monitor/system/ha-checksums")
         ha_checksums = response.json()
@@ -55,7 +57,7 @@ def hamaster(host: str) -> Result[str]:  # pylint: disable=too-many-locals
                 if node["is_root_master"] == 1:
                     status = "ok"
 
-        return name, status
+        return status
 
     inventory = Inventory(config.inventory_file)
     fmg = inventory.get_item(host, "fortimanager")
@@ -99,16 +101,209 @@ def hamaster(host: str) -> Result[str]:  # pylint: disable=too-many-locals
                 log.debug("Device '%s' not found in inventory", expected_master)
                 result.push_result(expected_master, "not found in inventory")
 
-    with Progress() as progress:
-        task = progress.add_task("Getting FortiGate HA status...", total=len(fgts))
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            futures = []
-            for name, fgt in fgts.items():
-                futures.append(executor.submit(_get_single_status, name, fgt))
-
-            for future in concurrent.futures.as_completed(futures):
-                name, status = future.result()
-                result.push_result(name, status)
-                progress.update(task, advance=1)
+    FanOut[str]("Getting FortiGate HA status...").run(
+        _get_single_status, fgts, on_result=result.push_result, on_timeout=result.push_timed_out
+    )
 
     return result
+
+
+# The state of a monitor endpoint: its flattened results or the error why there are none
+_State = Tuple[Dict[str, Any], Optional[str]]
+
+
+def _flatten(data: Any, prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten nested dicts and lists into a dict of paths (e.g. "port1.status" or "0.serial_no").
+
+    Args:
+        data:   The data to flatten
+        prefix: The path of data
+
+    Returns:
+        The values by path
+    """
+    if isinstance(data, dict):
+        items: Any = data.items()
+
+    elif isinstance(data, list):
+        items = enumerate(data)
+
+    else:
+        return {prefix: data}
+
+    flat: Dict[str, Any] = {}
+    for key, value in items:
+        flat.update(_flatten(value, f"{prefix}.{key}" if prefix else str(key)))
+
+    return flat
+
+
+def watch(  # pylint: disable=too-many-arguments,too-many-locals,too-many-statements
+    host: Optional[str],
+    endpoints: List[str],
+    sink: TextIO,
+    interval: float = 60,
+    jitter: float = 0.1,
+    polls: int = 0,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """FortiGate monitor watch.
+
+    Poll monitor endpoints of one or more FortiGates on a schedule and write the changes to a
+    JSON Lines sink. Every poll round queries the FortiGates concurrently with the fan-out helper.
+    The starts of the polls of a round are spread evenly over jitter * interval (with the rate
+    limit of the fan-out), so the requests do not hit all the devices at the same moment. A round
+    must complete within the interval. A FortiGate whose poll of the last round is still running
+    (because it did not complete in time) is skipped, so its session is never used twice at once.
+
+    The FortiGates are loaded from the inventory once, so their sessions are reused by all the
+    polls. The response cache is bypassed.
+
+    Only changes are written: the first poll of an endpoint writes all its values and the following
+    polls only the values which have been changed, added (old is null) or removed (new is null).
+    Failures are written once when they start and once when they are resolved (error is null).
+
+        {"time": "...", "fortigate": "fgt1", "endpoint": "system/ha-checksums",
+         "changes": {"0.checksum.all": {"old": "3f...", "new": "a9..."}}}
+
+    Args:
+        host:      The FortiGate(s) from the inventory to poll (wildcard * is supported). If you
+                   omit host, it will poll all FortiGates in the inventory.
+        endpoints: The monitor endpoints to poll (e.g. "system/ha-checksums")
+        sink:      The text stream to write the changes to (one JSON document per line)
+        interval:  The time between the start of two poll rounds in seconds
+        jitter:    The fraction of the interval to spread the starts of the polls of a round over
+        polls:     The number of poll rounds (0 = until stopped)
+        stop:      Set this event to stop watching (after the current round)
+
+    Returns:
+        The number of changes written to the sink
+    """
+    inventory = Inventory(config.inventory_file)
+    fgts = inventory.get(host, "fortigate")
+    urls: Dict[str, str] = {}
+    for endpoint in endpoints:
+        url = endpoint.strip("/")
+        urls[endpoint] = url[len("monitor/") :] if url.startswith("monitor/") else url
+
+    states: Dict[Tuple[str, str], _State] = {}
+    stop = stop or threading.Event()
+    written = 0
+    lock = threading.Lock()
+    # The FortiGates whose poll is running (a poll which did not complete in time may still run)
+    running: Set[str] = set()
+
+    def _poll_single(name: str, fgt: FortiGate) -> Dict[str, _State]:
+        """Poll the monitor endpoints of a single FortiGate.
+
+        This private method is used for the fan-out. It only queries one single FortiGate.
+
+        Args:
+            name: The name of the FortiGate (as defined in the inventory)
+            fgt:  The FortiGate object to query
+
+        Returns:
+            The state of every endpoint
+        """
+        with lock:
+            running.add(name)
+
+        polled: Dict[str, _State] = {}
+        try:
+            for endpoint, url in urls.items():
+                polled[endpoint] = _poll_endpoint(name, fgt, url)
+
+        finally:
+            with lock:
+                running.discard(name)
+
+        return polled
+
+    def _poll_endpoint(name: str, fgt: FortiGate, url: str) -> _State:
+        """Poll one monitor endpoint of a single FortiGate.
+
+        Args:
+            name: The name of the FortiGate (as defined in the inventory)
+            fgt:  The FortiGate object to query
+            url:  The URL of the endpoint (relative to the monitor API)
+
+        Returns:
+            The state of the endpoint
+        """
+        log.debug("Polling '%s' from '%s'", url, name)
+        try:
+            response = fgt.api("get", f"monitor/{url}", use_cache=False)
+            data = response.json()
+            if not isinstance(data, dict):
+                raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+
+            return _flatten(data.get("results")), None
+
+        except (APIError, GeneralError, GeneralWarning) as err:
+            return {}, err.message
+
+        except ValueError as err:  # this includes JSON decoding errors
+            log.warning("Invalid response to '%s' from '%s': %s", url, name, err)
+            return {}, f"Invalid response: {err}"
+
+    def _write_changes(name: str, polled: Dict[str, _State]) -> None:
+        """Compare the polled state of a FortiGate to the last state and write the changes.
+
+        Args:
+            name:   The name of the FortiGate (as defined in the inventory)
+            polled: The state of every endpoint
+        """
+        nonlocal written
+        for endpoint, (values, error) in polled.items():
+            last_values, last_error = states.get((name, endpoint), ({}, None))
+            record: Dict[str, Any] = {}
+            if error != last_error:
+                record["error"] = error
+
+            if error:
+                values = last_values
+
+            else:
+                changes = {
+                    path: {"old": last_values.get(path), "new": values.get(path)}
+                    for path in {**last_values, **values}
+                    if path not in values
+                    or path not in last_values
+                    or values[path] != last_values[path]
+                }
+                if changes:
+                    record["changes"] = changes
+
+            states[(name, endpoint)] = (values, error)
+            if record:
+                timestamp = datetime.now().astimezone().isoformat(timespec="seconds")
+                record = {"time": timestamp, "fortigate": name, "endpoint": endpoint, **record}
+                sink.write(json.dumps(record, default=str) + "\n")
+                sink.flush()
+                written += 1
+
+    # Spread the starts of the polls of a round over jitter * interval
+    rate_limit = len(fgts) / (jitter * interval) if jitter > 0 and interval > 0 else None
+    poll = 0
+    while not stop.is_set():
+        started = monotonic()
+        with lock:
+            ready = {name: fgt for name, fgt in fgts.items() if name not in running}
+
+        for name in fgts.keys() - ready.keys():
+            log.warning("Poll of '%s' skipped, its last poll is still running", name)
+
+        FanOut[Dict[str, _State]](deadline=interval, rate_limit=rate_limit).run(
+            _poll_single,
+            ready,
+            on_result=_write_changes,
+            on_timeout=lambda name, _: log.warning("Poll of '%s' did not complete in time", name),
+        )
+        poll += 1
+        if polls and poll >= polls:
+            break
+
+        stop.wait(max(started + interval - monotonic(), 0))
+
+    return written
@@ -18,7 +18,7 @@ def test_cli_app_fgt_config_get_help() -> None:
     assert result.exit_code == 0
     arguments, options, commands = parse_help_output(result.stdout)
     assert set(arguments) == {"configuration", "scope", "path"}
-    assert options == {"-h", "--help"}
+    assert options == {"-h", "--help", "-j", "--jobs"}
     assert not commands
 
 
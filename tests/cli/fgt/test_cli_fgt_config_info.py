@@ -18,7 +18,7 @@ def test_cli_app_fgt_config_info_help() -> None:
     assert result.exit_code == 0
     arguments, options, commands = parse_help_output(result.stdout)
     assert set(arguments) == {"configuration"}
-    assert options == {"-h", "--help", "-l", "--list"}
+    assert options == {"-h", "--help", "-j", "--jobs", "-l", "--list"}
     assert not commands
 
 
@@ -2,18 +2,26 @@
 Testing the cli app
 """
 
+import re
 from pathlib import Path
 from unittest.mock import MagicMock
 
+import pytest
 from _pytest.monkeypatch import MonkeyPatch
 from typer.testing import CliRunner
 
 from fotoobo.cli.main import app
+from fotoobo.exceptions import GeneralWarning
 from tests.helper import parse_help_output
 
 runner = CliRunner()
 
 
+def backup_to_file_mock(backup_file: Path) -> int:
+    """Write a dummy backup into backup_file like FortiGate.backup_to_file() does"""
+    return backup_file.write_text("#config-version\ntest-1234", encoding="UTF-8")
+
+
 def test_cli_app_fgt_help() -> None:
     """Test cli help for fgt"""
     result = runner.invoke(app, ["-c", "tests/fotoobo.yaml", "fgt", "-h"])
@@ -21,7 +29,7 @@ def test_cli_app_fgt_help() -> None:
     arguments, options, commands = parse_help_output(result.stdout)
     assert not arguments
     assert options == {"-h", "--help"}
-    assert set(commands) == {"backup", "monitor", "get", "config"}
+    assert set(commands) == {"backup", "monitor", "get", "config", "history"}
 
 
 def test_cli_app_fgt_backup_help() -> None:
@@ -30,15 +38,27 @@ def test_cli_app_fgt_backup_help() -> None:
     assert result.exit_code == 0
     arguments, options, commands = parse_help_output(result.stdout)
     assert set(arguments) == {"host"}
-    assert options == {"--backup-dir", "-b", "--ftp", "-f", "--smtp", "-s", "-h", "--help"}
+    assert options == {
+        "--backup-dir",
+        "-b",
+        "--ftp",
+        "-f",
+        "--compression",
+        "--smtp",
+        "-s",
+        "--skip-unchanged",
+        "--store",
+        "-h",
+        "--help",
+    }
     assert not commands
 
 
 def test_cli_app_fgt_backup_single(monkeypatch: MonkeyPatch, temp_dir: str) -> None:
     """Test cli fgt backup with no FortiGate given so it backups all"""
     monkeypatch.setattr(
-        "fotoobo.fortinet.fortigate.FortiGate.backup",
-        MagicMock(return_value="#config-version\ntest-1234"),
+        "fotoobo.fortinet.fortigate.FortiGate.backup_to_file",
+        MagicMock(side_effect=backup_to_file_mock),
     )
     Path(temp_dir / Path("test_fgt_1.conf")).unlink(missing_ok=True)
     Path(temp_dir / Path("test_fgt_2.conf")).unlink(missing_ok=True)
@@ -55,8 +75,8 @@ def test_cli_app_fgt_backup_single(monkeypatch: MonkeyPatch, temp_dir: str) -> N
 def test_cli_app_fgt_backup_all(monkeypatch: MonkeyPatch, temp_dir: str) -> None:
     """Test cli fgt backup with no FortiGate given so it backups all"""
     monkeypatch.setattr(
-        "fotoobo.fortinet.fortigate.FortiGate.backup",
-        MagicMock(return_value="#config-version\ntest-1234"),
+        "fotoobo.fortinet.fortigate.FortiGate.backup_to_file",
+        MagicMock(side_effect=backup_to_file_mock),
     )
     Path(temp_dir / Path("test_fgt_1.conf")).unlink(missing_ok=True)
     Path(temp_dir / Path("test_fgt_2.conf")).unlink(missing_ok=True)
@@ -66,3 +86,93 @@ def test_cli_app_fgt_backup_all(monkeypatch: MonkeyPatch, temp_dir: str) -> None
     assert result.exit_code == 0
     assert Path.exists(Path(temp_dir / Path("test_fgt_1.conf")))
     assert Path.exists(Path(temp_dir / Path("test_fgt_2.conf")))
+
+
+def test_cli_app_fgt_history_help() -> None:
+    """Test cli help for fgt history"""
+    result = runner.invoke(app, ["-c", "tests/fotoobo.yaml", "fgt", "history", "-h"])
+    assert result.exit_code == 0
+    arguments, options, commands = parse_help_output(result.stdout)
+    assert set(arguments) == {"host"}
+    assert options == {"--revision", "-r", "--output", "-o", "-h", "--help"}
+    assert "--store" in result.stdout  # required options are not parsed
+    assert not commands
+
+
+def test_cli_app_fgt_backup_store(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test cli fgt backup adds the backups to the store and fgt history gets them back"""
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate.FortiGate.backup_to_file",
+        MagicMock(side_effect=backup_to_file_mock),
+    )
+    store = str(tmp_path / "store")
+    result = runner.invoke(
+        app,
+        ["-c", "tests/fotoobo.yaml", "fgt", "backup", "-b", str(tmp_path), "--store", store],
+    )
+    assert result.exit_code == 0
+
+    result = runner.invoke(
+        app, ["-c", "tests/fotoobo.yaml", "fgt", "history", "test_fgt_1", "--store", store]
+    )
+    assert result.exit_code == 0
+    revision = re.findall(r" ([0-9a-f]{12}) ", result.stdout)[0]
+
+    result = runner.invoke(
+        app,
+        [
+            "-c",
+            "tests/fotoobo.yaml",
+            "fgt",
+            "history",
+            "test_fgt_1",
+            "--store",
+            store,
+            "-r",
+            revision,
+        ],
+    )
+    assert result.exit_code == 0
+    assert result.stdout.endswith("#config-version\ntest-1234")
+
+    with pytest.raises(GeneralWarning, match=r"No backups of 'dummy'"):
+        runner.invoke(
+            app,
+            ["-c", "tests/fotoobo.yaml", "fgt", "history", "dummy", "--store", store],
+            catch_exceptions=False,
+        )
+
+
+def test_cli_app_fgt_backup_ftp(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test cli fgt backup uploads the backups to the ftp server"""
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate.FortiGate.backup_to_file",
+        MagicMock(side_effect=backup_to_file_mock),
+    )
+    ftp = MagicMock()
+    ftp.storbinary.return_value = "226 Transfer complete."
+    monkeypatch.setattr("fotoobo.helpers.upload.ftp_connect", MagicMock(return_value=ftp))
+    result = runner.invoke(
+        app, ["-c", "tests/fotoobo.yaml", "fgt", "backup", "-b", str(tmp_path), "--ftp", "test_ftp"]
+    )
+    assert result.exit_code == 0
+    assert ftp.storbinary.call_count == 3
+    assert not list(tmp_path.glob("*.zip"))
+
+
+def test_cli_app_fgt_backup_ftp_gzip(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test cli fgt backup uploads gzip compressed backups and rejects unknown compressions"""
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate.FortiGate.backup_to_file",
+        MagicMock(side_effect=backup_to_file_mock),
+    )
+    ftp = MagicMock()
+    ftp.storbinary.return_value = "226 Transfer complete."
+    monkeypatch.setattr("fotoobo.helpers.upload.ftp_connect", MagicMock(return_value=ftp))
+    arguments = ["-c", "tests/fotoobo.yaml", "fgt", "backup", "-b", str(tmp_path), "-f", "test_ftp"]
+    result = runner.invoke(app, arguments + ["--compression", "gzip"])
+    assert result.exit_code == 0
+    assert all(_.args[0].endswith(".conf.gz") for _ in ftp.storbinary.call_args_list)
+
+    with pytest.raises(GeneralWarning, match=r"Unknown compression 'rar'"):
+        runner.invoke(app, arguments + ["--compression", "rar"], catch_exceptions=False)
@@ -2,10 +2,15 @@
 Testing the cli fgt check
 """
 
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from _pytest.monkeypatch import MonkeyPatch
 from typer.testing import CliRunner
 
 from fotoobo.cli.main import app
-from tests.helper import parse_help_output
+from tests.helper import ResponseMock, parse_help_output
 
 runner = CliRunner()
 
@@ -17,7 +22,7 @@ def test_cli_app_fgt_monitor_help() -> None:
     arguments, options, commands = parse_help_output(result.stdout)
     assert not arguments
     assert options == {"-h", "--help"}
-    assert set(commands) == {"hamaster"}
+    assert set(commands) == {"hamaster", "watch"}
 
 
 def test_cli_app_fgt_monitor_hamaster_help() -> None:
@@ -38,3 +43,42 @@ def test_cli_app_fgt_monitor_hamaster_help() -> None:
         "--template",
     }
     assert not commands
+
+
+def test_cli_app_fgt_monitor_watch_help() -> None:
+    """Test cli help for fgt monitor watch"""
+    result = runner.invoke(app, ["-c", "tests/fotoobo.yaml", "fgt", "monitor", "watch", "-h"])
+    assert result.exit_code == 0
+    arguments, options, commands = parse_help_output(result.stdout)
+    assert set(arguments) == {"host"}
+    assert options == {
+        "-h",
+        "--help",
+        "-e",
+        "--endpoint",
+        "-i",
+        "--interval",
+        "--jitter",
+        "-o",
+        "--output",
+        "--polls",
+    }
+    assert not commands
+
+
+def test_cli_app_fgt_monitor_watch(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test cli fgt monitor watch appends the changes to the output file"""
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate.FortiGate.api",
+        MagicMock(return_value=ResponseMock(json={"results": {"all": "abc"}}, status_code=200)),
+    )
+    output_file = tmp_path / "changes.jsonl"
+    arguments = ["-c", "tests/fotoobo.yaml", "fgt", "monitor", "watch", "test_fgt_1"]
+    arguments += ["-i", "0", "--polls", "2", "-o", str(output_file)]
+    for _ in range(2):
+        result = runner.invoke(app, arguments)
+        assert result.exit_code == 0
+
+    records = [json.loads(_) for _ in output_file.read_text(encoding="UTF-8").splitlines()]
+    assert len(records) == 2
+    assert records[0]["changes"] == {"all": {"old": None, "new": "abc"}}
@@ -3,6 +3,7 @@ Testing the cli app
 """
 
 # pylint: disable=redefined-outer-name
+from pathlib import Path
 from typing import Generator, List
 from unittest.mock import MagicMock
 
@@ -11,6 +12,7 @@ from _pytest.monkeypatch import MonkeyPatch
 from typer.testing import CliRunner
 
 from fotoobo.cli.main import app
+from fotoobo.helpers.metrics import Metrics
 from tests.helper import parse_help_output
 
 runner = CliRunner()
@@ -51,20 +53,29 @@ def test_cli_app_help() -> None:
     arguments, options, commands = parse_help_output(result.stdout)
     assert not arguments
     assert options == {
+        "--cache-ttl",
         "-c",
         "--config",
+        "--deadline",
         "-h",
         "--help",
+        "--host-timeout",
         "--install-completion",
         "--loglevel",
+        "--metrics",
         "--nologo",
         "-q",
         "--quiet",
+        "--rate-limit",
+        "--record",
+        "--replay",
+        "--replay-latency",
         "--show-completion",
         "-V",
         "--version",
+        "--workers",
     }
-    assert set(commands) == {"convert", "ems", "faz", "fgt", "fmg", "get"}
+    assert set(commands) == {"convert", "daemon", "ems", "faz", "fgt", "fmg", "get"}
 
 
 def test_cli_app_get_help() -> None:
@@ -166,6 +177,29 @@ def test_cli_main_no_logo() -> None:
     assert not " f o t o o b o " in result.stdout
 
 
+def test_cli_main_metrics(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test the metrics are exported at the end of the run"""
+    metrics = Metrics()
+    monkeypatch.setattr("fotoobo.cli.main.metrics", metrics)
+    metrics_file = tmp_path / "fotoobo.prom"
+    result = runner.invoke(
+        app, ["-c", "tests/fotoobo.yaml", "--metrics", str(metrics_file), "greet"]
+    )
+    assert result.exit_code == 0
+    assert metrics.enabled
+    assert "# TYPE fotoobo_api_request_duration_seconds histogram" in metrics_file.read_text()
+
+
+def test_cli_app_daemon_help() -> None:
+    """Test cli help for daemon"""
+    result = runner.invoke(app, ["-c", "tests/fotoobo.yaml", "daemon", "-h"])
+    assert result.exit_code == 0
+    arguments, options, commands = parse_help_output(result.stdout)
+    assert not arguments
+    assert options == {"--socket", "-h", "--help"}
+    assert not commands
+
+
 def test_cli_main_broken(fix_config: None) -> None:  # pylint: disable=unused-argument
     """Test when invoking with broken fotoobo.yaml config"""
     result = runner.invoke(app, ["-c", "tests/fotoobo_broken.yaml", "greet"])
@@ -0,0 +1,123 @@
+"""
+Test the response cache
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from _pytest.monkeypatch import MonkeyPatch
+
+from fotoobo.exceptions import GeneralWarning
+from fotoobo.fortinet import FortiGate
+from fotoobo.fortinet.cache import ResponseCache, get_cache
+
+
+def _response(content: bytes, status_code: int = 200) -> requests.Response:
+    """Create a requests response with the given body"""
+    response = requests.Response()
+    response._content = content  # pylint: disable=protected-access
+    response.status_code = status_code
+    response.reason = "OK"
+    response.encoding = "UTF-8"
+    return response
+
+
+@pytest.mark.parametrize(
+    "method, endpoint, payload, expected",
+    (
+        pytest.param("get", "GET /monitor/system/status", None, 60, id="default"),
+        pytest.param("get", "GET /cmdb/firewall/address", None, 3600, id="pattern"),
+        pytest.param("get", "GET /auth/signout", None, 0, id="uncached"),
+        pytest.param("get", "GET /system/serial_number", None, 0, id="session check"),
+        pytest.param("post", "POST /auth/signin", {"name": "me"}, 0, id="post"),
+        pytest.param("post", "get /dvmdb/adom", {"method": "get"}, 60, id="jsonrpc get"),
+        pytest.param("post", "get /sys/status", {"method": "get"}, 0, id="jsonrpc session check"),
+        pytest.param("post", "get /task/task/1", {"method": "get"}, 0, id="jsonrpc task"),
+        pytest.param("post", "exec /sys/login/user", {"method": "exec"}, 0, id="jsonrpc exec"),
+    ),
+)
+def test_get_ttl(
+    method: str, endpoint: str, payload: Optional[Dict[str, Any]], expected: float, tmp_path: Path
+) -> None:
+    """Test the time to live per endpoint"""
+    cache = ResponseCache(tmp_path, ttl=60, ttls={"GET /cmdb/*": 3600})
+    assert cache.get_ttl(method, endpoint, payload) == expected
+
+
+def test_put_and_get(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test a response is cached until it expires"""
+    monkeypatch.setattr("fotoobo.fortinet.cache.time", MagicMock(return_value=1000))
+    cache = ResponseCache(tmp_path)
+    payload = {"method": "get", "params": [{"url": "/dvmdb/adom"}], "session": "secret"}
+    body = b'{"result": [{"status": {"code": 0}}]}'
+    cache.put("host", "post", "url", None, payload, _response(body), 60, "secret")
+    assert "secret" not in next(tmp_path.glob("*.json")).read_text(encoding="UTF-8")
+
+    response = cache.get("host", "post", "url", None, payload, "secret")
+    assert response is not None
+    assert response.content == body
+    assert cache.get("other_host", "post", "url", None, payload, "secret") is None
+    assert cache.get("host", "post", "url", None, payload, "other") is None
+
+    monkeypatch.setattr("fotoobo.fortinet.cache.time", MagicMock(return_value=1060))
+    assert cache.get("host", "post", "url", None, payload, "secret") is None
+
+
+@pytest.mark.parametrize(
+    "body, status_code",
+    (
+        pytest.param(b"", 404, id="http error"),
+        pytest.param(b'{"result": [{"status": {"code": -11}}]}', 200, id="jsonrpc error"),
+        pytest.param(b"no json", 200, id="jsonrpc no json"),
+    ),
+)
+def test_put_unsuccessful(body: bytes, status_code: int, tmp_path: Path) -> None:
+    """Test unsuccessful responses are not cached"""
+    cache = ResponseCache(tmp_path)
+    cache.put("host", "post", "url", None, {"method": "get"}, _response(body, status_code), 60)
+    assert not list(tmp_path.iterdir())
+
+
+def test_evict(tmp_path: Path) -> None:
+    """Test the least recently written responses are removed if the cache is too big"""
+    cache = ResponseCache(tmp_path, max_size=800)
+    for url in ["url1", "url2", "url3"]:
+        cache.put("host", "get", url, None, None, _response(b"x" * 100), 60)
+
+    assert cache.get("host", "get", "url1", None, None) is None
+    assert cache.get("host", "get", "url3", None, None) is not None
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_api_cached(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test Fortinet.api() takes the response from the cache"""
+    monkeypatch.setattr("fotoobo.fortinet.cache.config.cache", {"dir": tmp_path, "ttl": 60})
+    session_get = MagicMock(return_value=_response(b'{"version": "v7.2.5"}'))
+    monkeypatch.setattr("fotoobo.fortinet.fortinet.requests.Session.get", session_get)
+    assert FortiGate("host", "token").get_version() == "v7.2.5"
+    assert FortiGate("host", "token").get_version() == "v7.2.5"
+    session_get.assert_called_once()
+
+    with pytest.raises(GeneralWarning, match=r"invalid backup"):
+        FortiGate("host", "token").backup_to_file(tmp_path / "backup.conf")
+
+    assert session_get.call_count == 2
+
+
+def test_get_cache_not_configured(monkeypatch: MonkeyPatch) -> None:
+    """Test there is no cache if it is not configured"""
+    monkeypatch.setattr("fotoobo.fortinet.cache.config.cache", {})
+    assert get_cache() is None
+
+
+def test_api_cached_per_session(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test Fortinet.api() does not take the response of another session from the cache"""
+    monkeypatch.setattr("fotoobo.fortinet.cache.config.cache", {"dir": tmp_path, "ttl": 60})
+    session_get = MagicMock(return_value=_response(b'{"version": "v7.2.5"}'))
+    monkeypatch.setattr("fotoobo.fortinet.fortinet.requests.Session.get", session_get)
+    assert FortiGate("host", "token").get_version() == "v7.2.5"
+    assert FortiGate("host", "other token").get_version() == "v7.2.5"
+    assert session_get.call_count == 2
@@ -0,0 +1,135 @@
+"""
+Test the cassette
+"""
+
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from _pytest.monkeypatch import MonkeyPatch
+
+from fotoobo.exceptions import GeneralError
+from fotoobo.fortinet import FortiGate
+from fotoobo.fortinet.cassette import Cassette, get_cassette, redact
+
+
+def _response(content: bytes, status_code: int = 200) -> requests.Response:
+    """Create a requests response with the given body"""
+    response = requests.Response()
+    response._content = content  # pylint: disable=protected-access
+    response.status_code = status_code
+    response.reason = "OK"
+    response.encoding = "UTF-8"
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+
+def test_redact() -> None:
+    """Test the secrets are redacted in (nested) payloads"""
+    payload = {"params": [{"data": {"passwd": "secret", "user": "me"}}], "session": "key"}
+    assert redact(payload) == {
+        "params": [{"data": {"passwd": "***", "user": "me"}}],
+        "session": "***",
+    }
+    assert payload["session"] == "key"
+
+
+def test_unknown_mode(tmp_path: Path) -> None:
+    """Test an unknown mode"""
+    with pytest.raises(GeneralError, match=r"Unknown cassette mode 'dummy'"):
+        Cassette(tmp_path / "cassette.jsonl", "dummy")
+
+
+def test_record_and_replay(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test the responses are recorded and replayed in the recorded order"""
+    cassette_file = tmp_path / "cassette.jsonl"
+    recorder = Cassette(cassette_file, "record")
+    payload = {"method": "get", "session": "secret"}
+    recorder.record("host", "post", "url", None, payload, 0.5, response=_response(b'{"p": 50}'))
+    recorder.record("host", "post", "url", None, payload, 0.25, response=_response(b'{"p": 100}'))
+    assert "secret" not in cassette_file.read_text(encoding="UTF-8")
+
+    sleep = MagicMock()
+    monkeypatch.setattr("fotoobo.fortinet.cassette.sleep", sleep)
+    player = Cassette(cassette_file, "replay")
+    payload["session"] = "other"
+    assert player.play("host", "POST", "url", None, payload).json() == {"p": 50}
+    assert player.play("host", "POST", "url", None, payload).json() == {"p": 100}
+    response = player.play("host", "POST", "url", None, payload)
+    assert response.json() == {"p": 100}
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert [_.args[0] for _ in sleep.call_args_list] == [0.5, 0.25, 0.25]
+
+    with pytest.raises(GeneralError, match=r"No recorded response for 'GET url' \(host\)"):
+        player.play("host", "get", "url", None, None)
+
+
+def test_replay_latency(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test the simulated latency"""
+    cassette_file = tmp_path / "cassette.jsonl"
+    Cassette(cassette_file, "record").record("host", "get", "url", None, None, 1.0, _response(b""))
+    sleep = MagicMock()
+    monkeypatch.setattr("fotoobo.fortinet.cassette.sleep", sleep)
+    Cassette(cassette_file, "replay", latency=0.01).play("host", "get", "url", None, None)
+    sleep.assert_called_once_with(0.01)
+
+
+def test_replay_error(tmp_path: Path) -> None:
+    """Test a recorded transport error is raised again"""
+    cassette_file = tmp_path / "cassette.jsonl"
+    try:
+        raise GeneralError("Connection timeout (host)") from requests.exceptions.ConnectTimeout()
+
+    except GeneralError as err:
+        Cassette(cassette_file, "record").record("host", "get", "url", None, None, 0, error=err)
+
+    with pytest.raises(GeneralError, match=r"Connection timeout \(host\)") as err_info:
+        Cassette(cassette_file, "replay", latency=0).play("host", "get", "url", None, None)
+
+    cause = err_info.value.__cause__  # type: ignore
+    assert isinstance(cause, requests.exceptions.ConnectTimeout)
+
+
+def test_replay_invalid_cassette(tmp_path: Path) -> None:
+    """Test loading an invalid cassette"""
+    cassette_file = tmp_path / "cassette.jsonl"
+    cassette_file.write_text("no json", encoding="UTF-8")
+    with pytest.raises(GeneralError, match=r"Unable to load cassette"):
+        Cassette(cassette_file, "replay")
+
+
+def test_api_record_and_replay(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test Fortinet.api() records the requests and replays them without network access"""
+    cassette_file = tmp_path / "cassette.jsonl"
+    monkeypatch.setattr(
+        "fotoobo.fortinet.cassette.config.cassette", {"file": cassette_file, "mode": "record"}
+    )
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortinet.requests.Session.get",
+        MagicMock(return_value=_response(b'{"version": "v7.2.5"}')),
+    )
+    assert FortiGate("host", "token").get_version() == "v7.2.5"
+    assert len(cassette_file.read_text(encoding="UTF-8").splitlines()) == 1
+    assert json.loads(cassette_file.read_text(encoding="UTF-8"))["elapsed"] >= 0
+
+    monkeypatch.setattr(
+        "fotoobo.fortinet.cassette.config.cassette",
+        {"file": cassette_file, "mode": "replay", "latency": 0},
+    )
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortinet.requests.Session.get",
+        MagicMock(side_effect=AssertionError("no network access in replay mode")),
+    )
+    cassette = get_cassette()
+    assert cassette is not None
+    assert cassette.replaying
+    assert FortiGate("host", "token").get_version() == "v7.2.5"
+
+
+def test_get_cassette_not_configured(monkeypatch: MonkeyPatch) -> None:
+    """Test there is no cassette if it is not configured"""
+    monkeypatch.setattr("fotoobo.fortinet.cassette.config.cassette", {})
+    assert get_cassette() is None
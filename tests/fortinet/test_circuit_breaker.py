@@ -0,0 +1,90 @@
+"""
+Test the circuit breaker
+"""
+
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from fotoobo.exceptions import CircuitOpenError
+from fotoobo.fortinet.circuit_breaker import CircuitBreaker, get_circuit_breaker
+
+
+@pytest.fixture
+def state_file(tmp_path: Path) -> Path:
+    """The path to a state file in a temporary directory"""
+    return tmp_path / "cache" / "circuit_breaker.json"
+
+
+def test_closed(state_file: Path) -> None:
+    """Test the circuit stays closed below the threshold"""
+    breaker = CircuitBreaker(state_file, threshold=2)
+    breaker.record_failure("host")
+    breaker.before_request("host")
+    assert json.loads(state_file.read_text(encoding="UTF-8"))["host"]["failures"] == 1
+
+
+def test_open(state_file: Path) -> None:
+    """Test the circuit opens at the threshold and the state is persisted"""
+    breaker = CircuitBreaker(state_file, threshold=2)
+    breaker.record_failure("host")
+    breaker.record_failure("host")
+    with pytest.raises(CircuitOpenError, match=r"Circuit open, .* \(host\)"):
+        breaker.before_request("host")
+
+    breaker.before_request("other_host")
+    with pytest.raises(CircuitOpenError):
+        CircuitBreaker(state_file, threshold=2).before_request("host")
+
+
+def test_half_open(state_file: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test only one trial request is sent after the reset timeout"""
+    breaker = CircuitBreaker(state_file, threshold=1, reset_timeout=60)
+    breaker.record_failure("host")
+    monkeypatch.setattr(
+        "fotoobo.fortinet.circuit_breaker.time",
+        MagicMock(return_value=breaker.state["host"]["opened"] + 61),
+    )
+    breaker.before_request("host")
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request("host")
+
+    breaker.record_failure("host")
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request("host")
+
+
+def test_success_closes(state_file: Path) -> None:
+    """Test a successful request closes the circuit"""
+    breaker = CircuitBreaker(state_file, threshold=1)
+    breaker.record_failure("host")
+    breaker.record_success("host")
+    breaker.before_request("host")
+    assert json.loads(state_file.read_text(encoding="UTF-8")) == {}
+
+
+def test_invalid_state_file(state_file: Path) -> None:
+    """Test an invalid state file is ignored"""
+    state_file.parent.mkdir(parents=True)
+    state_file.write_text("no json", encoding="UTF-8")
+    assert CircuitBreaker(state_file).state == {}
+
+
+def test_get_circuit_breaker(state_file: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test the circuit breaker is taken from the configuration"""
+    monkeypatch.setattr("fotoobo.fortinet.circuit_breaker.config.circuit_breaker", {})
+    assert get_circuit_breaker() is None
+
+    monkeypatch.setattr(
+        "fotoobo.fortinet.circuit_breaker.config.circuit_breaker",
+        {"state_file": str(state_file), "threshold": 5},
+    )
+    breaker = get_circuit_breaker()
+    assert breaker is not None
+    assert breaker.state_file == state_file
+    assert breaker.threshold == 5
+    assert breaker.reset_timeout == 300
+    assert get_circuit_breaker() is breaker
@@ -0,0 +1,82 @@
+"""
+Test the config cache
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from fotoobo.fortinet.config_cache import ConfigCache, get_config_cache
+from fotoobo.fortinet.fortigate_config import FortiGateConfig
+from fotoobo.tools.fgt.config import get
+
+
+def test_parse_from_cache(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test unchanged configurations are loaded from the cache instead of being parsed"""
+    config_file = tmp_path / "fgt.conf"
+    shutil.copy("tests/data/fortigate_config_vdom.conf", config_file)
+    expected = FortiGateConfig.parse_configuration_file(config_file)
+
+    with ConfigCache(tmp_path / "cache") as cache:
+        assert cache.parse(config_file).vdom_config == expected.vdom_config
+        assert (cache.hits, cache.misses) == (0, 1)
+
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate_config.FortiGateConfig.parse_configuration_file",
+        MagicMock(side_effect=AssertionError("parsed again")),
+    )
+    with ConfigCache(tmp_path / "cache") as cache:
+        fortigate_config = cache.parse(config_file)
+        assert fortigate_config.vdom_config == expected.vdom_config
+        assert fortigate_config.global_config == expected.global_config
+        assert fortigate_config.info.__dict__ == expected.info.__dict__
+        assert (cache.hits, cache.misses) == (1, 0)
+
+        # the same content with another mtime is taken from the cache too
+        os.utime(config_file, ns=(0, 0))
+        assert cache.parse(config_file).vdom_config == expected.vdom_config
+        assert cache.hits == 2
+
+    index = json.loads((tmp_path / "cache" / "index.json").read_text(encoding="UTF-8"))
+    assert index["files"][str(config_file.resolve())][1] == 0
+
+
+def test_parse_changed(tmp_path: Path) -> None:
+    """Test a changed configuration is parsed again and its former parsed config is removed"""
+    config_file = tmp_path / "fgt.conf"
+    shutil.copy("tests/data/fortigate_config_single.conf", config_file)
+    with ConfigCache(tmp_path / "cache") as cache:
+        cache.parse(config_file)
+        shutil.copy("tests/data/fortigate_config_vdom.conf", config_file)
+        assert cache.parse(config_file).info.vdom == "1"
+        assert (cache.hits, cache.misses) == (0, 2)
+
+    assert len(list((tmp_path / "cache").glob("*.json.z"))) == 1
+
+
+def test_parse_invalid_cache(tmp_path: Path) -> None:
+    """Test an invalid cache is ignored"""
+    config_file = tmp_path / "fgt.conf"
+    shutil.copy("tests/data/fortigate_config_single.conf", config_file)
+    with ConfigCache(tmp_path) as cache:
+        cache.parse(config_file)
+
+    for cache_file in tmp_path.glob("*.json*"):
+        cache_file.write_text("invalid", encoding="UTF-8")
+
+    with ConfigCache(tmp_path) as cache:
+        assert cache.parse(config_file).info.vdom == "0"
+        assert cache.misses == 1
+
+
+def test_get_config_cache(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test the config cache is only used if it is configured"""
+    assert not get_config_cache().cache_dir
+    monkeypatch.setattr("fotoobo.helpers.config.config.config_cache", {"dir": str(tmp_path)})
+    assert get_config_cache().cache_dir == tmp_path
+    get(Path("tests/data/fortigate_config_single.conf"), "global", "/system")
+    assert (tmp_path / "index.json").is_file()
@@ -0,0 +1,68 @@
+"""
+Test the ConfigNode class
+"""
+
+from typing import Any, Dict, Tuple
+
+import pytest
+
+from fotoobo.fortinet.config_node import ConfigNode
+
+CONFIG: Dict[str, Any] = {
+    "option_1": "value_1",
+    "table": [{"name": "a", "id": 1}, {"name": "b", "id": 2}],
+    "nested": {"option_2": "a long value which is not interned", "empty": {}},
+}
+
+
+def test_compact_and_expand() -> None:
+    """Test a compact configuration expands to the same dicts and lists"""
+    shared_keys: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+    node = ConfigNode.compact(CONFIG, shared_keys)
+    assert isinstance(node, ConfigNode)
+    assert isinstance(node["table"], tuple)
+    assert node["table"][0]._keys is node["table"][1]._keys  # pylint: disable=protected-access
+    assert ConfigNode.expand(node) == CONFIG
+    assert ConfigNode.expand(node["table"]) == CONFIG["table"]
+    assert ConfigNode.expand("value") == "value"
+    assert ConfigNode.compact(node, shared_keys) is node
+
+
+def test_mapping() -> None:
+    """Test a node behaves like a read-only dict"""
+    node = ConfigNode.compact(CONFIG, {})
+    assert "option_1" in node
+    assert "option_9" not in node
+    assert node["option_1"] == "value_1"
+    assert node.get("option_9") is None
+    assert list(node) == list(CONFIG)
+    assert len(node) == 3
+    assert not ConfigNode.compact({}, {})
+    assert node["nested"] == CONFIG["nested"]
+    assert repr(node["nested"]["empty"]) == "ConfigNode({})"
+    with pytest.raises(KeyError, match="option_9"):
+        _ = node["option_9"]
+
+
+def test_expand_deep() -> None:
+    """Test a configuration deeper than the recursion limit is expanded"""
+    depth = 5000
+    node: Any = ConfigNode(("option_1",), ("value_1",))
+    for _ in range(depth):
+        node = ConfigNode(("leaf",), (node,))
+
+    config = ConfigNode.expand(node)
+    for _ in range(depth):
+        config = config["leaf"]
+
+    assert config == {"option_1": "value_1"}
+
+
+def test_children() -> None:
+    """Test the children of dicts, nodes and lists"""
+    node = ConfigNode.compact(CONFIG, {})
+    assert list(ConfigNode.children(node)) == list(node.items())
+    assert list(ConfigNode.children(CONFIG["nested"])) == list(CONFIG["nested"].items())
+    assert [_[0] for _ in ConfigNode.children(node["table"])] == ["1", "2"]
+    assert list(ConfigNode.children(["a", "b"])) == [("0", "a"), ("1", "b")]
+    assert not list(ConfigNode.children("value"))
@@ -45,6 +45,7 @@ class TestFortiAnalyzer:
             headers=None,
             json={"method": "get", "params": [{"url": "/sys/status"}], "session": ""},
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
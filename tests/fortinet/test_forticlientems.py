@@ -24,7 +24,7 @@ class TestFortiClientEMS:
     def test_login_without_cookie(monkeypatch: MonkeyPatch) -> None:
         """Test the login to a FortiClient EMS with no session cookie given"""
         monkeypatch.setattr(
-            "fotoobo.fortinet.forticlientems.requests.Session.post",
+            "fotoobo.fortinet.fortinet.requests.Session.post",
             MagicMock(
                 return_value=ResponseMock(
                     headers={"Set-Cookie": "csrftoken=dummy_csrf_token;"},
@@ -43,7 +43,7 @@ class TestFortiClientEMS:
     def test_login_with_valid_cookie(monkeypatch: MonkeyPatch) -> None:
         """Test the login to a FortiClient EMS with valid session cookie path given"""
         monkeypatch.setattr(
-            "fotoobo.fortinet.forticlientems.requests.Session.get",
+            "fotoobo.fortinet.fortinet.requests.Session.get",
             MagicMock(
                 return_value=ResponseMock(
                     json={"result": {"retval": 1, "message": "Login successful."}}, status_code=200
@@ -62,7 +62,7 @@ class TestFortiClientEMS:
     def test_login_with_invalid_cookie(monkeypatch: MonkeyPatch, temp_dir: Path) -> None:
         """Test the login to a FortiClient EMS with invalid session cookie given"""
         monkeypatch.setattr(
-            "fotoobo.fortinet.forticlientems.requests.Session.get",
+            "fotoobo.fortinet.fortinet.requests.Session.get",
             MagicMock(
                 return_value=ResponseMock(
                     json={
@@ -76,7 +76,7 @@ class TestFortiClientEMS:
             ),
         )
         monkeypatch.setattr(
-            "fotoobo.fortinet.forticlientems.requests.Session.post",
+            "fotoobo.fortinet.fortinet.requests.Session.post",
             MagicMock(
                 return_value=ResponseMock(
                     headers={"Set-Cookie": "csrftoken=dummy_csrf_token;"},
@@ -106,7 +106,7 @@ class TestFortiClientEMS:
         """Test the login to a FortiClient EMS with no session cookie when cookie enabled which
         cannot be saved."""
         monkeypatch.setattr(
-            "fotoobo.fortinet.forticlientems.requests.Session.post",
+            "fotoobo.fortinet.fortinet.requests.Session.post",
             MagicMock(
                 return_value=ResponseMock(
                     headers={"Set-Cookie": "csrftoken=dummy_csrf_token;"},
@@ -140,6 +140,7 @@ class TestFortiClientEMS:
             },
             json={"name": "dummy_user", "password": "dummy_pass"},
             params=None,
+            stream=False,
             timeout=3,
             verify=False,
         )
@@ -150,11 +151,11 @@ class TestFortiClientEMS:
     ) -> None:
         """Test the login to a FortiClient EMS with a session cookie but invalid session"""
         monkeypatch.setattr(
-            "fotoobo.fortinet.forticlientems.requests.Session.get",
+            "fotoobo.fortinet.fortinet.requests.Session.get",
             MagicMock(return_value=ResponseMock(status_code=401)),
         )
         monkeypatch.setattr(
-            "fotoobo.fortinet.forticlientems.requests.Session.post",
+            "fotoobo.fortinet.fortinet.requests.Session.post",
             MagicMock(
                 return_value=ResponseMock(
                     headers={"Set-Cookie": "csrftoken=dummy_csrf_token;"},
@@ -188,6 +189,7 @@ class TestFortiClientEMS:
             },
             json=None,
             params=None,
+            stream=False,
             timeout=3,
             verify=False,
         )
@@ -203,6 +205,7 @@ class TestFortiClientEMS:
             },
             json={"name": "dummy_user", "password": "dummy_pass"},
             params=None,
+            stream=False,
             timeout=3,
             verify=False,
         )
@@ -295,6 +298,7 @@ class TestFortiClientEMS:
             headers=ANY,
             json=None,
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
@@ -319,6 +323,7 @@ class TestFortiClientEMS:
             headers=ANY,
             json=None,
             params=None,
+            stream=False,
             timeout=3,
             verify=False,
         )
@@ -2,15 +2,17 @@
 """
 Test the FortiGate class
 """
-from typing import Dict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
 
 # pylint: disable=no-member
 from unittest.mock import MagicMock
 
 import pytest
+import requests
 from _pytest.monkeypatch import MonkeyPatch
 
-from fotoobo.exceptions import GeneralWarning
+from fotoobo.exceptions import GeneralError, GeneralWarning
 from fotoobo.fortinet.fortigate import FortiGate
 from fotoobo.fortinet.fortinet import Fortinet
 from tests.helper import ResponseMock
@@ -41,7 +43,15 @@ class TestFortiGate:
         assert fortigate.api("get", "dummy").json() == {"key": "value"}
         assert fortigate.session.headers["Authorization"] == "Bearer token"
         Fortinet.api.assert_called_with(
-            "get", "dummy", payload=None, params=None, timeout=None, headers=None
+            "get",
+            "dummy",
+            payload=None,
+            params=None,
+            timeout=None,
+            headers=None,
+            retry=None,
+            stream=False,
+            use_cache=True,
         )
 
     def test_api_get(self, monkeypatch: MonkeyPatch) -> None:
@@ -57,6 +67,125 @@ class TestFortiGate:
             method="get", url="/test/dummy/fake", params={"vdom": "*"}, timeout=None
         )
 
+    @staticmethod
+    def test_api_get_paged(monkeypatch: MonkeyPatch) -> None:
+        """Test the FortiGate api_get_paged method requests the unfinished VDOMs only"""
+        responses = [
+            ResponseMock(
+                json=[
+                    {"vdom": "root", "results": [1, 2]},
+                    {"vdom": "vdom_1", "results": [1]},
+                    {"vdom": "vdom_2", "results": [1, 2]},
+                ],
+                status_code=200,
+            ),
+            ResponseMock(
+                json=[{"vdom": "root", "results": [3]}, {"vdom": "vdom_2", "results": [3, 4]}],
+                status_code=200,
+            ),
+            ResponseMock(json={"vdom": "vdom_2", "results": []}, status_code=200),
+        ]
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortigate.FortiGate.api", MagicMock(side_effect=responses)
+        )
+        fortigate = FortiGate("dummy_hostname", "token", page_size=2)
+        pages = fortigate.api_get_paged("/cmdb/dummy", timeout=5)
+        assert [(_["vdom"], _["results"]) for _ in pages] == [
+            ("root", [1, 2]),
+            ("vdom_1", [1]),
+            ("vdom_2", [1, 2]),
+            ("root", [3]),
+            ("vdom_2", [3, 4]),
+            ("vdom_2", []),
+        ]
+        assert [_.kwargs["params"] for _ in FortiGate.api.call_args_list] == [
+            {"vdom": "*", "start": "0", "count": "2"},
+            {"vdom": "root,vdom_2", "start": "2", "count": "2"},
+            {"vdom": "vdom_2", "start": "4", "count": "2"},
+        ]
+        assert FortiGate.api.call_args.kwargs["timeout"] == 5
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "results",
+        (
+            pytest.param([[1, 2, 3]], id="more than page_size"),
+            pytest.param([[1, 2], [1, 2]], id="repeated page"),
+        ),
+    )
+    def test_api_get_paged_ignored(results: List[List[int]], monkeypatch: MonkeyPatch) -> None:
+        """Test the FortiGate api_get_paged method stops if the FortiGate ignores the paging"""
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortigate.FortiGate.api",
+            MagicMock(
+                side_effect=[
+                    ResponseMock(json={"vdom": "root", "results": _}, status_code=200)
+                    for _ in results
+                ]
+            ),
+        )
+        log = MagicMock()
+        monkeypatch.setattr("fotoobo.fortinet.fortigate.log", log)
+        fortigate = FortiGate("dummy_hostname", "token", page_size=2)
+        pages = list(fortigate.api_get_paged("/cmdb/dummy", vdom="root"))
+        assert pages == [{"vdom": "root", "results": results[0]}]
+        assert FortiGate.api.call_count == len(results)
+        log.warning.assert_called_once_with(
+            "FortiGate '%s' ignores the paging of '%s' in VDOM '%s'",
+            "dummy_hostname",
+            "/cmdb/dummy",
+            "root",
+        )
+
+    @staticmethod
+    def test_api_get_paged_error(monkeypatch: MonkeyPatch) -> None:
+        """Test the FortiGate api_get_paged method stops on a page without results"""
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortigate.FortiGate.api",
+            MagicMock(return_value=ResponseMock(json={"status": "error"}, status_code=200)),
+        )
+        fortigate = FortiGate("dummy_hostname", "token")
+        assert list(fortigate.api_get_paged("/cmdb/dummy", vdom="root", page_size=1)) == [
+            {"status": "error"}
+        ]
+        FortiGate.api.assert_called_once()
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "members, expected",
+        (
+            pytest.param(
+                [
+                    {"is_root_master": 0, "checksum": {"all": "secondary"}},
+                    {"is_root_master": 1, "checksum": {"all": "primary"}},
+                ],
+                "primary",
+                id="cluster",
+            ),
+            pytest.param([{"checksum": {"all": "standalone"}}], "standalone", id="standalone"),
+        ),
+    )
+    def test_get_config_checksum(
+        members: List[Dict[str, Any]], expected: str, monkeypatch: MonkeyPatch
+    ) -> None:
+        """Test the FortiGate get_config_checksum method"""
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortigate.FortiGate.api",
+            MagicMock(return_value=ResponseMock(json={"results": members}, status_code=200)),
+        )
+        assert FortiGate("dummy_hostname", "").get_config_checksum() == expected
+        FortiGate.api.assert_called_with("get", "monitor/system/ha-checksums")
+
+    @staticmethod
+    def test_get_config_checksum_invalid(monkeypatch: MonkeyPatch) -> None:
+        """Test the FortiGate get_config_checksum method without a checksum in the response"""
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortigate.FortiGate.api",
+            MagicMock(return_value=ResponseMock(json={"results": []}, status_code=200)),
+        )
+        with pytest.raises(GeneralWarning, match=r"No config checksum from 'dummy_hostname'"):
+            FortiGate("dummy_hostname", "").get_config_checksum()
+
     @staticmethod
     def test_backup(monkeypatch: MonkeyPatch) -> None:
         """Test the FortiGate backup method"""
@@ -69,6 +198,89 @@ class TestFortiGate:
             "get", "monitor/system/config/backup", params={"scope": "global"}, timeout=66
         )
 
+    @staticmethod
+    def test_backup_to_file(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+        """Test the FortiGate backup_to_file method writes the chunks into the file"""
+        response = MagicMock()
+        response.iter_content.return_value = iter([b"#con", b"fig-version\n", b"config end\n"])
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortigate.FortiGate.api", MagicMock(return_value=response)
+        )
+        backup_file = tmp_path / "dummy.conf"
+        assert FortiGate("dummy_hostname", "").backup_to_file(backup_file, chunk_size=4) == 27
+        assert backup_file.read_bytes() == b"#config-version\nconfig end\n"
+        assert not list(tmp_path.glob(".*.tmp"))
+        FortiGate.api.assert_called_with(
+            "get",
+            "monitor/system/config/backup",
+            params={"scope": "global"},
+            timeout=10,
+            stream=True,
+        )
+        response.iter_content.assert_called_with(4)
+        response.close.assert_called_once()
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "chunks, expected",
+        (
+            pytest.param([b'{"http_status": ', b"456}"], "'456'", id="http status"),
+            pytest.param([b"dummy"], "'invalid backup'", id="invalid"),
+            pytest.param([], "'invalid backup'", id="empty"),
+        ),
+    )
+    def test_backup_to_file_invalid(
+        chunks: List[bytes], expected: str, monkeypatch: MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Test the FortiGate backup_to_file method keeps the existing file on an invalid backup"""
+        response = MagicMock()
+        response.iter_content.return_value = iter(chunks)
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortigate.FortiGate.api", MagicMock(return_value=response)
+        )
+        backup_file = tmp_path / "dummy.conf"
+        backup_file.write_text("previous backup", encoding="UTF-8")
+        with pytest.raises(GeneralWarning, match=expected):
+            FortiGate("dummy_hostname", "").backup_to_file(backup_file)
+
+        assert backup_file.read_text(encoding="UTF-8") == "previous backup"
+        response.close.assert_called_once()
+
+    @staticmethod
+    def test_backup_to_file_interrupted(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+        """Test the FortiGate backup_to_file method removes an incomplete backup"""
+
+        def iter_content(chunk_size: int) -> Iterator[bytes]:  # pylint: disable=unused-argument
+            yield b"#config-version\n"
+            raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+        response = MagicMock()
+        response.iter_content.side_effect = iter_content
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortigate.FortiGate.api", MagicMock(return_value=response)
+        )
+        backup_file = tmp_path / "dummy.conf"
+        with pytest.raises(GeneralError, match="interrupted: connection broken"):
+            FortiGate("dummy_hostname", "").backup_to_file(backup_file)
+
+        assert not list(tmp_path.iterdir())
+
+    @staticmethod
+    def test_backup_to_file_deadline(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+        """Test the FortiGate backup_to_file method stops when the deadline has passed"""
+        response = MagicMock()
+        response.iter_content.return_value = iter([b"#config-version\n", b"config end\n"])
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortigate.FortiGate.api", MagicMock(return_value=response)
+        )
+        monkeypatch.setattr("fotoobo.helpers.fanout.remaining_time", MagicMock(return_value=0))
+        backup_file = tmp_path / "dummy.conf"
+        with pytest.raises(GeneralError, match=r"Deadline exceeded \(dummy_hostname\)"):
+            FortiGate("dummy_hostname", "").backup_to_file(backup_file)
+
+        assert not list(tmp_path.iterdir())
+        response.close.assert_called_once()
+
     @staticmethod
     @pytest.mark.parametrize(
         "response, expected",
@@ -2,11 +2,15 @@
 Test the FortiGate config class
 """
 
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 import pytest
 
+from fotoobo.exceptions import GeneralWarning
+from fotoobo.fortinet.config_node import ConfigNode
 from fotoobo.fortinet.fortigate_config import FortiGateConfig
 
 
@@ -59,11 +63,212 @@ class TestFortiGateConfigGeneral:
     @staticmethod
     def test_parse_to_dict_empty(conf_file_empty: Path) -> None:
         """Test the _parse_to_dict method with empty file"""
-        FortiGateConfig._config_path = []  # only needed as long as _config_path is not thread-safe
         with conf_file_empty.open(encoding="UTF-8") as forti_file:
             config = FortiGateConfig._parse_to_dict(forti_file)
         assert not config
 
+    @staticmethod
+    def test_parse_to_dict_deep() -> None:
+        """Test the _parse_to_dict method with a nesting deeper than the recursion limit"""
+        depth = 5000
+        lines = [f"config leaf_{_}" for _ in range(depth)] + ["set option_1 value_1"]
+        config = FortiGateConfig._parse_to_dict(lines + ["end"] * depth)
+        for _ in range(depth):
+            config = config[f"leaf_{_}"]
+
+        assert config == {"option_1": "value_1"}
+
+    @staticmethod
+    def test_parse_configuration_file_concurrent(
+        conf_file_single: Path, conf_file_vdom: Path
+    ) -> None:
+        """Test several configurations may be parsed at the same time"""
+        files = [conf_file_single, conf_file_vdom] * 20
+        expected = [FortiGateConfig.parse_configuration_file(_).vdom_config for _ in files[:2]]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            configs = list(executor.map(FortiGateConfig.parse_configuration_file, files))
+
+        assert [_.vdom_config for _ in configs] == expected * 20
+
+    @staticmethod
+    @pytest.mark.parametrize("source", ("single", "vdom"))
+    @pytest.mark.parametrize("hostname", (None, 'set hostname "fgt 1"'))
+    def test_parse_configuration_info(source: str, hostname: Optional[str], tmp_path: Path) -> None:
+        """Test the parse_configuration_info method gives the info of a full parse"""
+        config_file = Path(f"tests/data/fortigate_config_{source}.conf")
+        if hostname:
+            content = config_file.read_text(encoding="UTF-8").replace(
+                "config system global\n", f"config system global\n    {hostname}\n"
+            )
+            config_file = tmp_path / "fgt.conf"
+            config_file.write_text(content, encoding="UTF-8")
+
+        info = FortiGateConfig.parse_configuration_info(config_file)
+        assert vars(info) == vars(FortiGateConfig.parse_configuration_file(config_file).info)
+        assert info.hostname == ("fgt 1" if hostname else "HOSTNAME UNKNOWN")
+
+    @staticmethod
+    def test_parse_configuration_info_empty(conf_file_empty: Path) -> None:
+        """Test the parse_configuration_info method with empty file"""
+        with pytest.raises(GeneralWarning, match=r"There is no info in"):
+            FortiGateConfig.parse_configuration_info(conf_file_empty)
+
+    @staticmethod
+    @pytest.mark.parametrize("source", ("single", "vdom"))
+    def test_parse_configuration_file_paths(source: str) -> None:
+        """Test the parse_configuration_file method parses only the given paths"""
+        config_file = Path(f"tests/data/fortigate_config_{source}.conf")
+        full = FortiGateConfig.parse_configuration_file(config_file)
+        config = FortiGateConfig.parse_configuration_file(
+            config_file, ["/leaf_81/leaf_83/name_1", "/leaf_11/leaf_12/option_1"]
+        )
+        assert config.global_config == {
+            "system": {"global": full.global_config["system"]["global"]}
+        }
+        assert config.get_vdoms() == full.get_vdoms()
+        assert config.vdom_config["root"] == {
+            "leaf_81": {"leaf_83": {"name_1": {"option_1": "value_1"}}},
+            "leaf_11": full.vdom_config["root"]["leaf_11"],
+        }
+        assert vars(config.info) == vars(full.info)
+        config = FortiGateConfig.parse_configuration_file(config_file, ["/"])
+        assert config.vdom_config == full.vdom_config
+
+    @staticmethod
+    @pytest.mark.parametrize("source", ("single", "vdom"))
+    def test_parse_configuration_file_compact(source: str, tmp_path: Path) -> None:
+        """Test a compact configuration gives the same configuration as a dict tree"""
+        config_file = Path(f"tests/data/fortigate_config_{source}.conf")
+        full = FortiGateConfig.parse_configuration_file(config_file)
+        config = FortiGateConfig.parse_configuration_file(config_file, compact=True)
+        assert isinstance(config.vdom_config, ConfigNode)
+        for scope, path in (("global", "/"), ("vdom", "/"), ("vdom", "/root/leaf_81/leaf_82")):
+            assert config.get_configuration(scope, path) == full.get_configuration(scope, path)
+
+        assert config.get_vdoms() == full.get_vdoms()
+        assert vars(config.info) == vars(full.info)
+        config.save_configuration_file(tmp_path / "config.json")
+        loaded = FortiGateConfig.load_configuration_file(tmp_path / "config.json")
+        assert loaded.vdom_config == full.vdom_config
+
+    @staticmethod
+    def test_parse_configuration_file_compact_memory(tmp_path: Path) -> None:
+        """Test a compact configuration needs less than half the memory of a dict tree"""
+        config_file = tmp_path / "fgt.conf"
+        with config_file.open("w", encoding="UTF-8") as file:
+            file.write("#config-version=FGT999-9.9.9-FW-build8303-210217:opmode=0:vdom=0\n")
+            file.write('config system global\n    set hostname "fgt"\nend\n')
+            file.write("config firewall address\n")
+            for index in range(2000):
+                file.write(
+                    f'    edit "obj{index}"\n        set uuid {index:032x}\n'
+                    f"        set type ipmask\n        set subnet 10.0.{index % 256}.0 "
+                    "255.255.255.0\n        set associated-interface port1\n    next\n"
+                )
+
+            file.write("end\n")
+
+        sizes = []
+        for compact in (False, True):
+            tracemalloc.start()
+            config = FortiGateConfig.parse_configuration_file(config_file, compact=compact)
+            sizes.append(tracemalloc.get_traced_memory()[0])
+            tracemalloc.stop()
+
+        assert config.get_configuration("vdom", "/root/firewall/address/obj7/uuid") == f"{7:032x}"
+        assert sizes[1] < sizes[0] / 2
+
+    @staticmethod
+    @pytest.mark.parametrize("compact", (False, True))
+    @pytest.mark.parametrize(
+        "scope, pattern, expected",
+        (
+            pytest.param(
+                "vdom",
+                "/*/leaf_81/leaf_82/*/option_1",
+                [
+                    ("/root/leaf_81/leaf_82/1/option_1", "value_1"),
+                    ("/root/leaf_81/leaf_82/2/option_1", "value_1"),
+                ],
+                id="wildcard vdoms and list elements",
+            ),
+            pytest.param(
+                "vdom",
+                "*/leaf_n",
+                [("/vdom_n/leaf_n", {"option_n": "value_n"})],
+                id="wildcard vdoms",
+            ),
+            pytest.param(
+                "vdom",
+                "/root/leaf_81/leaf_82/2",
+                [("/root/leaf_81/leaf_82/2", {"option_1": "value_1", "id": 2})],
+                id="list element by id",
+            ),
+            pytest.param(
+                "global",
+                "/system/global/option_2",
+                [("/system/global/option_2", "value_2")],
+                id="leaf",
+            ),
+            pytest.param(
+                "global",
+                "/",
+                [
+                    (
+                        "/",
+                        {
+                            "system": {
+                                "global": {
+                                    "option_1": "value_1",
+                                    "option_2": "value_2",
+                                    "option_3": "3",
+                                }
+                            }
+                        },
+                    )
+                ],
+                id="root",
+            ),
+            pytest.param("global", "/system/global/option_2/*", [], id="below leaf"),
+            pytest.param("vdom", "/*/leaf_99", [], id="no match"),
+        ),
+    )
+    def test_query(
+        scope: str,
+        pattern: str,
+        expected: List[Tuple[str, Any]],
+        compact: bool,
+        conf_file_vdom: Path,
+    ) -> None:
+        """Test the query method"""
+        config = FortiGateConfig.parse_configuration_file(conf_file_vdom, compact=compact)
+        assert config.query(scope, pattern) == expected
+        assert config.query(scope, pattern) == expected  # from the index of the first query
+
+    @staticmethod
+    def test_skip_block() -> None:
+        """Test the _skip_block method skips nested blocks and multiline strings"""
+        lines = iter(
+            [
+                "edit 1",
+                'set comment "multiline',
+                "end",
+                'next"',
+                "next",
+                "end",
+                "config next",
+            ]
+        )
+        FortiGateConfig._skip_block(lines)
+        assert list(lines) == ["config next"]
+
+    @staticmethod
+    def test_find_hostname() -> None:
+        """Test the _find_hostname method stops at the end of the block and skips nested blocks"""
+        lines = ["config nested", "set hostname nested", "end", 'set hostname "fgt"', "end"]
+        assert FortiGateConfig._find_hostname(lines) == "fgt"
+        assert FortiGateConfig._find_hostname(["end", "set hostname fgt"]) is None
+
 
 class TestFortiGateConfigSingle:
     # pylint: disable=protected-access, redefined-outer-name
@@ -129,7 +334,6 @@ class TestFortiGateConfigSingle:
     @staticmethod
     def test_parse_to_dict(conf_file_single: Path) -> None:
         """Test the _parse_to_dict method with dummy file"""
-        FortiGateConfig._config_path = []  # only needed as long as _config_path is not thread-safe
         with conf_file_single.open(encoding="UTF-8") as forti_file:
             config = FortiGateConfig._parse_to_dict(forti_file)
 
@@ -236,7 +440,6 @@ class TestFortiGateConfigVDOM:
     @staticmethod
     def test_parse_to_dict(conf_file_vdom: Path) -> None:
         """Test the _parse_to_dict method with dummy file"""
-        FortiGateConfig._config_path = []  # only needed as long as _config_path is not thread-safe
         with conf_file_vdom.open(encoding="UTF-8") as forti_file:
             config = FortiGateConfig._parse_to_dict(forti_file)
 
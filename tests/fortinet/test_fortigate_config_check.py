@@ -62,6 +62,114 @@ class TestFortiGateConfigCheck:
         conf_check.execute_checks()
         assert len(result.get_messages(config.info.hostname)) == 2
 
+    @staticmethod
+    @pytest.mark.parametrize("source", ("single", "vdom"))
+    def test_check_config_paths(source: str, checks_file: Path) -> None:
+        """Do a configuration check with only the parts of the configuration the checks need"""
+        checks = load_yaml_file(checks_file)
+        conf_file = Path(f"tests/data/fortigate_config_{source}.conf")
+        full, partial = Result[Any](), Result[Any]()
+        FortiGateConfigCheck(
+            FortiGateConfig.parse_configuration_file(conf_file), checks, full
+        ).execute_checks()
+        config = FortiGateConfig.parse_configuration_file(
+            conf_file, FortiGateConfigCheck.get_paths(checks)
+        )
+        FortiGateConfigCheck(config, checks, partial).execute_checks()
+        assert partial.messages == full.messages
+        assert "leaf_1" not in config.vdom_config["root"]
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "check",
+        (
+            pytest.param(
+                {
+                    "type": "exist",
+                    "scope": "vdom",
+                    "path": "/leaf_81",
+                    "filter-config": {"/root/leaf_2/option_1": "value_1"},
+                    "checks": {"option_91": True, "option_92": True, "option_93": True},
+                },
+                id="vdom filter",
+            ),
+            pytest.param(
+                {
+                    "type": "exist",
+                    "scope": "global",
+                    "path": "/system/global",
+                    "filter-config": {"/system/global/option_1": "value_1"},
+                    "checks": {"option_91": True},
+                },
+                id="global filter",
+            ),
+        ),
+    )
+    def test_check_config_paths_filter(check: Dict[str, Any], conf_file_vdom: Path) -> None:
+        """Do a filtered configuration check with only the parts of the configuration it needs"""
+        full, partial = Result[Any](), Result[Any]()
+        FortiGateConfigCheck(
+            FortiGateConfig.parse_configuration_file(conf_file_vdom), [check], full
+        ).execute_checks()
+        FortiGateConfigCheck(
+            FortiGateConfig.parse_configuration_file(
+                conf_file_vdom, FortiGateConfigCheck.get_paths([check])
+            ),
+            [check],
+            partial,
+        ).execute_checks()
+        assert full.messages
+        assert partial.messages == full.messages
+
+    @staticmethod
+    def test_get_paths() -> None:
+        """Test the paths of the checks and their filters"""
+        checks = [
+            {"path": "/system/global", "filter-config": {"/system/settings/opmode": "nat"}},
+            {"path": "/firewall/policy"},
+            {"path": "/system/global"},
+            {"name": "no path"},
+        ]
+        assert FortiGateConfigCheck.get_paths(checks) == [
+            "/firewall/policy",
+            "/system/global",
+            "/system/settings/opmode",
+        ]
+        assert not FortiGateConfigCheck.get_paths(None)
+        assert FortiGateConfigCheck.get_paths([{"path": "/firewall/policy/*/srcaddr"}]) == [
+            "/firewall/policy/"
+        ]
+        assert FortiGateConfigCheck.get_paths(
+            [{"scope": "vdom", "path": "/leaf_2", "filter-config": {"/root/leaf_2/option_1": 1}}]
+        ) == ["/leaf_2", "/leaf_2/option_1"]
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "path, value, expected_messages_count",
+        (
+            pytest.param("/leaf_81/leaf_82/*", "value_1", 0, id="all elements ok"),
+            pytest.param("/leaf_81/leaf_82/*", "value_2", 2, id="all elements failed"),
+            pytest.param("/leaf_81/leaf_82/2", "value_2", 1, id="element by id failed"),
+            pytest.param("/leaf_81/leaf_99/*", "value_2", 0, id="no match"),
+        ),
+    )
+    def test_check_config_wildcard(
+        path: str, value: str, expected_messages_count: int, config_vdom: FortiGateConfig
+    ) -> None:
+        """Do a configuration check with a path with wildcards on every VDOM"""
+        checks = [
+            {
+                "type": "value",
+                "scope": "vdom",
+                "path": path,
+                "checks": {"option_1": value},
+                "ignore_missing": True,  # the path is only in VDOM root
+            }
+        ]
+        result = Result[Any]()
+        FortiGateConfigCheck(config_vdom, checks, result).execute_checks()
+        assert len(result.get_messages(config_vdom.info.hostname)) == expected_messages_count
+
     # start generic tests for config_check with invalid check definition
 
     @staticmethod
@@ -11,7 +11,7 @@ import pytest
 import requests
 from _pytest.monkeypatch import MonkeyPatch
 
-from fotoobo.exceptions import APIError
+from fotoobo.exceptions import APIError, GeneralError
 from fotoobo.fortinet.fortimanager import FortiManager
 from tests.helper import ResponseMock
 
@@ -74,6 +74,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
             headers=None,
             json={"method": "delete", "params": [{"url": url}], "session": ""},
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
@@ -125,6 +126,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
                     "session": "",
                 },
                 "params": None,
+                "stream": False,
                 "timeout": 3,
                 "verify": True,
             },
@@ -144,6 +146,58 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
             assert fmg.api_get(url).json()["result"][0]["status"]["code"] == 0
             requests.Session.post.assert_called_with(*expected_call[0], **expected_call[1])
 
+    @staticmethod
+    @pytest.mark.parametrize(
+        "rpc_method, expected_calls",
+        (
+            pytest.param("get", 2, id="JSON-RPC get is retried"),
+            pytest.param("exec", 1, id="JSON-RPC exec is not retried"),
+        ),
+    )
+    def test_api_retry(rpc_method: str, expected_calls: int, monkeypatch: MonkeyPatch) -> None:
+        """Test only idempotent JSON-RPC requests are retried"""
+        monkeypatch.setattr("fotoobo.fortinet.fortinet.sleep", MagicMock())
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.post",
+            MagicMock(
+                side_effect=[
+                    requests.exceptions.ReadTimeout(),
+                    ResponseMock(json={"result": []}, status_code=200),
+                ]
+            ),
+        )
+        fmg = FortiManager("host", "", "", retry={"attempts": 2})
+        fmg.session_key = "dummy_session_key"
+        try:
+            fmg.api("post", payload={"method": rpc_method, "params": [{"url": "/dummy"}]})
+
+        except GeneralError:
+            pass
+
+        assert requests.Session.post.call_count == expected_calls
+        fmg.session_key = ""
+
+    @staticmethod
+    def test_api_invalid_session(monkeypatch: MonkeyPatch) -> None:
+        """Test the request is sent again with a new session if the session has expired"""
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.post",
+            MagicMock(
+                side_effect=[
+                    ResponseMock(json={"result": [{"status": {"code": -11}}]}, status_code=200),
+                    ResponseMock(json={"session": "new_session_key"}, status_code=200),
+                    ResponseMock(json={"result": [{"status": {"code": 0}}]}, status_code=200),
+                ]
+            ),
+        )
+        fmg = FortiManager("host", "user", "pass")
+        fmg.session_key = "expired_session_key"
+        response = fmg.api("post", payload={"method": "get", "params": [{"url": "/dummy"}]})
+        assert response.json()["result"][0]["status"]["code"] == 0
+        assert requests.Session.post.call_count == 3
+        assert requests.Session.post.call_args.kwargs["json"]["session"] == "new_session_key"
+        fmg.session_key = ""
+
     @staticmethod
     def test_assign_all_objects(monkeypatch: MonkeyPatch) -> None:
         """Test assign_all_objects"""
@@ -183,6 +237,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
                 "session": "",
             },
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
@@ -216,6 +271,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
                 "session": "",
             },
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
@@ -262,6 +318,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
                 "session": "",
             },
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
@@ -571,6 +628,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
             headers=None,
             json={"method": "get", "params": [{"url": "/dvmdb/adom"}], "session": ""},
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
@@ -726,6 +784,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
             headers=None,
             json={"method": "get", "params": [{"url": "/sys/status"}], "session": ""},
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
@@ -758,6 +817,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
                 "params": [{"data": {"passwd": "pass", "user": "user"}, "url": "/sys/login/user"}],
             },
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
@@ -796,6 +856,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
                 "session": "dummy_session_key",
             },
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
@@ -835,6 +896,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
                 "params": [{"data": {"passwd": "pass", "user": "user"}, "url": "/sys/login/user"}],
             },
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
@@ -874,10 +936,22 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
                 "params": [{"data": {"passwd": "pass", "user": "user"}, "url": "/sys/login/user"}],
             },
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
 
+    @staticmethod
+    def test_logout_keep_alive(monkeypatch: MonkeyPatch) -> None:
+        """Test the logout of a FortiManager keeps the session alive in the daemon"""
+        monkeypatch.setattr("fotoobo.fortinet.fortinet.requests.Session.post", MagicMock())
+        fortimanager = FortiManager("host", "user", "pass")
+        fortimanager.session_key = "dummy_session_key"
+        fortimanager.keep_alive = True
+        assert fortimanager.logout() == 200
+        assert fortimanager.session_key == "dummy_session_key"
+        requests.Session.post.assert_not_called()
+
     @staticmethod
     def test_logout(monkeypatch: MonkeyPatch) -> None:
         """Test the logout of a FortiManager"""
@@ -905,6 +979,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
                 "session": "dummy_session_key",
             },
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
@@ -926,6 +1001,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
             headers=None,
             json={"params": [{"url": "adom/ADOM"}], "session": ""},
             params=None,
+            stream=False,
             timeout=10,
             verify=True,
         )
@@ -947,6 +1023,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
             headers=None,
             json={"params": [{"url": "adom/ADOM"}], "session": ""},
             params=None,
+            stream=False,
             timeout=10,
             verify=True,
         )
@@ -968,6 +1045,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
             headers=None,
             json={"params": [{"url": "global"}], "session": ""},
             params=None,
+            stream=False,
             timeout=10,
             verify=True,
         )
@@ -994,6 +1072,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
             headers=None,
             json={"params": [{"url": "adom/ADOM"}], "session": ""},
             params=None,
+            stream=False,
             timeout=10,
             verify=True,
         )
@@ -1013,6 +1092,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
             headers=None,
             json={"params": [{"url": "adom/ADOM"}], "session": ""},
             params=None,
+            stream=False,
             timeout=10,
             verify=True,
         )
@@ -1056,6 +1136,7 @@ class TestFortiManager:  # pylint: disable=too-many-public-methods
             headers=None,
             json={"method": "get", "params": [{"url": "/task/task/222/line"}], "session": ""},
             params=None,
+            stream=False,
             timeout=3,
             verify=True,
         )
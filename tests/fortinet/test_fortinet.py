@@ -5,6 +5,8 @@ Test the Fortinet class
 
 # pylint: disable=no-member
 
+import time
+from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
@@ -12,8 +14,10 @@ import requests
 from _pytest.monkeypatch import MonkeyPatch
 from urllib3.exceptions import NewConnectionError, SSLError
 
-from fotoobo.exceptions import APIError, GeneralError
+from fotoobo.exceptions import APIError, CircuitOpenError, GeneralError
 from fotoobo.fortinet.fortinet import Fortinet
+from fotoobo.fortinet.retry import RetryPolicy
+from fotoobo.helpers.metrics import Metrics
 from tests.helper import ResponseMock
 
 
@@ -66,9 +70,44 @@ class TestFortinet:
         assert response.status_code == 200
         assert response.json() == {"version": "v1.1.1"}
         requests.Session.get.assert_called_with(
-            "url", headers=None, json=None, params=None, timeout=3, verify=True
+            "url", headers=None, json=None, params=None, stream=False, timeout=3, verify=True
         )
 
+    @staticmethod
+    def test_api_deadline(monkeypatch: MonkeyPatch) -> None:
+        """Test the timeout is limited by the deadline of the fan-out task"""
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.get",
+            MagicMock(return_value=ResponseMock(json={}, status_code=200)),
+        )
+        monkeypatch.setattr("fotoobo.fortinet.fortinet.remaining_time", MagicMock(return_value=0.5))
+        FortinetTestClass("dummy").api("get", "url")
+        requests.Session.get.assert_called_with(
+            "url", headers=None, json=None, params=None, stream=False, timeout=0.5, verify=True
+        )
+
+        monkeypatch.setattr("fotoobo.helpers.fanout.remaining_time", MagicMock(return_value=0))
+        with pytest.raises(GeneralError, match=r"Deadline exceeded \(dummy\)"):
+            FortinetTestClass("dummy").api("get", "url")
+
+        assert requests.Session.get.call_count == 1
+
+    @staticmethod
+    def test_api_deadline_no_retry(monkeypatch: MonkeyPatch) -> None:
+        """Test no retry is started if it would end after the deadline"""
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.get",
+            MagicMock(side_effect=requests.exceptions.ConnectTimeout()),
+        )
+        monkeypatch.setattr("fotoobo.fortinet.fortinet.remaining_time", MagicMock(return_value=0.5))
+        sleep = MagicMock()
+        monkeypatch.setattr("fotoobo.fortinet.fortinet.sleep", sleep)
+        fortinet = FortinetTestClass("dummy", retry={"attempts": 3, "backoff": 1, "jitter": False})
+        with pytest.raises(GeneralError, match=r"Deadline exceeded \(dummy\)"):
+            fortinet.api("get", "url")
+
+        sleep.assert_not_called()
+
     @staticmethod
     def test_api_post(monkeypatch: MonkeyPatch) -> None:
         """Test api post"""
@@ -80,7 +119,7 @@ class TestFortinet:
         assert response.status_code == 200
         assert response.json() == {"version": "v1.1.1"}
         requests.Session.post.assert_called_with(
-            "url", headers=None, json=None, params=None, timeout=3, verify=True
+            "url", headers=None, json=None, params=None, stream=False, timeout=3, verify=True
         )
 
     @staticmethod
@@ -231,3 +270,139 @@ class TestFortinet:
         with pytest.raises(APIError) as err:
             FortinetTestClass("dummy").api(method, "url")
         assert expected in str(err.value)
+
+    @staticmethod
+    def test_invalid_retry_policy() -> None:
+        """Test the instantiation with an invalid retry policy"""
+        with pytest.raises(GeneralError, match=r"Invalid retry policy for 'host'"):
+            FortinetTestClass("host", retry={"dummy": 1})
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "side_effect",
+        (
+            pytest.param(requests.exceptions.ConnectTimeout(), id="connection timeout"),
+            pytest.param(requests.exceptions.ReadTimeout(), id="read timeout"),
+            pytest.param(requests.exceptions.ConnectionError(), id="connection error"),
+        ),
+    )
+    def test_api_retry_transport_error(side_effect: Exception, monkeypatch: MonkeyPatch) -> None:
+        """Test api retries transport errors"""
+        monkeypatch.setattr("fotoobo.fortinet.fortinet.sleep", MagicMock())
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.get",
+            MagicMock(
+                side_effect=[side_effect, ResponseMock(json={"key": "value"}, status_code=200)]
+            ),
+        )
+        response = FortinetTestClass("dummy", retry={"attempts": 3}).api("get", "url")
+        assert response.status_code == 200
+        assert requests.Session.get.call_count == 2
+
+    @staticmethod
+    def test_api_retry_exhausted(monkeypatch: MonkeyPatch) -> None:
+        """Test api raises the error when all attempts failed"""
+        monkeypatch.setattr("fotoobo.fortinet.fortinet.sleep", MagicMock())
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.get",
+            MagicMock(side_effect=requests.exceptions.ReadTimeout()),
+        )
+        with pytest.raises(GeneralError, match=r"Read timeout \(dummy\)"):
+            FortinetTestClass("dummy", retry={"attempts": 3}).api("get", "url")
+
+        assert requests.Session.get.call_count == 3
+
+    @staticmethod
+    def test_api_retry_not_for_ssl_error(monkeypatch: MonkeyPatch) -> None:
+        """Test api does not retry SSL errors"""
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.get",
+            MagicMock(side_effect=requests.exceptions.SSLError()),
+        )
+        with pytest.raises(GeneralError, match=r"Unknown SSL error \(dummy\)"):
+            FortinetTestClass("dummy", retry={"attempts": 3}).api("get", "url")
+
+        assert requests.Session.get.call_count == 1
+
+    @staticmethod
+    def test_api_retry_not_for_post(monkeypatch: MonkeyPatch) -> None:
+        """Test api does not retry non idempotent methods by default"""
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.post",
+            MagicMock(side_effect=requests.exceptions.ReadTimeout()),
+        )
+        with pytest.raises(GeneralError, match=r"Read timeout \(dummy\)"):
+            FortinetTestClass("dummy", retry={"attempts": 3}).api("post", "url")
+
+        assert requests.Session.post.call_count == 1
+
+    @staticmethod
+    @pytest.mark.parametrize("status_code", (429, 503))
+    def test_api_retry_status_code(status_code: int, monkeypatch: MonkeyPatch) -> None:
+        """Test api retries the status codes from the policy and honors Retry-After"""
+        sleep_mock = MagicMock()
+        monkeypatch.setattr("fotoobo.fortinet.fortinet.sleep", sleep_mock)
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.get",
+            MagicMock(
+                side_effect=[
+                    ResponseMock(status_code=status_code, headers={"Retry-After": "2"}),
+                    ResponseMock(json={"key": "value"}, status_code=200),
+                ]
+            ),
+        )
+        response = FortinetTestClass("dummy").api("get", "url", retry=RetryPolicy(attempts=2))
+        assert response.status_code == 200
+        sleep_mock.assert_called_once_with(2.0)
+
+    @staticmethod
+    def test_api_retry_status_code_exhausted(monkeypatch: MonkeyPatch) -> None:
+        """Test api raises the APIError when all attempts returned a retryable status code"""
+        monkeypatch.setattr("fotoobo.fortinet.fortinet.sleep", MagicMock())
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.get",
+            MagicMock(return_value=ResponseMock(status_code=503)),
+        )
+        with pytest.raises(APIError, match=r"HTTP/503"):
+            FortinetTestClass("dummy", retry={"attempts": 2}).api("get", "url")
+
+        assert requests.Session.get.call_count == 2
+
+    @staticmethod
+    def test_api_circuit_breaker(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+        """Test api fails fast if the circuit of the device is open"""
+        monkeypatch.setattr(
+            "fotoobo.fortinet.circuit_breaker.config.circuit_breaker",
+            {"state_file": str(tmp_path / "circuit_breaker.json"), "threshold": 2},
+        )
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.get",
+            MagicMock(side_effect=requests.exceptions.ConnectTimeout()),
+        )
+        fortinet = FortinetTestClass("dummy")
+        for _ in range(2):
+            with pytest.raises(GeneralError, match=r"Connection timeout \(dummy\)"):
+                fortinet.api("get", "url")
+
+        with pytest.raises(CircuitOpenError, match=r"Circuit open"):
+            fortinet.api("get", "url")
+
+        assert requests.Session.get.call_count == 2
+
+    @staticmethod
+    def test_api_metrics(monkeypatch: MonkeyPatch) -> None:
+        """Test api observes the requests in the metrics"""
+        metrics = Metrics(enabled=True)
+        monkeypatch.setattr("fotoobo.fortinet.fortinet.metrics", metrics)
+        monkeypatch.setattr(
+            "fotoobo.fortinet.fortinet.requests.Session.post",
+            MagicMock(return_value=ResponseMock(json={"key": "value"}, status_code=200)),
+        )
+        fortinet = FortinetTestClass("dummy")
+        fortinet.api_url = "https://dummy/api/v2"
+        fortinet.api("post", "/cmdb/firewall/address/")
+        fortinet.api("post", payload={"method": "get", "params": [{"url": "/sys/status"}]})
+        assert sorted((_["endpoint"], _["bytes"]) for _ in metrics.summary()) == [
+            ("POST /cmdb/firewall/address", 16),
+            ("get /sys/status", 16),
+        ]
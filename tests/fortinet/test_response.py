@@ -0,0 +1,56 @@
+"""
+Test the ApiResponse class
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from _pytest.monkeypatch import MonkeyPatch
+
+from fotoobo.fortinet.response import ApiResponse
+
+
+def _response(content: bytes, status_code: int = 200) -> requests.Response:
+    """Create a requests response with the given body"""
+    response = requests.Response()
+    response._content = content  # pylint: disable=protected-access
+    response.status_code = status_code
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+
+def test_json_decoded_once(monkeypatch: MonkeyPatch) -> None:
+    """Test the body is decoded only once"""
+    loads = MagicMock(return_value={"key": "value"})
+    monkeypatch.setattr("fotoobo.fortinet.response.loads", loads)
+    response = ApiResponse(_response(b'{"key": "value"}'))
+    assert response.json() == {"key": "value"}
+    assert response.json() is response.json()
+    loads.assert_called_once_with(b'{"key": "value"}')
+
+
+def test_json_null() -> None:
+    """Test a JSON null body is cached as well"""
+    response = ApiResponse(_response(b"null"))
+    assert response.json() is None
+    assert response.json() is None
+
+
+def test_json_invalid() -> None:
+    """Test an invalid body raises the same exception as requests does"""
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        ApiResponse(_response(b"no json")).json()
+
+
+def test_attributes() -> None:
+    """Test the attributes are taken from the wrapped response"""
+    response = ApiResponse(_response(b'{"key": "value"}', status_code=404))
+    assert response.status_code == 404
+    assert response.text == '{"key": "value"}'
+    assert response.content == b'{"key": "value"}'
+    assert response.headers["content-type"] == "application/json"
+    assert not response.ok
+    assert response.encoding is None
+    with pytest.raises(requests.exceptions.HTTPError):
+        response.raise_for_status()
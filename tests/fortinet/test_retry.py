@@ -0,0 +1,76 @@
+"""
+Test the RetryPolicy class
+"""
+
+from email.utils import formatdate
+from time import time
+from typing import Optional
+
+import pytest
+
+from fotoobo.fortinet.retry import RetryPolicy
+
+
+class TestRetryPolicy:
+    """Test the RetryPolicy class"""
+
+    @staticmethod
+    def test_default() -> None:
+        """Test the default policy does not retry"""
+        policy = RetryPolicy()
+        assert policy.attempts == 1
+        assert not policy.retries_method("GET")
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "method, expected",
+        (
+            pytest.param("get", True, id="get"),
+            pytest.param("DELETE", True, id="delete"),
+            pytest.param("post", False, id="post"),
+            pytest.param("PATCH", False, id="patch"),
+        ),
+    )
+    def test_retries_method(method: str, expected: bool) -> None:
+        """Test only idempotent methods are retried by default"""
+        assert RetryPolicy(attempts=3).retries_method(method) == expected
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "retry, expected",
+        (
+            pytest.param(1, 0.5, id="first retry"),
+            pytest.param(2, 1.0, id="second retry"),
+            pytest.param(4, 4.0, id="fourth retry"),
+            pytest.param(10, 30.0, id="capped"),
+        ),
+    )
+    def test_delay(retry: int, expected: float) -> None:
+        """Test the exponential backoff without jitter"""
+        assert RetryPolicy(jitter=False).delay(retry) == expected
+
+    @staticmethod
+    def test_delay_jitter() -> None:
+        """Test the jitter stays within the exponential backoff"""
+        policy = RetryPolicy(backoff=1)
+        assert all(0 <= policy.delay(3) <= 4 for _ in range(100))
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "retry_after, expected",
+        (
+            pytest.param("7", 7.0, id="seconds"),
+            pytest.param("-1", 0.0, id="negative"),
+            pytest.param("3600", 30.0, id="capped"),
+            pytest.param("dummy", 0.5, id="invalid"),
+        ),
+    )
+    def test_delay_retry_after(retry_after: Optional[str], expected: float) -> None:
+        """Test the Retry-After header takes precedence"""
+        assert RetryPolicy(jitter=False).delay(1, retry_after) == expected
+
+    @staticmethod
+    def test_delay_retry_after_date() -> None:
+        """Test the Retry-After header as HTTP date"""
+        delay = RetryPolicy().delay(1, formatdate(time() + 10, usegmt=True))
+        assert 8 <= delay <= 10
@@ -2,6 +2,7 @@
 This module defines some helpers for the test package. These may be used by every test package.
 """
 
+import json
 from typing import Any, Dict, Set, Tuple
 from unittest.mock import MagicMock
 
@@ -16,16 +17,18 @@ class ResponseMock:  # pylint: disable=too-many-instance-attributes
         Give the mock the response you expect.
 
         **kwargs:
-            content: (Any, optional): Content of the response
-            headers: (List, optional): List of headers
+            content: (Any, optional): Content of the response. Defaults to the encoded json
+            headers: (Dict, optional): Dict of headers
             json (Any, optional): JSON response. Defaults to ""
             ok (bool, optional):  The OK flag. Defaults to True
             reason(str, optional): The response reason. Defaults to ""
             status_code (int, optional): HTTP status code. Defaults to 444 (No Response)
             text (str, optional): Text response. Defaults to ""
         """
-        self.content = kwargs.get("content", "")
-        self.headers = kwargs.get("headers", [])
+        self.content = kwargs.get(
+            "content", json.dumps(kwargs["json"]).encode() if "json" in kwargs else b""
+        )
+        self.headers = kwargs.get("headers", {})
         self.json = MagicMock(return_value=kwargs.get("json", None))
         self.ok = kwargs.get("ok", True)
         self.raise_for_status = MagicMock()
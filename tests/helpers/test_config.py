@@ -120,6 +120,92 @@ class TestConfig:
         with pytest.raises(GeneralError, match=expected):
             test_config.load_configuration(Path("tests/fotoobo.yaml"))
 
+    @staticmethod
+    @pytest.mark.parametrize(
+        "fanout,expected",
+        (
+            pytest.param("dummy", r"Setting fanout has to be a dictionary", id="no dict"),
+            pytest.param(
+                {"max_workers": "dummy"},
+                r"Setting fanout.max_workers has to be a number or dictionary",
+                id="invalid max_workers",
+            ),
+        ),
+    )
+    def test_config_fanout(fanout: Any, expected: str, monkeypatch: MonkeyPatch) -> None:
+        """test load fanout configuration with errors"""
+        test_config = Config()
+        monkeypatch.setattr(
+            "fotoobo.helpers.config.load_yaml_file", MagicMock(return_value={"fanout": fanout})
+        )
+        with pytest.raises(GeneralError, match=expected):
+            test_config.load_configuration(Path("tests/fotoobo.yaml"))
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "cache,expected",
+        (
+            pytest.param("dummy", r"Setting cache has to be a dictionary", id="no dict"),
+            pytest.param(
+                {"ttls": "dummy"}, r"Setting cache.ttls has to be a dictionary", id="ttls no dict"
+            ),
+        ),
+    )
+    def test_config_cache(cache: Any, expected: str, monkeypatch: MonkeyPatch) -> None:
+        """test load cache configuration with errors"""
+        test_config = Config()
+        monkeypatch.setattr(
+            "fotoobo.helpers.config.load_yaml_file", MagicMock(return_value={"cache": cache})
+        )
+        with pytest.raises(GeneralError, match=expected):
+            test_config.load_configuration(Path("tests/fotoobo.yaml"))
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "cassette,expected",
+        (
+            pytest.param("dummy", r"Setting cassette has to be a dictionary", id="no dict"),
+            pytest.param(
+                {"mode": "record"}, r"Missing cassette configuration: file", id="missing file"
+            ),
+            pytest.param(
+                {"file": "cassette.jsonl", "mode": "dummy"},
+                r"Setting cassette.mode has to be 'record' or 'replay'",
+                id="invalid mode",
+            ),
+        ),
+    )
+    def test_config_cassette(cassette: Any, expected: str, monkeypatch: MonkeyPatch) -> None:
+        """test load cassette configuration with errors"""
+        test_config = Config()
+        monkeypatch.setattr(
+            "fotoobo.helpers.config.load_yaml_file", MagicMock(return_value={"cassette": cassette})
+        )
+        with pytest.raises(GeneralError, match=expected):
+            test_config.load_configuration(Path("tests/fotoobo.yaml"))
+
+    @staticmethod
+    def test_config_config_cache(monkeypatch: MonkeyPatch) -> None:
+        """test load config_cache configuration with errors"""
+        test_config = Config()
+        monkeypatch.setattr(
+            "fotoobo.helpers.config.load_yaml_file",
+            MagicMock(return_value={"config_cache": "dummy"}),
+        )
+        with pytest.raises(GeneralError, match=r"Setting config_cache has to be a dictionary"):
+            test_config.load_configuration(Path("tests/fotoobo.yaml"))
+
+    @staticmethod
+    def test_config_circuit_breaker(monkeypatch: MonkeyPatch) -> None:
+        """test load circuit_breaker configuration with errors"""
+        test_config = Config()
+        monkeypatch.setattr(
+            "fotoobo.helpers.config.load_yaml_file",
+            MagicMock(return_value={"circuit_breaker": "dummy"}),
+        )
+        with pytest.raises(GeneralError, match=r"Setting circuit_breaker has to be a dictionary"):
+            test_config.load_configuration(Path("tests/fotoobo.yaml"))
+
     @staticmethod
     @pytest.mark.parametrize(
         "env,yaml,expected",
@@ -162,3 +248,16 @@ class TestConfig:
         else:
             with pytest.raises(GeneralError, match=r"Missing vault configuration:.*"):
                 test_config.load_configuration(Path("tests/fotoobo.yaml"))
+
+    @staticmethod
+    def test_config_reset() -> None:
+        """test reset the configuration to its defaults"""
+        test_config = Config()
+        test_config.load_configuration(Path("tests/fotoobo.yaml"))
+        test_config.cache["ttl"] = 60
+        test_config.no_logo = True
+        test_config.reset()
+        assert test_config.cache == {}
+        assert test_config.cache is not Config().cache
+        assert not test_config.no_logo
+        assert test_config.inventory_file == Path("inventory.yaml")
@@ -0,0 +1,123 @@
+"""
+Test the daemon helper
+"""
+
+# pylint: disable=redefined-outer-name
+import os
+import socket
+import threading
+from pathlib import Path
+from typing import Generator, List
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from fotoobo.helpers.daemon import Daemon, forward, get_socket_path, is_forwarded
+
+
+@pytest.fixture
+def socket_path(tmp_path: Path) -> Path:
+    """The socket of the test daemon"""
+    return tmp_path / "daemon.sock"
+
+
+@pytest.fixture
+def daemon(socket_path: Path) -> Generator[Daemon, None, None]:
+    """Run a daemon which prints its arguments and working directory"""
+
+    def runner(argv: List[str]) -> int:
+        print(f"{' '.join(argv)} in {os.getcwd()}{os.getenv('FOTOOBO_TEST', '')}")
+        return len(argv)
+
+    server = Daemon(socket_path, runner)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_get_socket_path(monkeypatch: MonkeyPatch) -> None:
+    """Test the socket path from the environment"""
+    monkeypatch.delenv("FOTOOBO_DAEMON_SOCKET", raising=False)
+    assert get_socket_path() == Path("~/.cache/fotoobo/daemon.sock").expanduser()
+    monkeypatch.setenv("FOTOOBO_DAEMON_SOCKET", "/tmp/dummy.sock")
+    assert get_socket_path() == Path("/tmp/dummy.sock")
+    monkeypatch.setenv("FOTOOBO_DAEMON_SOCKET", "")
+    assert get_socket_path() is None
+
+
+def test_forward(daemon: Daemon, socket_path: Path) -> None:  # pylint: disable=unused-argument
+    """Test a command is forwarded to the daemon and run in the working directory of the client"""
+    assert forward(["fgt", "get", "version"], socket_path) == (
+        3,
+        f"fgt get version in {os.getcwd()}\n",
+    )
+    assert oct(socket_path.stat().st_mode & 0o777) == "0o600"
+
+
+def test_forward_environment(daemon: Daemon, socket_path: Path, monkeypatch: MonkeyPatch) -> None:
+    """Test a forwarded command is run with the environment of the client"""
+    monkeypatch.setenv("FOTOOBO_TEST", " with env")
+    assert forward(["get", "version"], socket_path) == (
+        2,
+        f"get version in {os.getcwd()} with env\n",
+    )
+    monkeypatch.delenv("FOTOOBO_TEST")
+    assert daemon.run_command(["get", "version"], env={}) == (2, f"get version in {os.getcwd()}\n")
+
+
+def test_forward_local_command(
+    daemon: Daemon, socket_path: Path  # pylint: disable=unused-argument
+) -> None:
+    """Test the daemon command itself and long running commands are never forwarded"""
+    assert forward(["daemon"], socket_path) is None
+    assert forward(["-c", "fotoobo.yaml", "fgt", "monitor", "watch", "dummy"], socket_path) is None
+    assert forward(["fgt", "backup", "dummy"], socket_path) is None
+
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    (
+        pytest.param(["daemon", "--socket", "dummy.sock"], False, id="daemon"),
+        pytest.param(["fgt", "monitor", "watch", "dummy"], False, id="watch"),
+        pytest.param(["fgt", "backup"], False, id="backup"),
+        pytest.param(["fgt", "monitor", "hamaster", "dummy"], True, id="hamaster"),
+        pytest.param(["-c", "fotoobo.yaml", "fgt", "get", "version"], True, id="with options"),
+    ),
+)
+def test_is_forwarded(argv: List[str], expected: bool) -> None:
+    """Test the commands which are forwarded to the daemon"""
+    assert is_forwarded(argv) is expected
+
+
+def test_run_command_refused(daemon: Daemon) -> None:
+    """Test the daemon refuses commands which are not forwarded"""
+    assert daemon.run_command(["fgt", "monitor", "watch"]) == (
+        2,
+        "Error: 'fgt monitor watch' cannot run in the fotoobo daemon\n",
+    )
+
+
+def test_forward_no_daemon(socket_path: Path) -> None:
+    """Test nothing is forwarded if there is no daemon"""
+    assert forward(["get", "version"], socket_path) is None
+
+    # A socket file left behind by a daemon which is not running anymore
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(str(socket_path))
+
+    assert socket_path.is_socket()
+    assert forward(["get", "version"], socket_path) is None
+
+
+def test_daemon_removes_socket(socket_path: Path) -> None:
+    """Test the daemon replaces a stale socket and removes its socket when closed"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(str(socket_path))
+
+    with Daemon(socket_path, lambda _: 0):
+        assert socket_path.is_socket()
+
+    assert not socket_path.exists()
@@ -0,0 +1,301 @@
+"""
+Test the fan-out helper
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from fotoobo.exceptions import GeneralError
+from fotoobo.helpers.fanout import (
+    FanOut,
+    check_deadline,
+    parse_max_workers,
+    remaining_time,
+    run_async,
+)
+from fotoobo.inventory.generic import GenericDevice
+
+
+@pytest.fixture(autouse=True)
+def empty_fanout_config(monkeypatch: MonkeyPatch) -> None:
+    """Make sure the tests do not depend on the fanout settings of any loaded configuration"""
+    monkeypatch.setattr("fotoobo.helpers.fanout.config.fanout", {})
+
+
+def _assets(count: int, device_type: str = "fortigate") -> Dict[str, Any]:
+    """Create some generic assets"""
+    return {f"{device_type}_{i}": GenericDevice(type=device_type) for i in range(count)}
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    (
+        pytest.param(["20"], {"default": 20}, id="default"),
+        pytest.param(["fortigate=50"], {"fortigate": 50}, id="type"),
+        pytest.param(["5", "fortimanager=2"], {"default": 5, "fortimanager": 2}, id="both"),
+    ),
+)
+def test_parse_max_workers(values: List[str], expected: Dict[str, int]) -> None:
+    """Test parse_max_workers"""
+    assert parse_max_workers(values) == expected
+
+
+def test_parse_max_workers_invalid() -> None:
+    """Test parse_max_workers with an invalid value"""
+    with pytest.raises(GeneralError, match=r"Invalid max workers 'fortigate=many'"):
+        parse_max_workers(["fortigate=many"])
+
+
+@pytest.mark.parametrize(
+    "max_workers, device_type, expected",
+    (
+        pytest.param(None, "fortigate", 10, id="default"),
+        pytest.param(5, "fortigate", 5, id="number"),
+        pytest.param({"fortigate": 50}, "fortigate", 50, id="by type"),
+        pytest.param({"fortigate": 50}, "fortimanager", 10, id="other type"),
+        pytest.param({"default": 3}, "fortimanager", 3, id="default key"),
+        pytest.param(0, "fortigate", 1, id="at least one"),
+    ),
+)
+def test_limit(
+    max_workers: Union[int, Dict[str, int], None], device_type: str, expected: int
+) -> None:
+    """Test the concurrency limit per device type"""
+    assert FanOut[Any](max_workers=max_workers).limit(device_type) == expected
+
+
+def test_limit_from_config(monkeypatch: MonkeyPatch) -> None:
+    """Test the settings are taken from the configuration"""
+    monkeypatch.setattr(
+        "fotoobo.helpers.fanout.config.fanout",
+        {"max_workers": {"fortigate": 42}, "rate_limit": 5, "timeout": 7, "ordered": True},
+    )
+    fan_out = FanOut[Any]()
+    assert fan_out.limit("fortigate") == 42
+    assert fan_out.rate_limit == 5
+    assert fan_out.timeout == 7
+    assert fan_out.ordered
+
+
+def test_run() -> None:
+    """Test run with the callback"""
+    delivered: Dict[str, str] = {}
+    results = FanOut[str]().run(
+        lambda name, asset: f"{name}:{asset.type}",
+        _assets(3),
+        on_result=delivered.__setitem__,
+    )
+    assert sorted(results) == [
+        ("fortigate_0", "fortigate_0:fortigate"),
+        ("fortigate_1", "fortigate_1:fortigate"),
+        ("fortigate_2", "fortigate_2:fortigate"),
+    ]
+    assert delivered == dict(results)
+
+
+def test_run_no_assets() -> None:
+    """Test run with no assets"""
+    assert not FanOut[str]().run(lambda name, asset: name, {})
+
+
+def test_run_ordered() -> None:
+    """Test the results are delivered in the order of the assets"""
+
+    def _task(name: str, _: Any) -> str:
+        time.sleep(0.05 if name == "fortigate_0" else 0)
+        return name
+
+    assets = _assets(4)
+    assert [_[0] for _ in FanOut[str](ordered=True).run(_task, assets)] == list(assets)
+    assert FanOut[str](ordered=False).run(_task, assets)[-1][0] == "fortigate_0"
+
+
+def test_run_limit_per_device_type() -> None:
+    """Test the concurrency limit is applied per device type"""
+    lock = threading.Lock()
+    running: Dict[str, int] = {"fortigate": 0, "fortimanager": 0}
+    highest: Dict[str, int] = {"fortigate": 0, "fortimanager": 0}
+
+    def _task(_: str, asset: Any) -> None:
+        with lock:
+            running[asset.type] += 1
+            highest[asset.type] = max(highest[asset.type], running[asset.type])
+
+        time.sleep(0.02)
+        with lock:
+            running[asset.type] -= 1
+
+    assets = {**_assets(8), **_assets(4, "fortimanager")}
+    FanOut[None](max_workers={"fortigate": 4, "fortimanager": 1}).run(_task, assets)
+    assert highest == {"fortigate": 4, "fortimanager": 1}
+
+
+def test_run_rate_limit() -> None:
+    """Test the rate limit"""
+    start = time.monotonic()
+    FanOut[None](rate_limit=50).run(lambda name, asset: None, _assets(5))
+    assert time.monotonic() - start >= 0.08
+
+
+def test_run_timeout() -> None:
+    """Test the deadline for a single asset"""
+
+    def _task(name: str, _: Any) -> str:
+        time.sleep(0.5 if name == "fortigate_1" else 0)
+        return name
+
+    fan_out = FanOut[str](timeout=0.1)
+    results = fan_out.run(_task, _assets(3))
+    assert sorted(_[0] for _ in results) == ["fortigate_0", "fortigate_2"]
+    assert fan_out.timed_out == ["fortigate_1"]
+
+
+def test_run_deadline_spread() -> None:
+    """Test the time left of the run is spread over the pending rounds of tasks"""
+
+    def _task(_: str, __: Any) -> Optional[float]:
+        return remaining_time()
+
+    results = FanOut[Optional[float]](max_workers=2, deadline=1).run(_task, _assets(4))
+    remaining = sorted(_[1] or 0 for _ in results)
+    assert 0 < remaining[0] <= remaining[1] <= 0.5 < remaining[2] <= remaining[3] <= 1
+    assert remaining_time() is None
+    assert FanOut[Optional[float]]().run(_task, _assets(1)) == [("fortigate_0", None)]
+
+
+def test_run_deadline_stragglers() -> None:
+    """Test tasks which use up their share of the deadline are reported as timed out"""
+    timed_out: List[Tuple[str, str]] = []
+
+    def _task(name: str, _: Any) -> str:
+        while name == "fortigate_0" and (remaining_time() or 0) > 0:
+            time.sleep(0.01)
+
+        return name
+
+    fan_out = FanOut[str](max_workers=1, deadline=0.3)
+    results = fan_out.run(
+        _task, _assets(3), on_timeout=lambda name, message: timed_out.append((name, message))
+    )
+    assert [_[0] for _ in results] == ["fortigate_1", "fortigate_2"]
+    assert fan_out.timed_out == ["fortigate_0"]
+    assert timed_out == [("fortigate_0", "Deadline exceeded")]
+
+
+def test_run_deadline_not_started() -> None:
+    """Test tasks which cannot be started before the deadline are not started at all"""
+    started: List[str] = []
+    fan_out = FanOut[None](rate_limit=5, deadline=0.1)
+    fan_out.run(lambda name, _: started.append(name), _assets(2))
+    assert started == ["fortigate_0"]
+    assert fan_out.timed_out == ["fortigate_1"]
+
+
+def test_run_timeout_straggler() -> None:
+    """Test a task which ran out of time keeps its slot and does not use up the time of others"""
+    lock = threading.Lock()
+    running: List[str] = []
+    highest = 0
+
+    def _task(name: str, _: Any) -> str:
+        nonlocal highest
+        with lock:
+            running.append(name)
+            highest = max(highest, len(running))
+
+        time.sleep(0.6 if name == "fortigate_0" else 0.01)
+        with lock:
+            running.remove(name)
+
+        return name
+
+    fan_out = FanOut[str](max_workers=1, timeout=0.2, ordered=True)
+    results = fan_out.run(_task, _assets(4))
+    assert [_[0] for _ in results] == ["fortigate_1", "fortigate_2", "fortigate_3"]
+    assert fan_out.timed_out == ["fortigate_0"]
+    assert highest == 1
+
+
+def test_run_deadline_no_free_slot() -> None:
+    """Test tasks waiting for the slot of a straggler are not started after the deadline"""
+    started: List[str] = []
+
+    def _task(name: str, _: Any) -> None:
+        started.append(name)
+        time.sleep(0.4)
+
+    fan_out = FanOut[None](max_workers=1, timeout=0.05, deadline=0.2)
+    fan_out.run(_task, _assets(2))
+    assert started == ["fortigate_0"]
+    assert fan_out.timed_out == ["fortigate_0", "fortigate_1"]
+
+
+def test_check_deadline() -> None:
+    """Test a task stops itself when its deadline has passed"""
+    stopped: List[str] = []
+
+    def _task(name: str, _: Any) -> None:
+        try:
+            while True:
+                check_deadline(name)
+                time.sleep(0.01)
+
+        except GeneralError as err:
+            stopped.append(err.message)
+
+    start = time.monotonic()
+    fan_out = FanOut[None](timeout=0.1)
+    fan_out.run(_task, _assets(1))
+    assert fan_out.timed_out == ["fortigate_0"]
+    while not stopped and time.monotonic() - start < 1:
+        time.sleep(0.01)
+
+    assert stopped == ["Deadline exceeded (fortigate_0)"]
+    check_deadline("no deadline")
+
+
+def test_run_async_with_semaphore() -> None:
+    """Test that the semaphore bounds the number of calls in flight"""
+    lock = threading.Lock()
+    counter = {"current": 0, "max": 0}
+
+    def _blocking_call() -> str:
+        with lock:
+            counter["current"] += 1
+            counter["max"] = max(counter["max"], counter["current"])
+
+        time.sleep(0.01)
+        with lock:
+            counter["current"] -= 1
+
+        return "ok"
+
+    async def _run() -> List[str]:
+        semaphore = asyncio.Semaphore(2)
+        return await asyncio.gather(
+            *[run_async(_blocking_call, semaphore=semaphore) for _ in range(8)]
+        )
+
+    assert asyncio.run(_run()) == ["ok"] * 8
+    assert counter["max"] <= 2
+
+
+def test_run_async_with_executor() -> None:
+    """Test the call runs in the thread pool given"""
+
+    async def _run() -> List[str]:
+        with ThreadPoolExecutor(thread_name_prefix="fotoobo_test") as executor:
+            return await asyncio.gather(
+                *[
+                    run_async(lambda: threading.current_thread().name, executor=executor)
+                    for _ in range(4)
+                ]
+            )
+
+    assert all(_.startswith("fotoobo_test") for _ in asyncio.run(_run()))
@@ -4,7 +4,11 @@ test_file_helper
 
 # pylint: disable=redefined-outer-name
 
+import gzip
+import io
+import json
 import os
+import zipfile
 from pathlib import Path
 from typing import Any, Dict, List
 from unittest.mock import MagicMock
@@ -14,9 +18,12 @@ from _pytest.monkeypatch import MonkeyPatch
 
 from fotoobo.exceptions import GeneralError
 from fotoobo.helpers.files import (
+    CompressedStream,
+    RowWriter,
     create_dir,
     file_to_ftp,
     file_to_zip,
+    ftp_store,
     load_json_file,
     load_yaml_file,
     save_json_file,
@@ -114,6 +121,66 @@ def test_file_to_zip_invalid_level(zip_level: int) -> None:
         file_to_zip(Path(""), Path(""), zip_level)
 
 
+@pytest.mark.parametrize(
+    "read_size", (pytest.param(7, id="small reads"), pytest.param(-1, id="read all"))
+)
+def test_compressed_stream(tmp_path: Path, read_size: int) -> None:
+    """Test a file is compressed on the fly in chunks"""
+    content = os.urandom(1000).hex().encode() * 50
+    file = tmp_path / "fgt.conf"
+    file.write_bytes(content)
+
+    for compression in ("zip", "gzip"):
+        stream = CompressedStream(file, compression, chunk_size=1000)
+        data = b""
+        while chunk := stream.read(read_size):
+            data += chunk
+
+        stream.close()
+        assert len(data) < len(content)
+        if compression == "zip":
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                assert archive.namelist() == ["fgt.conf"]
+                assert archive.read("fgt.conf") == content
+
+        else:
+            assert gzip.decompress(data) == content
+
+
+def test_compressed_stream_zstd(tmp_path: Path) -> None:
+    """Test the zstd compression of a stream"""
+    zstandard = pytest.importorskip("zstandard")
+    file = tmp_path / "fgt.conf"
+    file.write_bytes(b"#config-version" * 100)
+    stream = CompressedStream(file, "zstd")
+    assert (
+        zstandard.ZstdDecompressor().decompressobj().decompress(stream.read()) == file.read_bytes()
+    )
+    stream.close()
+
+
+def test_compressed_stream_unknown(tmp_path: Path) -> None:
+    """Test an unknown compression"""
+    with pytest.raises(GeneralError, match=r"Unknown compression 'rar'"):
+        CompressedStream(tmp_path / "fgt.conf", "rar")
+
+
+def test_ftp_store_compressed(tmp_path: Path) -> None:
+    """Test a file is compressed while it is uploaded"""
+    file = tmp_path / "fgt.conf"
+    file.write_text("#config-version", encoding="UTF-8")
+    uploaded: Dict[str, bytes] = {}
+
+    def storbinary(command: str, stream: Any) -> str:
+        uploaded[command] = stream.read()
+        return "226 Transfer complete."
+
+    ftp = MagicMock()
+    ftp.storbinary.side_effect = storbinary
+    assert ftp_store(ftp, file, "fgt.conf.gz", "gzip") == 0
+    assert gzip.decompress(uploaded["STOR fgt.conf.gz"]) == b"#config-version"
+
+
 # Start testing the json file_helper functions
 
 
@@ -351,3 +418,31 @@ def test_create_dir_with_os_error(monkeypatch: MonkeyPatch) -> None:
     monkeypatch.setattr("fotoobo.helpers.files.Path.mkdir", MagicMock(side_effect=OSError()))
     with pytest.raises(GeneralError, match=r"Unable to create directory dummy"):
         create_dir(Path("dummy"))
+
+
+def test_row_writer_csv(temp_dir: Path) -> None:
+    """Test the RowWriter writes a CSV file with the columns of the first row"""
+    csv_file = temp_dir / "rows.csv"
+    with RowWriter(csv_file) as writer:
+        writer.write([{"name": "a", "content": "x\ny"}])
+        assert csv_file.read_bytes() == b'name,content\r\na,"x\ny"\r\n'
+        writer.write([{"name": "b", "content": "z", "extra": "ignored"}])
+
+    assert csv_file.read_bytes().endswith(b"\r\nb,z\r\n")
+    assert writer.rows == 2
+
+
+def test_row_writer_jsonl(temp_dir: Path) -> None:
+    """Test the RowWriter writes a JSON Lines file"""
+    jsonl_file = temp_dir / "rows.jsonl"
+    with RowWriter(jsonl_file) as writer:
+        writer.write(iter([{"name": "a"}, {"name": "b", "type": "fqdn"}]))
+
+    lines = jsonl_file.read_text(encoding="UTF-8").splitlines()
+    assert [json.loads(_) for _ in lines] == [{"name": "a"}, {"name": "b", "type": "fqdn"}]
+
+
+def test_row_writer_invalid_format() -> None:
+    """Test the RowWriter only supports CSV and JSON Lines files"""
+    with pytest.raises(GeneralError, match=r"Unsupported file format '.json'"):
+        RowWriter(Path("rows.json"))
@@ -0,0 +1,108 @@
+"""
+Test the metrics helper
+"""
+
+import json
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from fotoobo.helpers.metrics import BUCKETS, Metrics, quantile
+
+
+def _buckets(durations: List[float]) -> List[int]:
+    """Count some durations into the histogram buckets"""
+    buckets = [0] * (len(BUCKETS) + 1)
+    for duration in durations:
+        buckets[next((i for i, _ in enumerate(BUCKETS) if duration <= _), len(BUCKETS))] += 1
+
+    return buckets
+
+
+@pytest.mark.parametrize(
+    "durations, q, expected",
+    (
+        pytest.param([], 0.5, 0.0, id="no values"),
+        pytest.param([0.3], 0.99, 0.3, id="one value"),
+        pytest.param([0.003] * 50 + [0.3] * 45 + [3.0] * 5, 0.5, 0.005, id="p50"),
+        pytest.param([0.003] * 50 + [0.3] * 45 + [3.0] * 5, 0.95, 0.5, id="p95"),
+        pytest.param([0.003] * 50 + [0.3] * 45 + [3.0] * 5, 0.99, 3.0, id="p99"),
+        pytest.param([100.0], 0.5, 100.0, id="+Inf"),
+    ),
+)
+def test_quantile(durations: List[float], q: float, expected: float) -> None:
+    """Test the nearest-rank quantile estimated from the histogram"""
+    assert quantile(_buckets(durations), q, max(durations, default=0.0)) == expected
+
+
+def test_summary() -> None:
+    """Test the summary per host and endpoint"""
+    metrics = Metrics(enabled=True)
+    metrics.observe("fgt", "GET /monitor/system/status", 0.1, size=100)
+    metrics.observe("fgt", "GET /monitor/system/status", 0.3, size=50, error=True)
+    metrics.observe("fmg", "get /sys/status", 1.0, size=10)
+    summary = metrics.summary()
+    assert [_["host"] for _ in summary] == ["fmg", "fgt"]
+    buckets = summary[1].pop("buckets")
+    assert summary[1] == {
+        "host": "fgt",
+        "endpoint": "GET /monitor/system/status",
+        "count": 2,
+        "errors": 1,
+        "bytes": 150,
+        "sum": pytest.approx(0.4),
+        "max": 0.3,
+        "p50": 0.1,
+        "p95": 0.3,
+        "p99": 0.3,
+    }
+    assert list(buckets) == [str(_) for _ in BUCKETS] + ["+Inf"]
+    assert buckets["0.05"] == 0
+    assert buckets["0.1"] == 1
+    assert buckets["0.5"] == 2
+    assert buckets["+Inf"] == 2
+    metrics.reset()
+    assert not metrics.summary()
+    assert not metrics.enabled
+
+
+def test_observe_disabled() -> None:
+    """Test nothing is recorded when the metrics are disabled"""
+    metrics = Metrics()
+    metrics.observe("fgt", "GET /monitor", 0.5, size=10)
+    assert not metrics.endpoints
+    assert not metrics.summary()
+
+
+def test_to_prometheus() -> None:
+    """Test the Prometheus text format"""
+    metrics = Metrics(enabled=True)
+    metrics.observe('fgt"1', "GET /monitor", 0.5, size=10)
+    text = metrics.to_prometheus()
+    labels = 'host="fgt\\"1",endpoint="GET /monitor"'
+    assert "# TYPE fotoobo_api_request_duration_seconds histogram\n" in text
+    assert f'fotoobo_api_request_duration_seconds_bucket{{{labels},le="0.25"}} 0\n' in text
+    assert f'fotoobo_api_request_duration_seconds_bucket{{{labels},le="0.5"}} 1\n' in text
+    assert f'fotoobo_api_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1\n' in text
+    assert f"fotoobo_api_request_duration_seconds_sum{{{labels}}} 0.5\n" in text
+    assert f"fotoobo_api_request_duration_seconds_count{{{labels}}} 1\n" in text
+    assert f"fotoobo_api_response_bytes_total{{{labels}}} 10\n" in text
+    assert f"fotoobo_api_request_errors_total{{{labels}}} 0\n" in text
+
+
+@pytest.mark.parametrize("suffix", (".json", ".prom"))
+def test_export(suffix: str, tmp_path: Path) -> None:
+    """Test the export as JSON or Prometheus textfile"""
+    metrics = Metrics(enabled=True)
+    metrics.observe("fgt", "GET /monitor", 0.5)
+    metrics_file = tmp_path / f"metrics{suffix}"
+    metrics.export(metrics_file)
+    content = metrics_file.read_text(encoding="UTF-8")
+    if suffix == ".json":
+        assert json.loads(content)[0]["count"] == 1
+
+    else:
+        assert content == metrics.to_prometheus()
+
+    assert [_.name for _ in tmp_path.iterdir()] == [metrics_file.name]
@@ -63,6 +63,33 @@ class TestResults:
             assert len(result.successful) == 0
             assert len(result.failed) == 1
 
+    @staticmethod
+    def test_push_skipped() -> None:
+        """Test the push_skipped() method"""
+        result = Result[Any]()
+        result.push_skipped("test_host", "test message")
+        result.push_result("test_host", "test")
+
+        assert result.skipped == ["test_host"]
+        assert result.results == {"test_host": "test"}
+        assert not result.successful
+        assert not result.failed
+        assert result.messages["test_host"] == [{"message": "test message", "level": "warning"}]
+
+    @staticmethod
+    def test_push_timed_out() -> None:
+        """Test the push_timed_out() method"""
+        result = Result[Any]()
+        result.push_timed_out("test_host", "Deadline exceeded")
+        result.push_result("test_host", "test")
+
+        assert result.timed_out == ["test_host"]
+        assert not result.successful
+        assert not result.failed
+        assert result.messages["test_host"] == [
+            {"message": "Deadline exceeded", "level": "warning"}
+        ]
+
     @staticmethod
     @pytest.mark.parametrize(
         "message,level",
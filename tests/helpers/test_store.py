@@ -0,0 +1,74 @@
+"""
+Test the backup store helper
+"""
+
+from pathlib import Path
+
+import pytest
+
+from fotoobo.exceptions import GeneralError
+from fotoobo.helpers.store import BackupStore, apply_delta, make_delta
+
+CONFIG = "".join(
+    f'config firewall address\n    edit "obj{_}"\n        set subnet 10.0.{_}.0/24\n    next\nend\n'
+    for _ in range(200)
+).encode()
+
+
+@pytest.mark.parametrize(
+    "base, content",
+    (
+        pytest.param(b"", b"a\nb\n", id="empty base"),
+        pytest.param(b"a\nb\nc\n", b"a\nx\nc\nd", id="replace and append"),
+        pytest.param(b"a\nb\nc\n", b"c\n", id="delete"),
+        pytest.param(b"a\n\xff\n", b"\xfe\na\n", id="binary"),
+    ),
+)
+def test_delta(base: bytes, content: bytes) -> None:
+    """Test a delta turns its base into the content"""
+    assert apply_delta(base, make_delta(base, content)) == content
+
+
+def test_add_and_get(tmp_path: Path) -> None:
+    """Test revisions are stored as deltas and deduplicated across devices"""
+    changed = CONFIG.replace(b"obj7", b"obj_seven")
+    with BackupStore(tmp_path) as store:
+        first = store.add("fgt1", CONFIG, timestamp=1)
+        second = store.add("fgt1", changed, timestamp=2)
+        assert store.add("fgt2", changed, timestamp=3) == second
+        assert store.get(first) == CONFIG
+        assert store.get(second) == changed
+        assert store.revisions("fgt1") == [(1, first, len(CONFIG)), (2, second, len(changed))]
+        assert store.revisions("fgt2") == [(3, second, len(changed))]
+        assert store.revisions("fgt3") == []
+
+    objects = list((tmp_path / "objects").glob("*/*"))
+    assert len(objects) == 2
+    assert sum(_.stat().st_size for _ in objects) < len(CONFIG) / 10
+
+    with BackupStore(tmp_path) as store:
+        assert store.get(second) == changed
+
+
+def test_max_depth(tmp_path: Path) -> None:
+    """Test a full copy is stored when the chain of deltas gets too long"""
+    with BackupStore(tmp_path, max_depth=2) as store:
+        digests = [store.add("fgt1", CONFIG + str(_).encode()) for _ in range(4)]
+        depths = store._db.execute(  # pylint: disable=protected-access
+            "SELECT depth FROM objects ORDER BY rowid"
+        ).fetchall()
+        assert [_[0] for _ in depths] == [0, 1, 2, 0]
+        assert store.get(digests[3]) == CONFIG + b"3"
+
+
+def test_get_errors(tmp_path: Path) -> None:
+    """Test unknown and corrupt revisions"""
+    with BackupStore(tmp_path) as store:
+        with pytest.raises(GeneralError, match=r"Revision 'dummy' not found"):
+            store.get("dummy")
+
+        digest = store.add("fgt1", CONFIG)
+        object_file = next((tmp_path / "objects").glob("*/*"))
+        object_file.unlink()
+        with pytest.raises(GeneralError, match=rf"Unable to read revision '{digest}'"):
+            store.get(digest)
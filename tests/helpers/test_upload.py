@@ -0,0 +1,70 @@
+"""
+Test the upload helper
+"""
+
+import ftplib
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from fotoobo.exceptions import GeneralError
+from fotoobo.helpers.upload import Uploader
+from fotoobo.inventory.generic import GenericDevice
+
+SERVER = GenericDevice(hostname="ftp.local", username="", password="", directory="")
+
+
+def test_upload_reuses_connections(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test the uploads share the connections of the pool"""
+    ftp = MagicMock()
+    ftp.storbinary.return_value = "226 Transfer complete."
+    ftp_connect = MagicMock(return_value=ftp)
+    monkeypatch.setattr("fotoobo.helpers.upload.ftp_connect", ftp_connect)
+    files = [tmp_path / f"fgt{_}.conf" for _ in range(3)]
+    for file in files:
+        file.write_text("#config-version", encoding="UTF-8")
+
+    with Uploader(SERVER, connections=1) as uploader:
+        for file in files:
+            uploader.submit(file.stem, file)
+
+        assert uploader.wait() == {"fgt0": 0, "fgt1": 0, "fgt2": 0}
+
+    ftp_connect.assert_called_once_with(SERVER)
+    assert ftp.voidcmd.call_count == 2
+    assert ftp.storbinary.call_count == 3
+    ftp.quit.assert_called_once()
+
+
+def test_upload_compressed_and_retry(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test a compressed upload is retried on a new connection and writes no temporary file"""
+    broken, working = MagicMock(), MagicMock()
+    broken.storbinary.side_effect = ftplib.error_temp("421 Timeout")
+    working.storbinary.return_value = "226 Transfer complete."
+    monkeypatch.setattr(
+        "fotoobo.helpers.upload.ftp_connect", MagicMock(side_effect=[broken, working])
+    )
+    file = tmp_path / "fgt.conf"
+    file.write_text("#config-version", encoding="UTF-8")
+
+    with Uploader(SERVER, retries=1, backoff=0) as uploader:
+        uploader.submit("fgt", file, "fgt-1.conf.zip", "zip")
+        assert uploader.wait() == {"fgt": 0}
+
+    broken.close.assert_called_once()
+    assert working.storbinary.call_args.args[0] == "STOR fgt-1.conf.zip"
+    assert list(tmp_path.iterdir()) == [file]
+
+
+def test_upload_failed(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test the error of an upload which failed after all retries"""
+    monkeypatch.setattr(
+        "fotoobo.helpers.upload.ftp_connect", MagicMock(side_effect=ConnectionRefusedError())
+    )
+    uploader = Uploader(SERVER, retries=2, backoff=0)
+    uploader.submit("fgt", tmp_path / "fgt.conf")
+    outcome = uploader.wait()["fgt"]
+    uploader.close()
+    assert isinstance(outcome, GeneralError)
+    assert "Upload of 'fgt.conf' to 'ftp.local' failed" in outcome.message
@@ -2,6 +2,7 @@
 Test the inventory
 """
 
+import os
 from pathlib import Path
 from typing import Any, Dict, Optional
 from unittest.mock import MagicMock
@@ -17,6 +18,34 @@ from fotoobo.inventory.inventory import Inventory
 class TestInventory:
     """Test inventory"""
 
+    @staticmethod
+    def test_init_keep_alive(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+        """Test the assets are shared between inventories when keep_alive is set"""
+        inventory_file = tmp_path / "inventory.yaml"
+        inventory_file.write_text(
+            Path("tests/data/inventory.yaml").read_text(encoding="UTF-8"), encoding="UTF-8"
+        )
+        monkeypatch.setattr(Inventory, "_shared_assets", {})
+        assert Inventory(inventory_file).assets is not Inventory(inventory_file).assets
+
+        monkeypatch.setattr(Inventory, "keep_alive", True)
+        inventory = Inventory(inventory_file)
+        assert inventory.assets is Inventory(inventory_file).assets
+        assert inventory.assets["test_fgt_1"].keep_alive
+
+        fmg = inventory.assets["test_fmg"]
+        fmg.session_key = "dummy_session_key"
+        logout = MagicMock()
+        monkeypatch.setattr(fmg, "logout", logout)
+        os.utime(inventory_file, (0, 0))
+        assert inventory.assets is not Inventory(inventory_file).assets
+        assert not fmg.keep_alive
+        logout.assert_called_once()
+        fmg.session_key = ""
+
+        Inventory.release_shared_assets()
+        assert not Inventory._shared_assets  # pylint: disable=protected-access
+
     @staticmethod
     def test_init(monkeypatch: MonkeyPatch) -> None:
         """
@@ -4,6 +4,7 @@ Test fgt cmdb firewall address
 
 # pylint: disable=no-member
 # mypy: disable-error-code=attr-defined
+import json
 from pathlib import Path
 from unittest.mock import MagicMock
 
@@ -57,7 +58,7 @@ def test_get_cmdb_firewall_address(monkeypatch: MonkeyPatch) -> None:
         }
     ]
     monkeypatch.setattr(
-        "fotoobo.fortinet.fortigate.FortiGate.api_get", MagicMock(return_value=result_mock)
+        "fotoobo.fortinet.fortigate.FortiGate.api_get_paged", MagicMock(return_value=result_mock)
     )
     monkeypatch.setattr("fotoobo.helpers.result.Result.save_raw", MagicMock(return_value=True))
     result = get_cmdb_firewall_address("test_fgt_1", "", "", "test.json")
@@ -68,9 +69,26 @@ def test_get_cmdb_firewall_address(monkeypatch: MonkeyPatch) -> None:
     assert data[2]["content"] == "1.1.1.1/2.2.2.2"
     assert data[3]["content"] == "1.1.1.1 - 2.2.2.2"
     assert data[4]["content"] == ""
-    fotoobo.fortinet.fortigate.FortiGate.api_get.assert_called_with(
+    fotoobo.fortinet.fortigate.FortiGate.api_get_paged.assert_called_with(
         url="/cmdb/firewall/address/", vdom=""
     )
     fotoobo.helpers.result.Result.save_raw.assert_called_with(
         file=Path("test.json"), key="test_fgt_1"
     )
+
+
+def test_get_cmdb_firewall_address_pages(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test the pages of a VDOM are merged in the raw output"""
+    pages = [
+        {"vdom": "root", "results": [{"name": "dummy_1", "type": "fqdn", "fqdn": "a.local"}]},
+        {"vdom": "vdom_1", "results": []},
+        {"vdom": "root", "results": [{"name": "dummy_2", "type": "fqdn", "fqdn": "b.local"}]},
+    ]
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate.FortiGate.api_get_paged", MagicMock(return_value=iter(pages))
+    )
+    output_file = tmp_path / "test.json"
+    result = get_cmdb_firewall_address("test_fgt_1", "", "*", str(output_file))
+    assert [_["name"] for _ in result.get_result("test_fgt_1")] == ["dummy_1", "dummy_2"]
+    raw = json.loads(output_file.read_text(encoding="UTF-8"))
+    assert [(_["vdom"], len(_["results"])) for _ in raw] == [("root", 2), ("vdom_1", 0)]
@@ -59,7 +59,7 @@ def test_get_cmdb_firewall_service_custom(monkeypatch: MonkeyPatch) -> None:
         }
     ]
     monkeypatch.setattr(
-        "fotoobo.fortinet.fortigate.FortiGate.api_get",
+        "fotoobo.fortinet.fortigate.FortiGate.api_get_paged",
         MagicMock(return_value=result_mock),
     )
     monkeypatch.setattr("fotoobo.helpers.result.Result.save_raw", MagicMock(return_value=True))
@@ -71,7 +71,7 @@ def test_get_cmdb_firewall_service_custom(monkeypatch: MonkeyPatch) -> None:
     assert data[2]["data_1"] == "8"
     assert data[3]["data_1"] == "89"
     assert data[4]["data_1"] == ""
-    fotoobo.fortinet.fortigate.FortiGate.api_get.assert_called_with(
+    fotoobo.fortinet.fortigate.FortiGate.api_get_paged.assert_called_with(
         url="/cmdb/firewall.service/custom/", vdom=""
     )
     fotoobo.helpers.result.Result.save_raw.assert_called_with(
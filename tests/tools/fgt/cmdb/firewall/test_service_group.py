@@ -34,7 +34,7 @@ def test_get_cmdb_firewall_addrgrp(monkeypatch: MonkeyPatch) -> None:
         }
     ]
     monkeypatch.setattr(
-        "fotoobo.fortinet.fortigate.FortiGate.api_get", MagicMock(return_value=result_mock)
+        "fotoobo.fortinet.fortigate.FortiGate.api_get_paged", MagicMock(return_value=result_mock)
     )
     monkeypatch.setattr("fotoobo.helpers.result.Result.save_raw", MagicMock(return_value=True))
     result = get_cmdb_firewall_service_group("test_fgt_1", "", "", "test.json")
@@ -42,7 +42,7 @@ def test_get_cmdb_firewall_addrgrp(monkeypatch: MonkeyPatch) -> None:
     assert len(data) == 2
     assert data[0]["content"] == "member_1\nmember_2"
     assert data[1]["content"] == "member_3\nmember_4"
-    fotoobo.fortinet.fortigate.FortiGate.api_get.assert_called_with(
+    fotoobo.fortinet.fortigate.FortiGate.api_get_paged.assert_called_with(
         url="/cmdb/firewall/addrgrp/", vdom=""
     )
     fotoobo.helpers.result.Result.save_raw.assert_called_with(
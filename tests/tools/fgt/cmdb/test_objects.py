@@ -0,0 +1,102 @@
+"""
+Test fgt cmdb objects
+"""
+
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from fotoobo.exceptions import APIError, GeneralError
+from fotoobo.fortinet import FortiGate
+from fotoobo.tools.fgt.cmdb.objects import get_cmdb_objects
+
+
+@pytest.fixture(autouse=True)
+def inventory_file(monkeypatch: MonkeyPatch) -> None:
+    """Change inventory file in config to test inventory and query the FortiGates"""
+    monkeypatch.setattr(
+        "fotoobo.helpers.config.config.inventory_file", Path("tests/data/inventory.yaml")
+    )
+
+    def api_get_paged(self: FortiGate, url: str, vdom: str) -> Iterator[Dict[str, Any]]:
+        """Return one object per VDOM, test_fgt_4 has no token and fails"""
+        if not self.token:
+            raise APIError(401)
+
+        for vd in vdom.split(","):
+            yield {"vdom": vd, "results": [{"name": f"{url}_{vd}"}]}
+
+    monkeypatch.setattr("fotoobo.fortinet.fortigate.FortiGate.api_get_paged", api_get_paged)
+
+
+def _normalize(vdom: str, asset: Dict[str, Any]) -> Dict[str, str]:
+    """Turn an object into a row"""
+    return {"name": asset["name"], "vdom": vdom}
+
+
+def test_get_cmdb_objects_fleet() -> None:
+    """Test the objects of all FortiGates matching the pattern are returned"""
+    result = get_cmdb_objects("test_fgt_*", "url", "root,vdom_1", "", _normalize)
+    assert set(result.successful) == {"test_fgt_1", "test_fgt_2"}
+    assert result.failed == ["test_fgt_4"]
+    assert result.get_result("test_fgt_1") == [
+        {"name": "url_root", "vdom": "root"},
+        {"name": "url_vdom_1", "vdom": "vdom_1"},
+    ]
+    assert result.get_result("test_fgt_4") == []
+    assert result.messages["test_fgt_4"][0]["level"] == "error"
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl"])
+def test_get_cmdb_objects_rows(suffix: str, tmp_path: Path) -> None:
+    """Test the rows of all FortiGates are written into a CSV or JSON Lines file"""
+    output_file = tmp_path / f"objects{suffix}"
+    result = get_cmdb_objects("test_fgt_*", "url", "root", str(output_file), _normalize)
+    assert result.get_result("test_fgt_1") == []
+    assert "1 objects written" in result.messages["test_fgt_1"][0]["message"]
+    with output_file.open(encoding="UTF-8") as rows_file:
+        if suffix == ".csv":
+            rows = list(csv.DictReader(rows_file))
+
+        else:
+            rows = [json.loads(_) for _ in rows_file]
+
+    assert sorted(rows, key=lambda _: _["fortigate"]) == [
+        {"fortigate": "test_fgt_1", "name": "url_root", "vdom": "root"},
+        {"fortigate": "test_fgt_2", "name": "url_root", "vdom": "root"},
+    ]
+
+
+def test_get_cmdb_objects_raw(tmp_path: Path) -> None:
+    """Test the raw responses of all FortiGates are saved into a JSON file"""
+    output_file = tmp_path / "objects.json"
+    get_cmdb_objects("test_fgt_*", "url", "root", str(output_file), _normalize)
+    assert json.loads(output_file.read_text(encoding="UTF-8")) == {
+        "test_fgt_1": [{"vdom": "root", "results": [{"name": "url_root"}]}],
+        "test_fgt_2": [{"vdom": "root", "results": [{"name": "url_root"}]}],
+    }
+
+
+def test_get_cmdb_objects_single_error() -> None:
+    """Test the error of one single FortiGate requested by its name is raised"""
+    with pytest.raises(APIError):
+        get_cmdb_objects("test_fgt_4", "url", "root", "", _normalize)
+
+
+def test_get_cmdb_objects_single_timeout(monkeypatch: MonkeyPatch) -> None:
+    """Test one single FortiGate requested by its name which does not complete in time"""
+
+    def api_get_paged(*_: Any, **__: Any) -> Iterator[Dict[str, Any]]:
+        """Take longer than the deadline"""
+        time.sleep(0.3)
+        yield {}
+
+    monkeypatch.setattr("fotoobo.fortinet.fortigate.FortiGate.api_get_paged", api_get_paged)
+    monkeypatch.setattr("fotoobo.helpers.fanout.config.fanout", {"timeout": 0.05})
+    with pytest.raises(GeneralError, match=r"Deadline exceeded \(test_fgt_1\)"):
+        get_cmdb_objects("test_fgt_1", "url", "root", "", _normalize)
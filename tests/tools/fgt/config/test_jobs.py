@@ -0,0 +1,52 @@
+"""
+Test fgt tools config with a pool of worker processes
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from fotoobo.tools.fgt.config import check, get, info
+
+
+@pytest.fixture
+def config_dir(tmp_path: Path) -> Path:
+    """A directory with some configuration files (and one which is not valid)"""
+    for index in range(6):
+        source = "single" if index % 2 else "vdom"
+        shutil.copy(f"tests/data/fortigate_config_{source}.conf", tmp_path / f"fgt{index}.conf")
+
+    (tmp_path / "fgt6.conf").touch()
+    return tmp_path
+
+
+def test_check_jobs(config_dir: Path) -> None:
+    """Test the checks in worker processes give the same result as in a single process"""
+    serial = check(config_dir, Path("tests/data/fortigate_checks.yaml"))
+    parallel = check(config_dir, Path("tests/data/fortigate_checks.yaml"), jobs=3)
+    assert parallel.messages == serial.messages
+    assert serial.messages
+
+
+def test_get_and_info_jobs(config_dir: Path) -> None:
+    """Test get and info in worker processes give the same result as in a single process"""
+    (config_dir / "fgt6.conf").unlink()
+    assert (
+        get(config_dir, "global", "/system", jobs=4).all_results()
+        == get(config_dir, "global", "/system").all_results()
+    )
+    assert {_: vars(_info) for _, _info in info(config_dir, jobs=4).all_results().items()} == {
+        _: vars(_info) for _, _info in info(config_dir).all_results().items()
+    }
+
+
+def test_jobs_config_cache(config_dir: Path, monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test the changes of the config caches in the workers are saved"""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr("fotoobo.helpers.config.config.config_cache", {"dir": str(cache_dir)})
+    (config_dir / "fgt6.conf").unlink()
+    get(config_dir, "global", "/system", jobs=3)
+    assert (cache_dir / "index.json").read_text(encoding="UTF-8").count(".conf") == 6
+    assert len(list(cache_dir.glob("*.json.z"))) == 2
@@ -9,7 +9,7 @@ from unittest.mock import MagicMock
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
 
-from fotoobo.exceptions import GeneralError, GeneralWarning
+from fotoobo.exceptions import CircuitOpenError, GeneralError, GeneralWarning
 from fotoobo.tools.fgt.get import version
 
 
@@ -59,6 +59,19 @@ def test_version_exception_from_fortigate(side_effect: Any, monkeypatch: MonkeyP
     assert result.get_result("test_fgt_1") == "unknown due to dummy message"
 
 
+def test_version_circuit_open(monkeypatch: MonkeyPatch) -> None:
+    """Test get version reports a FortiGate with an open circuit as skipped"""
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate.FortiGate.get_version",
+        MagicMock(side_effect=CircuitOpenError("Circuit open")),
+    )
+    result = version("test_fgt_1")
+    assert result.get_result("test_fgt_1") == "skipped due to Circuit open"
+    assert result.skipped == ["test_fgt_1"]
+    assert not result.successful
+    assert not result.failed
+
+
 def test_version_no_fortigates(monkeypatch: MonkeyPatch) -> None:
     """Test get version with no FortiGates in inventory"""
     monkeypatch.setattr(
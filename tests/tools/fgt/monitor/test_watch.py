@@ -0,0 +1,149 @@
+"""
+Test fgt tools monitor watch
+"""
+
+import io
+import json
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from fotoobo.exceptions import GeneralWarning
+from fotoobo.fortinet.fortigate import FortiGate
+from fotoobo.tools.fgt.monitor import _flatten, watch
+from tests.helper import ResponseMock
+
+
+@pytest.fixture(autouse=True)
+def inventory_file(monkeypatch: MonkeyPatch) -> None:
+    """Change inventory file in config to test inventory"""
+    monkeypatch.setattr(
+        "fotoobo.helpers.config.config.inventory_file", Path("tests/data/inventory.yaml")
+    )
+
+
+def test_flatten() -> None:
+    """Test nested data is flattened into paths"""
+    assert _flatten({"a": {"b": 1, "c": [2, {"d": 3}]}, "e": None}) == {
+        "a.b": 1,
+        "a.c.0": 2,
+        "a.c.1.d": 3,
+        "e": None,
+    }
+    assert _flatten("value") == {"": "value"}
+
+
+def test_watch(monkeypatch: MonkeyPatch) -> None:
+    """Test only the changes and the start and end of failures are written"""
+    api = MagicMock(
+        side_effect=[
+            ResponseMock(json={"results": {"port1": "up", "port2": "up"}}, status_code=200),
+            ResponseMock(json={"results": {"port1": "up", "port2": "up"}}, status_code=200),
+            GeneralWarning("Unreachable"),
+            GeneralWarning("Unreachable"),
+            ResponseMock(json={"results": {"port1": "down", "port3": "up"}}, status_code=200),
+        ]
+    )
+    monkeypatch.setattr("fotoobo.fortinet.fortigate.FortiGate.api", api)
+    sink = io.StringIO()
+
+    assert watch("test_fgt_1", ["/monitor/system/interface/"], sink, interval=0, polls=5) == 3
+    api.assert_called_with("get", "monitor/system/interface", use_cache=False)
+    records = [json.loads(_) for _ in sink.getvalue().splitlines()]
+    assert {_["fortigate"] for _ in records} == {"test_fgt_1"}
+    assert {_["endpoint"] for _ in records} == {"/monitor/system/interface/"}
+    assert [{k: v for k, v in _.items() if k in ("changes", "error")} for _ in records] == [
+        {
+            "changes": {
+                "port1": {"old": None, "new": "up"},
+                "port2": {"old": None, "new": "up"},
+            }
+        },
+        {"error": "Unreachable"},
+        {
+            "error": None,
+            "changes": {
+                "port1": {"old": "up", "new": "down"},
+                "port2": {"old": "up", "new": None},
+                "port3": {"old": None, "new": "up"},
+            },
+        },
+    ]
+
+
+def test_watch_stop(monkeypatch: MonkeyPatch) -> None:
+    """Test watching until it is stopped"""
+    stop = threading.Event()
+
+    def api(*_: str, **__: bool) -> ResponseMock:
+        stop.set()
+        return ResponseMock(json={"results": {"checksum": "abc"}}, status_code=200)
+
+    monkeypatch.setattr("fotoobo.fortinet.fortigate.FortiGate.api", api)
+    sink = io.StringIO()
+    assert watch("test_fgt_2", ["system/ha-checksums"], sink, 60, jitter=0, stop=stop) == 1
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    (
+        pytest.param(
+            MagicMock(return_value=["results"]),
+            "Invalid response: expected a JSON object, got list",
+            id="list",
+        ),
+        pytest.param(
+            MagicMock(side_effect=json.JSONDecodeError("Expecting value", "<html>", 0)),
+            "Invalid response: Expecting value: line 1 column 1 (char 0)",
+            id="no json",
+        ),
+    ),
+)
+def test_watch_invalid_response(body: MagicMock, expected: str, monkeypatch: MonkeyPatch) -> None:
+    """Test an invalid response is written as a failed poll and does not stop the watch"""
+    response = ResponseMock(status_code=200)
+    response.json = body
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate.FortiGate.api", MagicMock(return_value=response)
+    )
+    sink = io.StringIO()
+    assert watch("test_fgt_1", ["monitor/system/status"], sink, interval=0, polls=2) == 1
+    assert json.loads(sink.getvalue())["error"] == expected
+    FortiGate.api.assert_called_with(  # type: ignore[attr-defined]
+        "get", "monitor/system/status", use_cache=False
+    )
+
+
+def test_watch_jitter(monkeypatch: MonkeyPatch) -> None:
+    """Test the starts of the polls of a round are spread with the rate limit of the fan-out"""
+    fan_out = MagicMock()
+    monkeypatch.setattr("fotoobo.tools.fgt.monitor.FanOut", fan_out)
+    watch("test_fgt_*", ["system/status"], io.StringIO(), interval=6, jitter=0.5, polls=1)
+    fan_out.__getitem__.return_value.assert_called_with(deadline=6, rate_limit=1)
+
+
+def test_watch_skip_running(monkeypatch: MonkeyPatch) -> None:
+    """Test a FortiGate is not polled again while its last poll is still running"""
+    release = threading.Event()
+
+    def api(*_: str, **__: bool) -> ResponseMock:
+        release.wait(1)
+        return ResponseMock(json={"results": {}}, status_code=200)
+
+    api_mock = MagicMock(side_effect=api)
+    log = MagicMock()
+    monkeypatch.setattr("fotoobo.fortinet.fortigate.FortiGate.api", api_mock)
+    monkeypatch.setattr("fotoobo.tools.fgt.monitor.log", log)
+    try:
+        assert not watch("test_fgt_1", ["system/status"], io.StringIO(), interval=0.1, polls=2)
+
+    finally:
+        release.set()
+
+    assert api_mock.call_count == 1
+    log.warning.assert_any_call(
+        "Poll of '%s' skipped, its last poll is still running", "test_fgt_1"
+    )
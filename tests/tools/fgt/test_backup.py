@@ -2,13 +2,16 @@
 Test fotoobo.tools.fgt.backup
 """
 
+import json
 from pathlib import Path
+from typing import Any, Dict
 from unittest.mock import MagicMock
 
 from _pytest.monkeypatch import MonkeyPatch
 
-from fotoobo.exceptions import APIError
-from fotoobo.tools.fgt import backup
+from fotoobo.exceptions import APIError, CircuitOpenError, GeneralWarning
+from fotoobo.fortinet import FortiGate
+from fotoobo.tools.fgt import backup, backup_to_dir
 
 
 def test_backup_all(monkeypatch: MonkeyPatch) -> None:
@@ -122,3 +125,138 @@ def test_backup_api_error(monkeypatch: MonkeyPatch) -> None:
     message = result.messages["test_fgt_2"][0]
     assert message["level"] == "error"
     assert "test_fgt_2 returned unknown" in message["message"]
+
+
+def test_backup_circuit_open(monkeypatch: MonkeyPatch) -> None:
+    """
+    Test fgt backup skips a FortiGate with an open circuit
+    """
+    monkeypatch.setattr(
+        "fotoobo.tools.fgt.main.config.inventory_file", Path("tests/data/inventory.yaml")
+    )
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate.FortiGate.backup",
+        MagicMock(side_effect=CircuitOpenError("Circuit open")),
+    )
+
+    result = backup("test_fgt_2")
+
+    assert not result.all_results()
+    assert result.skipped == ["test_fgt_2"]
+    assert result.messages["test_fgt_2"] == [{"message": "Circuit open", "level": "warning"}]
+
+
+def test_backup_to_dir(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """
+    Test fgt backup_to_dir only holds the metadata of the backups in the results
+    """
+    monkeypatch.setattr(
+        "fotoobo.tools.fgt.main.config.inventory_file", Path("tests/data/inventory.yaml")
+    )
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate.FortiGate.backup_to_file", MagicMock(return_value=1234)
+    )
+
+    on_backup = MagicMock()
+    result = backup_to_dir(None, tmp_path, on_backup=on_backup)
+
+    all_results = result.all_results()
+    assert len(all_results) == 3
+    assert all_results["test_fgt_1"] == {"file": str(tmp_path / "test_fgt_1.conf"), "size": 1234}
+    on_backup.assert_any_call("test_fgt_1", tmp_path / "test_fgt_1.conf")
+    assert on_backup.call_count == 3
+    assert result.successful == ["test_fgt_1", "test_fgt_2", "test_fgt_4"]
+    message = result.messages["test_fgt_1"][0]
+    assert message["level"] == "info"
+    assert "succeeded" in message["message"]
+
+
+def test_backup_to_dir_errors(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """
+    Test fgt backup_to_dir with an invalid backup, an API error and an open circuit
+    """
+    errors = {
+        "test_fgt_1": GeneralWarning("Backup 'dummy' failed with error '456'"),
+        "test_fgt_2": APIError("dummy error"),
+        "test_fgt_4": CircuitOpenError("Circuit open"),
+    }
+
+    def backup_to_file_mock(backup_file: Path) -> int:
+        raise errors[backup_file.stem]
+
+    monkeypatch.setattr(
+        "fotoobo.tools.fgt.main.config.inventory_file", Path("tests/data/inventory.yaml")
+    )
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate.FortiGate.backup_to_file",
+        MagicMock(side_effect=backup_to_file_mock),
+    )
+
+    result = backup_to_dir(None, tmp_path)
+
+    assert result.all_results() == {"test_fgt_1": {}, "test_fgt_2": {}}
+    assert result.failed == ["test_fgt_1", "test_fgt_2"]
+    assert result.skipped == ["test_fgt_4"]
+    assert result.messages["test_fgt_1"][0]["level"] == "error"
+    assert "failed with error '456'" in result.messages["test_fgt_1"][0]["message"]
+    assert "test_fgt_2 returned unknown" in result.messages["test_fgt_2"][0]["message"]
+
+
+def test_backup_to_dir_skip_unchanged(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """
+    Test fgt backup_to_dir skips the FortiGates whose config checksum has not changed
+    """
+    checksums: Dict[str, Any] = {
+        "test_fgt_1": "aaa",
+        "test_fgt_2": "bbb",
+        "test_fgt_4": GeneralWarning("none"),
+    }
+
+    def backup_to_file_mock(backup_file: Path) -> int:
+        backup_file.write_text("#config-version", encoding="UTF-8")
+        return 15
+
+    def get_config_checksum_mock(self: FortiGate) -> str:
+        checksum = checksums[self.token]  # the token is the name of the FortiGate here
+        if isinstance(checksum, Exception):
+            raise checksum
+
+        return str(checksum)
+
+    monkeypatch.setattr(
+        "fotoobo.tools.fgt.main.config.inventory_file", Path("tests/data/inventory.yaml")
+    )
+    backup_to_file = MagicMock(side_effect=backup_to_file_mock)
+    monkeypatch.setattr("fotoobo.fortinet.fortigate.FortiGate.backup_to_file", backup_to_file)
+    monkeypatch.setattr(
+        "fotoobo.fortinet.fortigate.FortiGate.get_config_checksum", get_config_checksum_mock
+    )
+    monkeypatch.setattr(
+        "fotoobo.inventory.inventory.Inventory.get",
+        MagicMock(return_value={name: FortiGate("dummy", name) for name in checksums}),
+    )
+
+    result = backup_to_dir(None, tmp_path, skip_unchanged=True)
+    assert not result.skipped
+    assert json.loads((tmp_path / ".checksums.json").read_text(encoding="UTF-8")) == {
+        "test_fgt_1": "aaa",
+        "test_fgt_2": "bbb",
+    }
+
+    checksums["test_fgt_2"] = "ccc"
+    (tmp_path / "test_fgt_1.conf").unlink()
+    result = backup_to_dir(None, tmp_path, skip_unchanged=True)
+    assert set(result.successful) == {"test_fgt_1", "test_fgt_2", "test_fgt_4"}
+
+    result = backup_to_dir(None, tmp_path, skip_unchanged=True)
+    assert set(result.skipped) == {"test_fgt_1", "test_fgt_2"}
+    assert result.successful == ["test_fgt_4"]
+    assert result.all_results()["test_fgt_1"] == {
+        "file": str(tmp_path / "test_fgt_1.conf"),
+        "size": 0,
+        "unchanged": True,
+    }
+    assert result.messages["test_fgt_1"] == [
+        {"message": "Config unchanged, backup skipped", "level": "info"}
+    ]
+    assert backup_to_file.call_count == 7